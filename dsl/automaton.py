@@ -0,0 +1,90 @@
+# dsl/automaton.py
+
+from collections import deque
+from typing import Dict, Generic, Hashable, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+
+class AhoCorasick(Generic[T]):
+    """
+    Aho-Corasick 多模式匹配自动机。
+
+    所有模式串在构建时合并为一棵带失败指针的字典树，匹配时对文本只扫描一遍，
+    即可找出全部（包括相互重叠的）命中，耗时与文本长度和命中数成正比，
+    与模式串的数量无关。每个模式串可以挂多个负载（如同一个词同时属于
+    “命令同义词”和“偏好词”）。
+    """
+
+    def __init__(self):
+        # 节点 i 的转移表、失败指针和输出（负载, 模式串长度）
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[Tuple[T, int]]] = [[]]
+        self.built = False
+
+    def add(self, pattern: str, payload: T):
+        """
+        添加一个模式串及其负载，须在 build 之前调用。
+
+        :param pattern: 模式串，空串会被忽略
+        :param payload: 命中时返回的负载
+        """
+        if self.built:
+            raise RuntimeError("自动机已构建，不能再添加模式串")
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            node = next_node
+        entry = (payload, len(pattern))
+        if entry not in self.outputs[node]:
+            self.outputs[node].append(entry)
+
+    def build(self) -> "AhoCorasick[T]":
+        """按层次遍历计算失败指针，并把失败链上的输出合并到每个节点"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+                queue.append(child)
+        self.built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[int, int, T]]:
+        """
+        扫描文本，按结束位置依次产生全部命中。
+
+        :param text: 待匹配文本
+        :return: (起始下标, 结束下标（不含）, 负载) 的迭代器
+        """
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                end = index + 1
+                for payload, length in outputs[node]:
+                    yield end - length, end, payload
+
+    def find_all(self, text: str) -> List[Tuple[int, int, T]]:
+        """返回全部命中的列表"""
+        return list(self.iter_matches(text))
+
+    def __len__(self) -> int:
+        """节点数（含根节点）"""
+        return len(self.goto)
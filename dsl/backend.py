@@ -0,0 +1,214 @@
+# dsl/backend.py
+
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from dsl.parser import DSLParser, Intent
+
+
+class LocalParseBackend:
+    """在调用线程中直接解析意图的后端"""
+    name = "local"
+
+    def __init__(self, parser: DSLParser, cache_dir: Optional[str] = None):
+        """
+        :param parser: 用于解析的 DSLParser
+        :param cache_dir: jieba 词典缓存目录，默认使用系统临时目录
+        """
+        self.parser = parser
+        self.cache_dir = cache_dir
+
+    def warmup(self) -> float:
+        """在当前进程中预热分词器，返回耗时（秒）"""
+        return self.parser.warmup(self.cache_dir)
+
+    def resolve(self, text: str) -> Intent:
+        """解析一条用户输入的意图"""
+        return self.parser.resolve_intent(text)
+
+    def queue_depth(self) -> int:
+        """本地解析没有排队"""
+        return 0
+
+    def rebuild_lexicons(self, lexicons: Dict):
+        """本地后端与服务器共用解析器，词典和意图缓存已由解析器的 rebuild_lexicons 重建，无需额外处理"""
+
+    def stats(self) -> Dict:
+        """返回后端名称、排队情况与意图缓存统计"""
+        stats = {"backend": self.name, "workers": 0, "queue_depth": 0}
+        if self.parser.intent_cache is not None:
+            stats["intent_cache"] = self.parser.intent_cache.stats()
+        return stats
+
+    def shutdown(self):
+        """本地后端无需释放资源"""
+
+
+# 工作进程中的解析器，由 _init_worker 在进程启动时创建一次
+_worker_parser: Optional[DSLParser] = None
+
+
+def _init_worker(cache_dir: Optional[str] = None, segmenter: str = 'jieba',
+                 intent_cache_size: int = 1024, lexicons: Optional[Dict] = None):
+    """工作进程初始化：构建词典并预先加载分词器，避免首条消息承担加载开销"""
+    global _worker_parser
+    _worker_parser = DSLParser(None, segmenter, intent_cache_size)
+    if lexicons is not None:
+        _worker_parser.load_lexicons(lexicons)
+    _worker_parser.warmup(cache_dir)
+
+
+def _worker_ready() -> bool:
+    """空任务，用于确认工作进程已完成初始化"""
+    return _worker_parser is not None
+
+
+def _resolve_in_worker(text: str) -> Tuple[Intent, int, Optional[Dict[str, int]]]:
+    """
+    在工作进程中解析意图。
+
+    :param text: 用户输入
+    :return: 意图、工作进程 ID 与本进程的意图缓存统计（未启用缓存时为 None）
+    """
+    cache = _worker_parser.intent_cache
+    intent = _worker_parser.resolve_intent(text)
+    return intent, os.getpid(), cache.stats() if cache is not None else None
+
+
+class ProcessPoolParseBackend:
+    """
+    把意图解析（分词、语法匹配、同义词与正则扫描）分发到进程池的后端。
+
+    工作进程只负责“文本 -> 意图”这一纯计算步骤；命令执行和会话状态
+    仍留在服务器进程中，因此多核可以并行解析而无需在进程间同步状态。
+
+    工作进程在启动时构建各自的词典和意图缓存。rebuild_lexicons 用新词典启动一组工作进程替换原进程池，
+    旧进程处理完已提交的任务后退出；缓存统计随解析结果带回，stats 汇总各进程最近一次的统计与已退出进程的累计值。
+    """
+    name = "process"
+
+    # 跨进程池累计的意图缓存统计项，size 只统计当前的工作进程
+    CUMULATIVE_CACHE_STATS = ("hits", "misses", "evictions", "invalidations")
+
+    def __init__(self, workers: Optional[int] = None, cache_dir: Optional[str] = None,
+                 segmenter: str = 'jieba', intent_cache_size: int = 1024):
+        """
+        :param workers: 工作进程数，默认为 CPU 核数
+        :param cache_dir: jieba 词典缓存目录，各工作进程共用同一份缓存文件
+        :param segmenter: 工作进程中解析器使用的分词器
+        :param intent_cache_size: 每个工作进程的意图缓存条目数
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.segmenter = segmenter
+        self.intent_cache_size = intent_cache_size
+        self.executor = self._create_executor()
+        self.pending = 0
+        # 工作进程 ID -> 该进程最近一次返回的意图缓存统计
+        self.worker_cache_stats: Dict[int, Dict[str, int]] = {}
+        # 已被替换的工作进程的命中、未命中、淘汰与失效次数
+        self.retired_cache_stats = dict.fromkeys(self.CUMULATIVE_CACHE_STATS, 0)
+        self.lock = threading.Lock()
+
+    def _create_executor(self, lexicons: Optional[Dict] = None) -> ProcessPoolExecutor:
+        """创建进程池；lexicons 为服务器解析器导出的词典，None 表示使用默认词典"""
+        # 服务器进程中已有多个线程，使用 spawn 避免 fork 复制锁的状态
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.cache_dir, self.segmenter, self.intent_cache_size, lexicons)
+        )
+
+    def _start_workers(self, executor: ProcessPoolExecutor):
+        """启动进程池中的全部工作进程并等待它们完成初始化"""
+        futures = [executor.submit(_worker_ready) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def warmup(self) -> float:
+        """启动全部工作进程并等待它们完成初始化，返回耗时（秒）"""
+        started = time.perf_counter()
+        self._start_workers(self.executor)
+        return time.perf_counter() - started
+
+    def submit(self, text: str) -> Future:
+        """
+        提交一条解析任务，返回 Future；可配合 asyncio.wrap_future 使用。
+
+        :param text: 用户输入
+        """
+        # 在锁内提交，避免任务提交到 rebuild_lexicons 刚刚关闭的进程池
+        with self.lock:
+            self.pending += 1
+            executor = self.executor
+            task = executor.submit(_resolve_in_worker, text)
+        future = Future()
+        task.add_done_callback(lambda task: self._task_done(task, future, executor))
+        return future
+
+    def _task_done(self, task: Future, future: Future, executor: ProcessPoolExecutor):
+        """记录当前进程池的工作进程带回的缓存统计，并把意图交给调用方的 Future"""
+        with self.lock:
+            self.pending -= 1
+        if task.cancelled():
+            future.cancel()
+            return
+        error = task.exception()
+        if error is not None:
+            future.set_exception(error)
+            return
+        intent, worker, cache_stats = task.result()
+        if cache_stats is not None:
+            with self.lock:
+                if executor is self.executor:
+                    self.worker_cache_stats[worker] = cache_stats
+        future.set_result(intent)
+
+    def resolve(self, text: str) -> Intent:
+        """解析一条用户输入的意图，阻塞直到工作进程返回结果"""
+        return self.submit(text).result()
+
+    def queue_depth(self) -> int:
+        """已提交但尚未完成的解析任务数"""
+        return self.pending
+
+    def rebuild_lexicons(self, lexicons: Dict):
+        """
+        词典变化后调用：用新词典启动一组工作进程，全部就绪后替换原进程池，
+        替换前提交的任务仍由旧进程处理完毕。新进程载入词典时各自清空一次意图缓存，计入失效次数。
+
+        :param lexicons: 服务器解析器 export_lexicons 的返回值
+        """
+        executor = self._create_executor(lexicons)
+        self._start_workers(executor)
+        with self.lock:
+            retired, self.executor = self.executor, executor
+            for worker in self.worker_cache_stats.values():
+                for name in self.CUMULATIVE_CACHE_STATS:
+                    self.retired_cache_stats[name] += worker[name]
+            self.worker_cache_stats.clear()
+        retired.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        """返回后端名称、工作进程数、排队任务数与各工作进程意图缓存统计之和"""
+        stats = {"backend": self.name, "workers": self.workers, "queue_depth": self.pending}
+        if self.intent_cache_size > 0:
+            with self.lock:
+                worker_stats = list(self.worker_cache_stats.values())
+                retired = dict(self.retired_cache_stats)
+            stats["intent_cache"] = {
+                "size": sum(worker["size"] for worker in worker_stats),
+                "maxsize": self.intent_cache_size * self.workers,
+            }
+            for name in self.CUMULATIVE_CACHE_STATS:
+                stats["intent_cache"][name] = retired[name] + sum(worker[name] for worker in worker_stats)
+        return stats
+
+    def shutdown(self):
+        """关闭进程池"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,72 @@
+# dsl/cache.py
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class IntentCache:
+    """
+    有界的意图解析结果缓存，按最近使用顺序淘汰。
+
+    只缓存“文本 -> 意图”这一纯计算结果，不缓存随机生成的回复；
+    锁只保护字典本身的 O(1) 操作，可在多个会话之间共享。
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        :param maxsize: 最多缓存的条目数
+        """
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Hashable, Tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple]:
+        """
+        查找缓存，命中时标记为最近使用。
+
+        :param key: 缓存键（标准化后的文本）
+        :return: 缓存的意图，未命中时返回 None
+        """
+        with self.lock:
+            intent = self.entries.get(key)
+            if intent is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return intent
+
+    def put(self, key: Hashable, intent: Tuple):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self.lock:
+            self.entries[key] = intent
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """清空缓存，词典变化后调用"""
+        with self.lock:
+            self.entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """返回缓存大小与命中、未命中、淘汰、失效次数"""
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,375 @@
+# dsl/commands.py
+
+import random
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# 语速表述 -> 标准语速参数
+SPEED_MAPPING = {
+    # 快速相关表述
+    "快": "快",
+    "快点": "快",
+    "快一些": "快",
+    "快一点": "快",
+    "快些": "快",
+    "快速": "快",
+    "加快": "快",
+    "说快点": "快",
+
+    # 慢速相关表述
+    "慢": "慢",
+    "慢点": "慢",
+    "慢一些": "慢",
+    "慢一点": "慢",
+    "慢些": "慢",
+    "慢速": "慢",
+    "放慢": "慢",
+    "说慢点": "慢",
+
+    # 正常速度相关表述
+    "正常": "正常",
+    "普通": "正常",
+    "标准": "正常",
+    "一般": "正常",
+    "默认": "正常",
+    "正常速度": "正常",
+    "标准速度": "正常",
+    "恢复正常": "正常"
+}
+
+# 语速表述不匹配任何预设时的提示
+SPEED_TIPS = (
+    "请说'快一点'、'正常'或'慢一点'来调整语速",
+    "您可以说'快点'、'正常速度'或'慢点'来设置语速",
+    "试试说'说快点'、'标准速度'或'说慢点'吧",
+    "可以使用'快速'、'普通'或'慢速'来调整语速哦",
+    "语速可以设置为'快'、'正常'或'慢'～"
+)
+
+# 未提供语速参数时的提示
+SPEED_HELP_MESSAGES = (
+    "请告诉我您想要的语速，比如'调整语速 快一点'",
+    "您想要调整到什么语速呢？可以说'调整语速 正常'",
+    "请指定想要的语速，例如：'调整语速 慢一点'",
+    "语速调整需要说明具体速度，比如'调整语速 标准'",
+    "您可以这样调整语速：'调整语速 快点'"
+)
+
+
+class ParsedCommand:
+    """解析得到的一条命令：命令名、偏好（喜欢/不喜欢/随便）和参数"""
+    __slots__ = ('name', 'preference', 'param')
+
+    def __init__(self, name: Optional[str], preference: Optional[str] = None, param: Optional[str] = None):
+        self.name = name
+        self.preference = preference
+        self.param = param
+
+    @classmethod
+    def from_tokens(cls, tokens: Sequence[str]) -> "ParsedCommand":
+        """
+        按命令声明的参数顺序把记号列表（如语法解析结果）分配到各槽位。
+        未注册或不带参数的命令，多出的第一个记号作为参数。
+
+        :param tokens: 以命令名开头的记号列表
+        """
+        if not tokens:
+            return cls(None)
+        name = tokens[0]
+        spec = COMMANDS.get(name)
+        slots = [argument.slot for argument in spec.arguments] if spec and spec.arguments else ['param']
+        values = dict(zip(slots, tokens[1:]))
+        return cls(name, values.get('preference'), values.get('param'))
+
+    def as_tuple(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """返回 (command, preference, parameter)，即意图中不含上下文特征的部分"""
+        return self.name, self.preference, self.param
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ParsedCommand):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __repr__(self) -> str:
+        return f"ParsedCommand(name={self.name!r}, preference={self.preference!r}, param={self.param!r})"
+
+
+class Argument:
+    """
+    命令参数的声明：写入的槽位、可选值（None 表示任意文本）、是否可省略，
+    以及自然语言输入中填充该参数的词典类别（DSLParser.SLOT_CATEGORIES 之一，None 表示不从词典填充）
+    """
+    __slots__ = ('slot', 'choices', 'optional', 'lexicon')
+
+    def __init__(self, slot: str, choices: Optional[Tuple[str, ...]] = None, optional: bool = False,
+                 lexicon: Optional[str] = None):
+        self.slot = slot
+        self.choices = choices
+        self.optional = optional
+        self.lexicon = lexicon
+
+
+# 命令处理函数：接收解析器与命令，返回回复；返回 None 表示参数不足，改为回复用法提示
+Handler = Callable[["DSLParser", ParsedCommand], Optional[str]]
+# 后续动作：命令成功执行后，根据机器人状态补充回复
+FollowUp = Callable[["DSLParser", str], str]
+
+
+class CommandSpec:
+    """一条命令的完整声明，语法、同义词、意图模式和执行分派都由它生成"""
+    __slots__ = ('name', 'synonyms', 'patterns', 'arguments', 'handler', 'usage', 'follow_up', 'suggest')
+
+    def __init__(self, name: str, synonyms: Sequence[str], patterns: Sequence[str],
+                 handler: Handler, arguments: Sequence[Argument] = (),
+                 usage: Sequence[str] = (), follow_up: Optional[FollowUp] = None, suggest: bool = True):
+        self.name = name
+        self.synonyms = tuple(synonyms)
+        self.patterns = tuple(patterns)
+        self.arguments = tuple(arguments)
+        self.handler = handler
+        self.usage = tuple(usage)
+        self.follow_up = follow_up
+        self.suggest = suggest
+
+    def run(self, parser, command: ParsedCommand) -> str:
+        """
+        执行命令，参数不足时返回用法提示，成功时再执行后续动作。
+
+        :param parser: 提供 robot 的 DSLParser
+        :param command: 解析得到的命令
+        """
+        reply = self.handler(parser, command)
+        if reply is None:
+            if len(self.usage) == 1:
+                return self.usage[0]
+            return random.choice(self.usage)
+        if self.follow_up is not None:
+            reply = self.follow_up(parser, reply)
+        return reply
+
+
+# 已注册的命令，按注册顺序排列：语法分支、同义词和意图模式的优先级都沿用这个顺序
+COMMANDS: Dict[str, CommandSpec] = {}
+
+
+def register_command(name: str, synonyms: Sequence[str], patterns: Sequence[str], handler: Handler,
+                     arguments: Sequence[Argument] = (), usage: Sequence[str] = (),
+                     follow_up: Optional[FollowUp] = None, suggest: bool = True) -> CommandSpec:
+    """
+    注册一条命令。新增命令只需在此登记一次，DSLParser 的同义词、意图模式、
+    pyparsing 语法、自然语言输入的参数提取、兜底建议和 execute 的分派表都由注册表生成。
+
+    :param name: 命令名，同时是语法中的关键词
+    :param synonyms: 命令同义词
+    :param patterns: 意图正则模式
+    :param handler: 处理函数
+    :param arguments: 语法中紧随命令关键词的参数
+    :param usage: 参数不足时的提示，多条时随机选择一条
+    :param follow_up: 命令成功后的后续动作
+    :param suggest: 无法理解用户输入时，是否列在兜底建议的功能列表中
+    """
+    if name in COMMANDS:
+        raise ValueError(f"命令已注册: {name}")
+    spec = CommandSpec(name, synonyms, patterns, handler, arguments, usage, follow_up, suggest)
+    COMMANDS[name] = spec
+    return spec
+
+
+def robot_action(method: str) -> Handler:
+    """返回不带参数调用机器人方法的处理函数"""
+    def handler(parser, command: ParsedCommand) -> str:
+        return getattr(parser.robot, method)()
+    return handler
+
+
+def preference_setter(method: str) -> Handler:
+    """
+    返回设置口味/种类偏好的处理函数：同时给出偏好和参数时按二者设置，
+    只说“随便”时设置为随便，其余情况视为参数不足。
+
+    :param method: 机器人上的设置方法名
+    """
+    def handler(parser, command: ParsedCommand) -> Optional[str]:
+        setter = getattr(parser.robot, method)
+        if command.preference and command.param:
+            return setter(command.preference, command.param)
+        if command.preference == "随便":
+            return setter("随便")
+        return None
+    return handler
+
+
+def adjust_speed(parser, command: ParsedCommand) -> Optional[str]:
+    """把各种语速表述转换为标准语速参数后调整语速"""
+    if not command.param:
+        return None
+    speed = SPEED_MAPPING.get(command.param.strip())
+    if speed:
+        return parser.robot.adjust_speed(speed)
+    # 如果输入不匹配任何预设，给出提示
+    return random.choice(SPEED_TIPS)
+
+
+def refresh_food_recommendation(parser, reply: str) -> str:
+    """当前处于美食推荐状态时，偏好变化后立即更新推荐"""
+    if parser.robot.current_state == "美食推荐":
+        recommendations = parser.robot.recommend_food()
+        return f"{reply} {recommendations}"
+    return reply
+
+
+PREFERENCES = ("喜欢", "不喜欢", "随便")
+
+register_command(
+    "打招呼",
+    synonyms=["你好", "您好", "哈喽", "安安", "嗨", "hello", "hi", "见到你很高兴", "早上好", "下午好", "晚上好", "在"],
+    patterns=[
+        r".*(?:你好|hello|hi).*",
+        r"(?:早上|中午|下午|晚上)好"
+    ],
+    handler=robot_action("greet"),
+)
+register_command(
+    "推荐食堂",
+    synonyms=["食堂推荐", "进入食堂推荐", "推荐食堂", "推荐餐厅", "哪里吃", "哪个食堂好", "食堂怎么走", "去哪吃", "食堂建议"],
+    patterns=[
+        r".*哪个.*(?:食堂|餐厅).*",
+        r".*(?:食堂|餐厅).*推荐.*",
+        r".*去哪.*吃.*"
+    ],
+    handler=robot_action("recommend_canteen"),
+)
+register_command(
+    "推荐美食",
+    synonyms=["美食推荐", "进入美食推荐", "推荐菜品", "有什么好吃的", "吃什么", "推荐好吃的", "吃啥", "吃点什么", "什么好吃"],
+    patterns=[
+        r".*(?:推荐|有什么).*(?:好吃的|美食).*",
+        r".*今天吃什么.*",
+        r".*吃.*推荐.*"
+    ],
+    handler=robot_action("recommend_food"),
+)
+register_command(
+    "设置口味",
+    synonyms=["我喜欢吃", "喜欢吃", "不喜欢吃", "随便", "喜欢", "口味设置", "调整口味"],
+    patterns=[
+        r".*(?:喜欢吃|不喜欢吃|随便).*"
+    ],
+    arguments=[Argument('preference', PREFERENCES, lexicon='preference'),
+               Argument('param', ("酸", "甜", "辣", "咸"), optional=True, lexicon='flavor')],
+    handler=preference_setter("set_flavor_preference"),
+    usage=["请指定您的口味偏好，例如：'设置口味 喜欢酸'，或者说'设置口味 随便'"],
+    follow_up=refresh_food_recommendation,
+)
+register_command(
+    "设置种类",
+    synonyms=["我想吃", "类型设置", "调整种类", "改变种类", "种类偏好"],
+    patterns=[
+        r".*(?:我喜欢|不喜欢|随便).*"
+    ],
+    arguments=[Argument('preference', PREFERENCES, lexicon='preference'),
+               Argument('param', ("米", "面", "其他"), optional=True, lexicon='kind')],
+    handler=preference_setter("set_kind_preference"),
+    usage=["请指定您的种类偏好，例如：'设置种类 喜欢米'，或者说'设置种类 随便'"],
+    follow_up=refresh_food_recommendation,
+)
+register_command(
+    "查询时间",
+    synonyms=["现在几点", "什么时间", "几点了", "报时", "时间", "现在几点了"],
+    patterns=[
+        r".*(?:现在几点|几点了|什么时间).*",
+        r".*报时.*"
+    ],
+    handler=robot_action("query_time"),
+)
+register_command(
+    "查询天气",
+    synonyms=["今天天气", "天气怎么样", "会下雨吗", "温度多少", "天气预报", "天气"],
+    patterns=[
+        r".*(?:今天天气|天气怎么样|会下雨吗|温度多少|天气预报).*",
+        r".*天气.*"
+    ],
+    handler=robot_action("query_weather"),
+)
+register_command(
+    "调整语速",
+    synonyms=["说话速度", "语速调整", "说快点", "说慢点", "改变语速", "调快语速", "调慢语速", "语速", "说话"],
+    patterns=[
+        r".*(?:说话速度|语速调整|说快点|说慢点|改变语速|调快语速|调慢语速|语速|说话).*",
+        r".*语速快一点.*",
+        r".*语速慢一点.*",
+        r".*调整语速.*",
+        r".*改变语速.*"
+    ],
+    arguments=[Argument('param', ("快", "中", "慢"), optional=True, lexicon='speed')],
+    handler=adjust_speed,
+    usage=SPEED_HELP_MESSAGES,
+)
+register_command(
+    "退出",
+    synonyms=["再见", "结束", "拜拜", "goodbye", "bye", "关闭", "退出程序", "退出系统"],
+    patterns=[
+        r".*(?:再见|结束|拜拜|goodbye|bye|关闭|退出程序|退出系统).*"
+    ],
+    handler=robot_action("exit"),
+)
+register_command(
+    "换一个",
+    synonyms=["换个推荐", "换一家", "下一个", "其他选择", "还有吗", "换一换", "再推荐一个"],
+    patterns=[
+        r".*(?:换个推荐|换一家|下一个|其他选择|还有吗|换一换|再推荐一个).*"
+    ],
+    handler=robot_action("change_canteen"),
+    suggest=False,
+)
+register_command(
+    "帮助",
+    synonyms=["帮助", "怎么用", "使用说明", "功能介绍", "命令列表"],
+    patterns=[
+        r".*(?:帮助|怎么用|使用说明|功能介绍|命令列表).*"
+    ],
+    handler=robot_action("help"),
+    suggest=False,
+)
+register_command(
+    "播放音乐",
+    synonyms=["听音乐", "我想听音乐", "播放一首歌", "来点音乐", "开始播放音乐"],
+    patterns=[
+        r".*(?:播放音乐|听音乐|我想听音乐|播放一首歌|来点音乐|开始播放音乐).*"
+    ],
+    # 歌曲名称可以是任意文本
+    arguments=[Argument('param', None, optional=True)],
+    handler=robot_action("play_music"),
+)
+register_command(
+    "停止音乐",
+    synonyms=["停止播放音乐", "停音乐", "音乐停止", "停止歌声", "停止播放", "别放了", "安静", "停下来"],
+    patterns=[
+        r".*(?:停止音乐|停止播放音乐|停音乐|音乐停止|停止歌声).*"
+    ],
+    handler=robot_action("stop_music"),
+    suggest=False,
+)
+register_command(
+    "暂停音乐",
+    synonyms=["暂停", "暂停播放", "暂停音乐", "停一下音乐", "音乐暂停", "停一会儿"],
+    patterns=[
+        r".*(?:暂停音乐|暂停播放|停一下音乐|音乐暂停).*"
+    ],
+    handler=robot_action("pause_music"),
+)
+register_command(
+    "继续音乐",
+    synonyms=["继续播放", "继续音乐", "恢复播放", "音乐继续", "继续"],
+    patterns=[
+        r".*(?:继续音乐|继续播放|恢复播放|音乐继续).*"
+    ],
+    handler=robot_action("resume_music"),
+)
+register_command(
+    "换一首",
+    synonyms=["更换歌曲", "换首歌", "下一首", "换一首音乐", "播放下一首", "换首歌"],
+    patterns=[
+        r".*(?:换一首|更换歌曲|换首歌|下一首|换一首音乐|播放下一首).*"
+    ],
+    handler=robot_action("change_song"),
+)
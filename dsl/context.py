@@ -0,0 +1,53 @@
+# dsl/context.py
+
+from typing import List
+
+
+class ParseContext:
+    """
+    一条用户输入的解析上下文，各字段在第一次访问时才计算并缓存。
+
+    分词（cleaned_text）代价最高，只有语法解析需要它；同义词与正则匹配
+    只读取 normalized_text 和 lexicon_hits，因此不尝试语法的消息不会调用 jieba。
+    computed 按计算顺序记录本条消息实际计算过的字段。
+    """
+    __slots__ = ('parser', 'original_text', 'computed',
+                 'cleaned_text', 'normalized_text', 'lexicon_hits',
+                 'intensity', 'is_urgent', 'is_polite')
+
+    # 惰性字段 -> (解析器方法名, 输入字段)
+    LAZY_FIELDS = {
+        'cleaned_text': ('clean_text', 'original_text'),
+        'normalized_text': ('normalize_text', 'original_text'),
+        'lexicon_hits': ('scan_lexicons', 'normalized_text'),
+        'intensity': ('extract_intensity', 'original_text'),
+        'is_urgent': ('extract_urgency', 'original_text'),
+        'is_polite': ('detect_politeness', 'original_text'),
+    }
+
+    def __init__(self, parser, text: str):
+        """
+        :param parser: 提供各字段计算方法的 DSLParser
+        :param text: 用户输入
+        """
+        self.parser = parser
+        self.original_text = text
+        self.computed: List[str] = []
+
+    def __getattr__(self, name: str):
+        # 只有尚未赋值的槽位才会进入这里：计算一次后写回槽位
+        spec = ParseContext.LAZY_FIELDS.get(name)
+        if spec is None:
+            raise AttributeError(name)
+        method, source = spec
+        value = getattr(self.parser, method)(getattr(self, source))
+        setattr(self, name, value)
+        self.computed.append(name)
+        return value
+
+    def __getitem__(self, name: str):
+        """兼容原先 extract_context 返回字典时的 context['字段'] 写法"""
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
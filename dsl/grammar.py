@@ -2,85 +2,70 @@
 
 from pyparsing import (
     Word, Literal, Keyword, OneOrMore, Optional, Combine, Group,
-    alphas, alphanums, nums, Suppress, CaselessKeyword, Forward, ZeroOrMore, Or
+    alphas, alphanums, nums, Suppress, CaselessKeyword, Forward, ZeroOrMore, Or,
+    And, MatchFirst, ParserElement
 )
+from typing import List, Tuple
 
-# 定义命令关键词
-打招呼 = Keyword("打招呼")
-推荐食堂 = Keyword("推荐食堂")
-推荐美食 = Keyword("推荐美食")
-设置口味 = Keyword("设置口味")
-设置种类 = Keyword("设置种类")
-查询时间 = Keyword("查询时间")
-查询天气 = Keyword("查询天气")
-调整语速 = Keyword("调整语速")
-退出 = Keyword("退出")
-进入美食推荐 = Keyword("进入美食推荐")
-进入食堂推荐 = Keyword("进入食堂推荐")
-换一个 = Keyword("换一个")
-帮助 = Keyword("帮助")
-播放音乐 = Keyword("播放音乐")
-停止音乐 = Keyword("停止音乐")
-暂停音乐 = Keyword("暂停音乐")
-继续音乐 = Keyword("继续音乐")
-换一首 = Keyword("换一首")
+from dsl.commands import COMMANDS, Argument, CommandSpec
 
-# 定义参数关键词
-喜欢 = Keyword("喜欢")
-不喜欢 = Keyword("不喜欢")
-随便 = Keyword("随便")
-快 = Keyword("快")
-中 = Keyword("中")
-慢 = Keyword("慢")
-酸 = Keyword("酸")
-甜 = Keyword("甜")
-辣 = Keyword("辣")
-咸 = Keyword("咸")
-米 = Keyword("米")
-面 = Keyword("面")
-其他 = Keyword("其他")
-歌曲名称 = Word(alphas + "中文字符")  # 假设歌曲名称由字母和中文字符组成
+# 开启 packrat 缓存，语法解析作为慢路径时避免对同一位置重复尝试各分支
+ParserElement.enable_packrat()
 
-# 定义语法结构
-command = Forward()
+歌曲名称 = Word(alphas + "中文字符")  # 假设歌曲名称由字母和中文字符组成
 
-# 设置口味偏好语法
-设置口味 = 设置口味 + (喜欢 | 不喜欢 | 随便) + Optional((酸 | 甜 | 辣 | 咸))
 
-# 设置种类偏好语法
-设置种类 = 设置种类 + (喜欢 | 不喜欢 | 随便) + Optional((米 | 面 | 其他))
+def argument_expr(argument: Argument) -> ParserElement:
+    """参数声明对应的语法元素：可选值之一，未限定可选值时为任意文本"""
+    if argument.choices is None:
+        expr = 歌曲名称
+    else:
+        expr = MatchFirst([Keyword(choice) for choice in argument.choices])
+    return Optional(expr) if argument.optional else expr
 
-# 调整语速语法
-设置速度 = 调整语速 + Optional((快 | 中 | 慢))
 
-# 播放音乐语法
-播放音乐 = 播放音乐 + Optional(歌曲名称)
+def command_expr(spec: CommandSpec) -> ParserElement:
+    """命令声明对应的语法：命令关键词后依次跟各参数"""
+    expr = Keyword(spec.name)
+    for argument in spec.arguments:
+        expr = expr + argument_expr(argument)
+    return expr
 
-# 暂停音乐语法
-暂停音乐 = 暂停音乐
 
-# 继续音乐语法
-恢复播放 = 继续音乐
+def build_command_grammar() -> ParserElement:
+    """由命令注册表生成完整的命令语法，分支顺序即命令的注册顺序"""
+    grammar = Forward()
+    grammar <<= MatchFirst([command_expr(spec) for spec in COMMANDS.values()])
+    return grammar
 
-# 更换歌曲语法
-切换音乐 = 换一首
 
 # 定义完整的命令语法
-command <<= (
-    打招呼 |
-    推荐食堂 |
-    推荐美食 |
-    设置口味 |
-    设置种类 |
-    查询时间 |
-    查询天气 |
-    设置速度 |
-    退出 |
-    换一个 |
-    帮助 |
-    播放音乐 |
-    停止音乐 |
-    暂停音乐 |
-    恢复播放 |
-    切换音乐
-)
+command = build_command_grammar()
+
+
+def canonical_forms(expr: ParserElement = command) -> List[Tuple[str, ...]]:
+    """
+    枚举语法能接受的全部规范形式（记号序列），用于构建精确匹配表。
+    无法穷举的元素（如歌曲名称 Word）只取其缺省的形式。
+
+    :param expr: 语法元素，默认为完整的命令语法
+    :return: 记号序列列表，顺序与语法中分支的顺序一致
+    """
+    if isinstance(expr, Keyword):
+        return [(expr.match,)]
+    if isinstance(expr, Forward):
+        return canonical_forms(expr.expr)
+    if isinstance(expr, Optional):
+        return [()] + canonical_forms(expr.expr)
+    if isinstance(expr, (MatchFirst, Or)):
+        forms = []
+        for alternative in expr.exprs:
+            forms.extend(form for form in canonical_forms(alternative) if form not in forms)
+        return forms
+    if isinstance(expr, And):
+        forms = [()]
+        for part in expr.exprs:
+            forms = [prefix + suffix for prefix in forms for suffix in canonical_forms(part)]
+        return forms
+    # 其余元素（Word 等）可匹配无穷多种文本，不参与枚举
+    return []
@@ -0,0 +1,106 @@
+# dsl/ngram.py
+
+import math
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# 首尾边界标记，使单字短语（如“嗨”）也有特征，并突出开头和结尾的字
+_BEGIN = '\x02'
+_END = '\x03'
+
+
+def char_bigrams(text: str) -> List[str]:
+    """
+    返回文本（去掉空白、加上首尾边界标记）的全部字符二元组。
+
+    :param text: 标准化后的文本
+    """
+    text = ''.join(text.split())
+    if not text:
+        return []
+    padded = _BEGIN + text + _END
+    return [padded[index:index + 2] for index in range(len(padded) - 1)]
+
+
+class BigramScorer:
+    """
+    字符二元组意图打分器：把所有命令的同义词预先编译为一个行归一化的
+    “短语 × 二元组”矩阵，打分时只做一次矩阵-向量乘法得到输入与每个短语的
+    余弦相似度，再取每个命令下各短语的最大值作为该命令的置信度。
+
+    同义词和意图模式都没有命中（如错别字、语序不同）时作为兜底。
+    """
+
+    def __init__(self, phrases: Dict[str, Sequence[str]]):
+        """
+        :param phrases: 命令 -> 短语列表（命令名与同义词），命令顺序即同分时的优先顺序
+        """
+        self.commands: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        starts = []
+        rows = []
+        for cmd, texts in phrases.items():
+            bigram_rows = []
+            for text in dict.fromkeys(texts):
+                bigrams = char_bigrams(text)
+                if bigrams:
+                    bigram_rows.append([self.vocabulary.setdefault(bigram, len(self.vocabulary))
+                                        for bigram in bigrams])
+            if not bigram_rows:
+                continue
+            self.commands.append(cmd)
+            starts.append(len(rows))
+            rows.extend(bigram_rows)
+
+        matrix = np.zeros((len(rows), len(self.vocabulary)), dtype=np.float32)
+        for row, columns in enumerate(rows):
+            np.add.at(matrix[row], columns, 1.0)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.maximum(norms, 1e-12)
+        self.row_starts = np.array(starts, dtype=np.intp)
+
+    @property
+    def phrases(self) -> int:
+        """矩阵中的短语数"""
+        return self.matrix.shape[0]
+
+    def score(self, text: str) -> np.ndarray:
+        """
+        计算输入对每个命令的置信度（0~1 的余弦相似度），顺序与 commands 一致。
+
+        :param text: 标准化后的文本
+        """
+        scores = np.zeros(len(self.commands), dtype=np.float32)
+        bigrams = char_bigrams(text)
+        if not bigrams or not self.commands:
+            return scores
+        counts = Counter(bigrams)
+        vocabulary = self.vocabulary
+        query = np.zeros(len(vocabulary), dtype=np.float32)
+        for bigram, count in counts.items():
+            column = vocabulary.get(bigram)
+            if column is not None:
+                query[column] = count
+        # 未登录的二元组不进入向量，但计入输入的模长，稀释相似度
+        query /= math.sqrt(sum(count * count for count in counts.values()))
+        return np.maximum.reduceat(self.matrix @ query, self.row_starts)
+
+    def top_k(self, text: str, k: int = 3, min_confidence: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        返回置信度最高的 k 个命令。
+
+        :param text: 标准化后的文本
+        :param k: 返回的命令数
+        :param min_confidence: 低于该置信度的命令不返回
+        :return: (命令, 置信度) 列表，按置信度从高到低排列，同分时按命令顺序
+        """
+        scores = self.score(text)
+        candidates = []
+        for index in np.argsort(-scores, kind='stable')[:k]:
+            # 按四位小数比较，避免 float32 的舍入误差（如 0.6 算成 0.59999996）
+            confidence = round(float(scores[index]), 4)
+            if confidence > 0 and confidence >= min_confidence:
+                candidates.append((self.commands[index], confidence))
+        return candidates
@@ -1,45 +1,109 @@
 # dsl/parser.py
 
 from pyparsing import ParseException
-from dsl.grammar import command, 播放音乐, 停止音乐, 暂停音乐, 继续音乐, 换一首
+from dsl.grammar import build_command_grammar, canonical_forms
+from dsl.commands import COMMANDS, ParsedCommand
+from dsl.automaton import AhoCorasick
+from dsl.context import ParseContext
+from dsl.segmenter import TrieSegmenter, load_dish_names, PRONOUNS
+from dsl.cache import IntentCache
+from dsl.ngram import BigramScorer
+from dsl.typo import TypoIndex
 from src.robot import Robot
-import jieba
-import jieba.posseg as pseg
+import os
 import re
-from typing import Dict, List, Tuple, Optional
-import random
+import copy
+import time
+import threading
+from typing import Callable, Dict, List, Tuple, Optional, Union
+
+# 意图：(command, preference, parameter, context features)
+Intent = Tuple[Optional[str], Optional[str], Optional[str], Dict]
+
+# jieba 的词典与词性标注器在进程内只需加载一次
+_warmup_lock = threading.Lock()
+_segmenter_ready = threading.Event()
+
+
+def load_posseg():
+    """按需导入 jieba 词性标注模块，使用字典树分词器时完全不加载 jieba"""
+    import jieba.posseg
+    return jieba.posseg
 
 
 class DSLParser:
-    def __init__(self, robot: Robot):
+    # 随意图一起返回、供 format_response 使用的上下文特征
+    CONTEXT_FEATURES = ('intensity', 'is_urgent', 'is_polite')
+
+    # 意图的解析路径：意图缓存、精确匹配表、pyparsing 语法、同义词与正则匹配、
+    # 错别字纠正、字符二元组打分
+    RESOLVE_PATHS = ('cache', 'exact', 'grammar', 'lexicon', 'typo', 'ngram')
+
+    # 错别字纠正：至少 TYPO_MIN_LENGTH 个字的输入与唯一一个命令的短语编辑距离为 1 时直接纠正；
+    # 建议允许的编辑距离为输入长度的三分之一，最多 TYPO_MAX_DISTANCE
+    TYPO_MIN_LENGTH = 4
+    TYPO_MAX_DISTANCE = 2
+
+    # get_suggestions 最多给出的建议数
+    SUGGESTION_LIMIT = 3
+
+    # 字符二元组打分：置信度达到 NGRAM_THRESHOLD 时直接执行得分最高的命令，
+    # 否则把置信度不低于 NGRAM_SUGGESTION_CONFIDENCE 的前 NGRAM_TOP_K 个命令作为建议
+    NGRAM_THRESHOLD = 0.6
+    NGRAM_SUGGESTION_CONFIDENCE = 0.3
+    NGRAM_TOP_K = 3
+
+    # 可选的分词器：jieba 词性标注，或基于领域词典的字典树正向最大匹配
+    SEGMENTERS = ('jieba', 'trie')
+
+    # 词典自动机中除命令外的槽位类别，scan_lexicons 对每类返回词典顺序中最靠前的命中
+    SLOT_CATEGORIES = ('preference', 'flavor', 'kind', 'speed')
+
+    # 可以修改、再由 rebuild_lexicons 生效的词典
+    LEXICONS = ('command_synonyms', 'preference_synonyms', 'flavor_synonyms', 'kind_synonyms',
+                'speed_phrases', 'modal_words', 'intention_patterns')
+
+    def __init__(self, robot: Robot, segmenter: str = 'jieba', intent_cache_size: int = 1024):
+        """
+        Args:
+            robot: 执行命令的机器人，只解析意图时可为 None
+            segmenter: clean_text 使用的分词器，SEGMENTERS 之一
+            intent_cache_size: 意图缓存的条目数，0 表示不缓存
+        """
+        if segmenter not in self.SEGMENTERS:
+            raise ValueError(f"未知的分词器: {segmenter}，可选值为 {self.SEGMENTERS}")
         self.robot = robot
+        self.segmenter = segmenter
         # 加载自定义词典（如果需要）
         # jieba.load_userdict("custom_dict.txt")
 
-        # 初始化各类词典
+        # 初始化各类词典，并编译为一个多模式匹配自动机
         self._init_dictionaries()
+        # 由命令注册表生成语法，注册表之后新增的命令在新建的解析器中同样生效
+        self.grammar = build_command_grammar()
+        self._build_lexicon()
+        self._compile_intention_patterns()
+        self._build_exact_commands()
+        self._build_typo_index()
+        self._build_ngram_scorer()
+        self.trie_segmenter = self._build_trie_segmenter() if segmenter == 'trie' else None
+
+        # 按标准化文本缓存意图，for_robot 得到的会话视图共享同一个缓存
+        self.intent_cache = IntentCache(intent_cache_size) if intent_cache_size > 0 else None
+
+    def for_robot(self, robot: Robot) -> "DSLParser":
+        """
+        返回作用于另一个机器人（通常是会话视图）的解析器，
+        词典等只读数据与原解析器共享，不会重新构建。
+        """
+        view = copy.copy(self)
+        view.robot = robot
+        return view
 
     def _init_dictionaries(self):
         """初始化所有词典和映射关系"""
-        # 命令同义词映射
-        self.command_synonyms = {
-            "打招呼": ["你好", "您好", "哈喽", "安安", "嗨", "hello", "hi", "见到你很高兴", "早上好", "下午好", "晚上好", "在"],
-            "推荐食堂": ["食堂推荐", "进入食堂推荐", "推荐食堂", "推荐餐厅", "哪里吃", "哪个食堂好", "食堂怎么走", "去哪吃", "食堂建议"],
-            "推荐美食": ["美食推荐", "进入美食推荐", "推荐菜品", "有什么好吃的", "吃什么", "推荐好吃的", "吃啥", "吃点什么", "什么好吃"],
-            "设置口味": ["我喜欢吃", "喜欢吃", "不喜欢吃", "随便", "喜欢", "口味设置", "调整口味"],
-            "设置种类": ["我想吃", "类型设置", "调整种类", "改变种类", "种类偏好"],
-            "查询时间": ["现在几点", "什么时间", "几点了", "报时", "时间", "现在几点了"],
-            "查询天气": ["今天天气", "天气怎么样", "会下雨吗", "温度多少", "天气预报", "天气"],
-            "调整语速": ["说话速度", "语速调整", "说快点", "说慢点", "改变语速", "调快语速", "调慢语速", "语速", "说话"],
-            "退出": ["再见", "结束", "拜拜", "goodbye", "bye", "关闭", "退出程序", "退出系统"],
-            "换一个": ["换个推荐", "换一家", "下一个", "其他选择", "还有吗", "换一换", "再推荐一个"],
-            "帮助": ["帮助", "怎么用", "使用说明", "功能介绍", "命令列表"],
-            "播放音乐": ["听音乐", "我想听音乐", "播放一首歌", "来点音乐", "开始播放音乐"],
-            "停止音乐": ["停止播放音乐", "停音乐", "音乐停止", "停止歌声", "停止播放", "别放了", "安静", "停下来"],
-            "暂停音乐": ["暂停", "暂停播放", "暂停音乐", "停一下音乐", "音乐暂停", "停一会儿"],
-            "继续音乐": ["继续播放", "继续音乐", "恢复播放", "音乐继续", "继续"],
-            "换一首": ["更换歌曲", "换首歌", "下一首", "换一首音乐", "播放下一首", "换首歌"]
-        }
+        # 命令同义词映射，由 dsl/commands.py 中的命令注册表生成
+        self.command_synonyms = {name: list(spec.synonyms) for name, spec in COMMANDS.items()}
 
         # 偏好词映射，包括“随便”
         self.preference_synonyms = {
@@ -63,6 +127,13 @@ class DSLParser:
             "其他": ["其他", "其他种类", "其他类型"]
         }
 
+        # 语速表述，按优先级排列
+        self.speed_phrases = [
+            "快一点", "快点", "快些", "快速", "加快", "快一些", "说快点",
+            "慢一点", "慢点", "慢些", "慢速", "放慢", "慢一些", "说慢点",
+            "正常", "普通", "标准", "一般", "默认", "正常速度", "标准速度", "恢复正常"
+        ]
+
         # 语气词和修饰词词典
         self.modal_words = {
             '语气词': [
@@ -83,73 +154,231 @@ class DSLParser:
             ]
         }
 
-        # 核心意图模式
-        self.intention_patterns = {
-            "打招呼": [
-                r".*(?:你好|hello|hi).*",
-                r"(?:早上|中午|下午|晚上)好"
-            ],
-            "推荐食堂": [
-                r".*哪个.*(?:食堂|餐厅).*",
-                r".*(?:食堂|餐厅).*推荐.*",
-                r".*去哪.*吃.*"
-            ],
-            "推荐美食": [
-                r".*(?:推荐|有什么).*(?:好吃的|美食).*",
-                r".*今天吃什么.*",
-                r".*吃.*推荐.*"
-            ],
-            "设置口味": [
-                r".*(?:喜欢吃|不喜欢吃|随便).*"
-            ],
-            "设置种类": [
-                r".*(?:我喜欢|不喜欢|随便).*"
-            ],
-            "查询时间": [
-                r".*(?:现在几点|几点了|什么时间).*",
-                r".*报时.*"
-            ],
-            "查询天气": [
-                r".*(?:今天天气|天气怎么样|会下雨吗|温度多少|天气预报).*",
-                r".*天气.*"
-            ],
-            "调整语速": [
-                r".*(?:说话速度|语速调整|说快点|说慢点|改变语速|调快语速|调慢语速|语速|说话).*",
-                r".*语速快一点.*",
-                r".*语速慢一点.*",
-                r".*调整语速.*",
-                r".*改变语速.*"
-            ],
-            "退出": [
-                r".*(?:再见|结束|拜拜|goodbye|bye|关闭|退出程序|退出系统).*"
-            ],
-            "换一个": [
-                r".*(?:换个推荐|换一家|下一个|其他选择|还有吗|换一换|再推荐一个).*"
-            ],
-            "帮助": [
-                r".*(?:帮助|怎么用|使用说明|功能介绍|命令列表).*"
-            ],
-            "播放音乐": [
-                r".*(?:播放音乐|听音乐|我想听音乐|播放一首歌|来点音乐|开始播放音乐).*"
-            ],
-            "停止音乐": [
-                r".*(?:停止音乐|停止播放音乐|停音乐|音乐停止|停止歌声).*"
-            ],
-            "暂停音乐": [
-                r".*(?:暂停音乐|暂停播放|停一下音乐|音乐暂停).*"
-            ],
-            "继续音乐": [
-                r".*(?:继续音乐|继续播放|恢复播放|音乐继续).*"
-            ],
-            "换一首": [
-                r".*(?:换一首|更换歌曲|换首歌|下一首|换一首音乐|播放下一首).*"
-            ]
-            # 可以根据需要添加更多模式
+        # 核心意图模式，同样来自命令注册表
+        self.intention_patterns = {name: list(spec.patterns) for name, spec in COMMANDS.items()}
+
+    def _build_lexicon(self):
+        """
+        把命令、偏好、口味、种类和语速词典以及语法命令关键词编译为一个
+        Aho-Corasick 自动机。每个命中的负载为 (类别, 规范词, 词典中的顺序)，
+        匹配耗时与词典大小无关。
+        """
+        lexicon = AhoCorasick()
+        for keyword in COMMANDS:
+            lexicon.add(keyword, ('grammar', keyword, 0))
+        for order, (cmd, synonyms) in enumerate(self.command_synonyms.items()):
+            lexicon.add(cmd, ('command', cmd, order))
+            for syn in synonyms:
+                # 只有同义词参与 get_suggestions，命令名本身不参与
+                lexicon.add(syn, ('command_synonym', cmd, order))
+        slot_dictionaries = (
+            ('preference', self.preference_synonyms),
+            ('flavor', self.flavor_synonyms),
+            ('kind', self.kind_synonyms),
+        )
+        for category, dictionary in slot_dictionaries:
+            for order, (canonical, synonyms) in enumerate(dictionary.items()):
+                for word in [canonical] + synonyms:
+                    lexicon.add(word, (category, canonical, order))
+        for order, phrase in enumerate(self.speed_phrases):
+            lexicon.add(phrase, ('speed', phrase, order))
+        self.lexicon = lexicon.build()
+
+    def _build_exact_commands(self):
+        """
+        由语法定义生成全部规范形式（如“设置口味 喜欢 辣”）到意图的映射，
+        分词结果恰好是规范形式时直接查表，不必进入 pyparsing。
+        """
+        self.exact_commands = {
+            ' '.join(tokens): self.tokens_to_command(list(tokens))
+            for tokens in canonical_forms(self.grammar)
         }
 
+    def _build_typo_index(self):
+        """把命令名及其同义词登记到编辑距离索引中，负载为所属命令；同一短语属于多个命令时保留靠前的命令"""
+        self.typo_index = TypoIndex(self.TYPO_MAX_DISTANCE)
+        for cmd, synonyms in self.command_synonyms.items():
+            for phrase in [cmd] + synonyms:
+                self.typo_index.add(''.join(phrase.lower().split()), cmd)
+
+    def _build_ngram_scorer(self):
+        """用命令名及其同义词构建字符二元组打分矩阵，每套词典只构建一次"""
+        self.ngram_scorer = BigramScorer({
+            cmd: [cmd] + synonyms for cmd, synonyms in self.command_synonyms.items()
+        })
+
+    def export_lexicons(self) -> Dict:
+        """返回 LEXICONS 中各词典的副本，可交给另一个进程中的解析器的 load_lexicons"""
+        return {name: copy.deepcopy(getattr(self, name)) for name in self.LEXICONS}
+
+    def load_lexicons(self, lexicons: Dict):
+        """
+        替换词典并重建
+
+        Args:
+            lexicons: export_lexicons 的返回值
+        """
+        for name, value in lexicons.items():
+            setattr(self, name, copy.deepcopy(value))
+        self.rebuild_lexicons()
+
+    def rebuild_lexicons(self):
+        """
+        修改同义词、意图模式等词典后调用：重新生成语法，编译自动机、组合正则、
+        精确匹配表、错别字索引、二元组打分矩阵和字典树分词器，并清空意图缓存。之后通过 for_robot 创建的视图使用新词典。
+        只作用于本进程；服务器应调用 Server.rebuild_lexicons，进程池后端的工作进程随之使用新词典。
+        """
+        self.grammar = build_command_grammar()
+        self._build_lexicon()
+        self._compile_intention_patterns()
+        self._build_exact_commands()
+        self._build_typo_index()
+        self._build_ngram_scorer()
+        if self.trie_segmenter is not None:
+            self.trie_segmenter = self._build_trie_segmenter()
+        if self.intent_cache is not None:
+            self.intent_cache.invalidate()
+
+    def _build_trie_segmenter(self) -> TrieSegmenter:
+        """
+        用解析器自身的词典和 food_list.csv 中的菜品名构建字典树分词器。
+        词性表只区分 clean_text 关心的几类：保留 n/v/a/r，丢弃语气词（y）、
+        程度与礼貌用语（d）、时间词（t）和未登录字符（x）。
+        """
+        segmenter = TrieSegmenter()
+        segmenter.add_all(COMMANDS, 'v')
+        for cmd, synonyms in self.command_synonyms.items():
+            segmenter.add_all([cmd] + synonyms, 'v')
+        for pref, synonyms in self.preference_synonyms.items():
+            segmenter.add_all([pref] + synonyms, 'v')
+        for flavor, synonyms in self.flavor_synonyms.items():
+            segmenter.add_all([flavor] + synonyms, 'a')
+        for kind, synonyms in self.kind_synonyms.items():
+            segmenter.add_all([kind] + synonyms, 'n')
+        # 语法中的语速参数与自然语言中的语速表述
+        segmenter.add_all(('快', '中', '慢'), 'a')
+        segmenter.add_all(self.speed_phrases, 'a')
+        segmenter.add_all(load_dish_names(), 'n')
+        segmenter.add_all(PRONOUNS, 'r')
+        segmenter.add_all(self.modal_words['语气词'], 'y')
+        segmenter.add_all(self.modal_words['程度词'], 'd')
+        segmenter.add_all(self.modal_words['礼貌用语'], 'd')
+        segmenter.add_all(self.modal_words['时间词'], 't')
+        return segmenter
+
+    def _compile_intention_patterns(self):
+        """
+        把 intention_patterns 编译为组合正则，每个命令对应一个命名分组，由 search 而不是 match 查找：
+        模式开头的 .* 只是为了让 re.match 能在任意位置命中，这里去掉它，避免每个分支都扫描到结尾再回溯；
+        没有以 .* 开头的模式加上 \\A，仍然只在开头命中；结尾的 .* 总能匹配，同样去掉。
+
+        search 返回最早的命中位置，而意图按词典顺序取最靠前的命令，因此为命令列表的每个前缀各编译一个正则：
+        intention_regexes[k] 只含前 k 个命令，见 match_intention。
+        """
+        self.intention_commands = list(self.intention_patterns)
+        branches = []
+        for index, patterns in enumerate(self.intention_patterns.values()):
+            alternatives = []
+            for pattern in patterns:
+                pattern = pattern[2:] if pattern.startswith('.*') else r'\A' + pattern
+                if pattern.endswith('.*'):
+                    pattern = pattern[:-2]
+                alternatives.append(f'(?:{pattern})')
+            branches.append(f"(?P<intent{index}>{'|'.join(alternatives)})")
+        self.intention_regexes = [None] + [re.compile('|'.join(branches[:count]))
+                                           for count in range(1, len(branches) + 1)]
+
+    def match_intention(self, text: str) -> Optional[str]:
+        """
+        用组合正则匹配意图模式，返回命中的命令中词典顺序最靠前的一个，
+        与逐个命令、逐个模式调用 re.match 的结果相同。
+
+        search 命中第 k 个命令时，同一位置上更靠前的命令都不能命中，
+        之后只需用前 k 个命令的正则从下一个位置继续查找，通常一两次 search 即可确定结果。
+        """
+        best = None
+        count, pos = len(self.intention_commands), 0
+        while count:
+            match = self.intention_regexes[count].search(text, pos)
+            if match is None:
+                break
+            # 命名分组是正则中仅有的捕获分组，lastindex 即命令的顺序加一
+            best = count = match.lastindex - 1
+            pos = match.start() + 1
+        return None if best is None else self.intention_commands[best]
+
+    def scan_lexicons(self, text: str) -> Dict:
+        """
+        对文本扫描一遍，得到全部词典命中
+
+        Returns:
+            'command': 命中最长的命令（等长时取词典中靠前者），
+            SLOT_CATEGORIES 中每类: 词典中最靠前的命中，
+            'suggestions': 同义词出现在文本中的命令（按词典顺序），
+            'grammar': 是否含有语法命令关键词，为 False 时无需尝试语法解析
+        """
+        best_command = None
+        best_key = None
+        first = {}
+        suggestions = {}
+        for start, end, (category, canonical, order) in self.lexicon.iter_matches(text):
+            if category == 'command' or category == 'command_synonym':
+                key = (end - start, -order)
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best_command = canonical
+                if category == 'command_synonym':
+                    suggestions[order] = canonical
+            else:
+                current = first.get(category)
+                if current is None or order < current[0]:
+                    first[category] = (order, canonical)
+
+        hits = {'command': best_command}
+        for category in self.SLOT_CATEGORIES:
+            hits[category] = first[category][1] if category in first else None
+        hits['suggestions'] = [suggestions[order] for order in sorted(suggestions)]
+        hits['grammar'] = 'grammar' in first
+        return hits
+
+    def warmup(self, cache_dir: Optional[str] = None) -> float:
+        """
+        预先加载 jieba 词典和词性标注器，避免第一条需要分词的消息承担约一秒的加载开销。
+        进程内只加载一次，重复调用立即返回；字典树分词器在构造时已就绪，无需预热。
+
+        Args:
+            cache_dir: jieba 词典缓存文件所在目录，之后启动的进程可直接读取缓存；
+                       默认使用系统临时目录
+
+        Returns:
+            本次调用耗时（秒）
+        """
+        started = time.perf_counter()
+        if self.segmenter != 'jieba':
+            return time.perf_counter() - started
+        with _warmup_lock:
+            if not _segmenter_ready.is_set():
+                pseg = load_posseg()
+                import jieba
+                if cache_dir and not jieba.dt.initialized:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    jieba.dt.tmp_dir = cache_dir
+                jieba.initialize()
+                # 词性标注器首次切分时还会加载 HMM 模型
+                list(pseg.cut("预热"))
+                _segmenter_ready.set()
+        return time.perf_counter() - started
+
+    def is_warm(self) -> bool:
+        """分词器是否已完成预热"""
+        return self.segmenter != 'jieba' or _segmenter_ready.is_set()
+
     def clean_text(self, text: str) -> str:
         """清理文本，去除语气词等干扰因素"""
-        words_with_pos = pseg.cut(text)
+        if self.trie_segmenter is not None:
+            words_with_pos = self.trie_segmenter.cut(text)
+        else:
+            words_with_pos = load_posseg().cut(text)
         cleaned_words = []
 
         for word, pos in words_with_pos:
@@ -168,16 +397,9 @@ class DSLParser:
         text = ' '.join(text.split())
         return text.lower()
 
-    def extract_context(self, text: str) -> Dict:
-        """提取上下文信息"""
-        return {
-            'original_text': text,
-            'cleaned_text': self.clean_text(text),
-            'normalized_text': self.normalize_text(text),
-            'intensity': self.extract_intensity(text),
-            'is_urgent': self.extract_urgency(text),
-            'is_polite': self.detect_politeness(text)
-        }
+    def extract_context(self, text: str) -> ParseContext:
+        """提取上下文信息，各字段在第一次访问时才计算"""
+        return ParseContext(self, text)
 
     def extract_intensity(self, text: str) -> float:
         """提取语气强度"""
@@ -207,92 +429,85 @@ class DSLParser:
         """
         text = context['normalized_text']
 
-        # 通过同义词匹配找到命令
-        best_command = None
-        best_score = 0
-
-        for cmd, synonyms in self.command_synonyms.items():
-            for syn in [cmd] + synonyms:
-                if syn in text:
-                    score = len(syn)
-                    if score > best_score:
-                        best_score = score
-                        best_command = cmd
+        # 一次扫描得到命令、偏好、口味、种类和语速词的全部命中（上下文中已缓存）
+        hits = context['lexicon_hits']
+        best_command = hits['command']
 
         if not best_command:
             # 通过模式匹配找到命令
-            for cmd, patterns in self.intention_patterns.items():
-                if any(re.match(pattern, text) for pattern in patterns):
-                    best_command = cmd
-                    break
+            best_command = self.match_intention(text)
 
-        # 初始化返回值
-        preference = None
-        param = None
-
-        # 检查是否为偏好设置
-        if not best_command:
-            for pref, synonyms in self.preference_synonyms.items():
-                for syn in [pref] + synonyms:
-                    if syn in text:
-                        # 检查是否包含口味或种类词
-                        flavor_found = None
-                        for flavor, flavor_syns in self.flavor_synonyms.items():
-                            if any(f in text for f in [flavor] + flavor_syns):
-                                flavor_found = flavor
-                                break
-                        if flavor_found:
-                            return "设置口味", pref, flavor_found
-                        kind_found = None
-                        for kind, kind_syns in self.kind_synonyms.items():
-                            if any(k in text for k in [kind] + kind_syns):
-                                kind_found = kind
-                                break
-                        if kind_found:
-                            return "设置种类", pref, kind_found
+        # 检查是否为偏好设置：按注册顺序找出带偏好参数、且全部参数都能由词典命中填充的命令
+        if not best_command and hits['preference']:
+            for name, spec in COMMANDS.items():
+                categories = [argument.lexicon for argument in spec.arguments]
+                if 'preference' in categories and all(category and hits[category] for category in categories):
+                    return self.command_arguments(name, hits)
 
         # 如果找到命令，进一步提取参数
         if best_command:
-            if best_command == "调整语速":
-                # 定义可能的语速表述
-                speed_phrases = [
-                    "快一点", "快点", "快些", "快速", "加快", "快一些", "说快点",
-                    "慢一点", "慢点", "慢些", "慢速", "放慢", "慢一些", "说慢点",
-                    "正常", "普通", "标准", "一般", "默认", "正常速度", "标准速度", "恢复正常"
-                ]
-                # 查找文本中是否包含语速表述
-                for phrase in speed_phrases:
-                    if phrase in text:
-                        param = phrase
-                        break
-                return best_command, None, param
-            elif best_command in ["设置口味", "设置种类"]:
-                # 提取偏好和参数
-                for pref, synonyms in self.preference_synonyms.items():
-                    if any(syn in text for syn in [pref] + synonyms):
-                        preference = pref
-                        break
-
-                if best_command == "设置口味":
-                    for flavor, flavor_syns in self.flavor_synonyms.items():
-                        if any(f in text for f in [flavor] + flavor_syns):
-                            param = flavor
-                            break
-                elif best_command == "设置种类":
-                    for kind, kind_syns in self.kind_synonyms.items():
-                        if any(k in text for k in [kind] + kind_syns):
-                            param = kind
-                            break
-
-                return best_command, preference, param
-
-            else:
-                # 对于其他命令，没有额外参数
-                return best_command, None, None
+            return self.command_arguments(best_command, hits)
 
         # 如果仍然没找到命令，返回None
         return None, None, None
 
+    def command_arguments(self, cmd: str, hits: Dict) -> Tuple[str, Optional[str], Optional[str]]:
+        """根据命令参数声明的词典类别，用词典命中为命令补全偏好与参数；未声明词典类别的参数留空"""
+        spec = COMMANDS.get(cmd)
+        values = {argument.slot: hits[argument.lexicon]
+                  for argument in (spec.arguments if spec else ()) if argument.lexicon}
+        return cmd, values.get('preference'), values.get('param')
+
+    def typo_candidates(self, text: str, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        在编辑距离索引中查找与输入相近的命令短语
+
+        Args:
+            text: 标准化后的文本
+            max_distance: 最大编辑距离，默认为输入长度的三分之一（最多 TYPO_MAX_DISTANCE）
+
+        Returns:
+            (命令, 编辑距离) 列表，按距离、词典顺序排列，每个命令只出现一次
+        """
+        text = ''.join(text.split())
+        if max_distance is None:
+            max_distance = min(self.TYPO_MAX_DISTANCE, len(text) // 3)
+        if not text or max_distance <= 0:
+            return []
+        candidates = {}
+        for dist, _, cmd in self.typo_index.search(text, max_distance):
+            candidates.setdefault(cmd, dist)
+        return list(candidates.items())
+
+    def correct_typo(self, text: str) -> Optional[str]:
+        """
+        编辑距离为 1 的短语只属于一个命令时返回该命令，有歧义或输入过短时返回 None
+
+        Args:
+            text: 标准化后的文本
+        """
+        if len(''.join(text.split())) < self.TYPO_MIN_LENGTH:
+            return None
+        candidates = self.typo_candidates(text, max_distance=1)
+        if len(candidates) == 1:
+            return candidates[0][0]
+        return None
+
+    def score_intents(self, text: str, k: Optional[int] = None,
+                      min_confidence: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        用字符二元组矩阵对每个命令打分（一次矩阵-向量乘法）
+
+        Args:
+            text: 标准化后的文本
+            k: 返回的命令数，默认为 NGRAM_TOP_K
+            min_confidence: 低于该置信度的命令不返回
+
+        Returns:
+            (命令, 置信度) 列表，按置信度从高到低排列
+        """
+        return self.ngram_scorer.top_k(text, k or self.NGRAM_TOP_K, min_confidence)
+
     def format_response(self, response: str, context: Dict) -> str:
         """根据上下文格式化响应"""
         if context['is_polite']:
@@ -306,185 +521,170 @@ class DSLParser:
 
         return response
 
-    def parse_command(self, text: str) -> str:
-        """解析命令入口"""
+    def parse_command(self, text: str, resolver: Optional[Callable[[str], Intent]] = None,
+                      trace: Optional[Dict] = None) -> str:
+        """
+        解析命令入口
+
+        Args:
+            text: 用户输入
+            resolver: 意图解析函数，默认为 self.resolve_intent；
+                      服务器可传入进程池后端的解析函数
+            trace: 若提供，写入识别出的命令（'command'）、各阶段耗时（'stages'，秒）
+                   、实际计算过的上下文字段（'computed'）和解析路径（'path'）
+        """
         try:
-            # 提取上下文
-            context = self.extract_context(text)
-
-            # 尝试使用现有的语法解析
-            try:
-                parsed = command.parseString(context['cleaned_text'], parseAll=True)
-                result = self.execute(parsed)
-                return self.format_response(result, context)
-            except ParseException:
-                # 如果语法解析失败，使用自然语言理解
-                cmd, preference, param = self.find_best_command(context)
-                if cmd:
-                    # 构建一个类似于解析后的列表
-                    parsed_command = [cmd]
-                    if preference:
-                        parsed_command.append(preference)
-                    if param:
-                        parsed_command.append(param)
-                    result = self.execute(parsed_command)
-                    return self.format_response(result, context)
-                else:
-                    suggestions = self.get_suggestions(text)
-                    return f"抱歉，我不太理解您的意思。您是想要{suggestions}吗？"
+            intent = (resolver or self.resolve_intent)(text)
+            if trace is None:
+                return self.respond(text, intent)
+
+            started = time.perf_counter()
+            reply = self.respond(text, intent)
+            stages = dict(intent[3].get('timings', {}))
+            stages['execute'] = time.perf_counter() - started
+            trace['command'] = intent[0]
+            trace['stages'] = stages
+            trace['computed'] = intent[3].get('computed', ())
+            trace['path'] = intent[3].get('path')
+            return reply
 
         except Exception as e:
             error_message = f"处理命令时出错: {text}\n错误: {str(e)}"
             print(error_message)
             return error_message
 
-    def execute(self, parsed: List[str]) -> str:
-        """执行解析后的命令"""
-        cmd = parsed[0] if len(parsed) > 0 else None
+    def resolve_intent(self, text: str) -> Intent:
+        """
+        从用户输入中提取意图，不访问机器人状态，可在其他进程中执行
+
+        Returns:
+            Tuple containing (command, preference, parameter, context features)；
+            context features 中的 'timings' 记录各阶段耗时（秒），
+            'computed' 记录实际计算过的上下文字段，'path' 为 RESOLVE_PATHS 之一
+        """
+        timings = {}
+        context = self.extract_context(text)
+
+        started = time.perf_counter()
+        if self.intent_cache is not None:
+            # 标准化文本相同的输入意图相同，命中时跳过分词与匹配；
+            # 语气特征依赖原文，开销很小，每次重新计算
+            cached = self.intent_cache.get(context.normalized_text)
+            looked_up = time.perf_counter()
+            timings['intent_cache'] = looked_up - started
+            if cached is not None:
+                cmd, preference, param, _ = cached
+                return cmd, preference, param, self._intent_features(context, timings, 'cache')
+            started = looked_up
+
+        # 扫描一遍标准化文本，既得到同义词命中，也得知是否值得尝试语法解析
+        hits = context.lexicon_hits
+        scanned = time.perf_counter()
+        timings['lexicon_scan'] = scanned - started
+
+        path = None
+        if hits['grammar']:
+            # 只有出现语法命令关键词时才分词（主要耗时）并尝试语法解析
+            cleaned_text = context.cleaned_text
+            segmented = time.perf_counter()
+            timings['clean_text'] = segmented - scanned
+            exact = self.exact_commands.get(cleaned_text)
+            if exact is not None:
+                # 快路径：规范形式直接查表
+                cmd, preference, param = exact
+                path = 'exact'
+            else:
+                # 慢路径：交给 pyparsing 处理非规范的写法（如带歌曲名称）
+                try:
+                    parsed = self.grammar.parseString(cleaned_text, parseAll=True)
+                    cmd, preference, param = self.tokens_to_command(parsed)
+                    path = 'grammar'
+                except ParseException:
+                    pass
+            timings['grammar'] = time.perf_counter() - segmented
+
+        if path is None:
+            # 语法解析失败或无需尝试，使用自然语言理解
+            fallback_started = time.perf_counter()
+            cmd, preference, param = self.find_best_command(context)
+            scored = time.perf_counter()
+            timings['find_best_command'] = scored - fallback_started
+            path = 'lexicon'
+            if cmd is None:
+                # 同义词和意图模式都未命中，先尝试纠正只错一个字的输入
+                corrected = self.correct_typo(context.normalized_text)
+                if corrected is not None:
+                    cmd, preference, param = self.command_arguments(corrected, hits)
+                    path = 'typo'
+                corrected_at = time.perf_counter()
+                timings['typo'] = corrected_at - scored
+            if cmd is None:
+                # 再按字符二元组相似度兜底
+                candidates = self.score_intents(context.normalized_text, k=1,
+                                                min_confidence=self.NGRAM_THRESHOLD)
+                if candidates:
+                    cmd, preference, param = self.command_arguments(candidates[0][0], hits)
+                    path = 'ngram'
+                timings['ngram'] = time.perf_counter() - corrected_at
+
+        if self.intent_cache is not None:
+            self.intent_cache.put(context.normalized_text, (cmd, preference, param, path))
+        return cmd, preference, param, self._intent_features(context, timings, path)
+
+    def _intent_features(self, context: ParseContext, timings: Dict, path: str) -> Dict:
+        """组装随意图返回的上下文特征、阶段耗时、已计算字段和解析路径"""
+        features = {key: context[key] for key in self.CONTEXT_FEATURES}
+        features['timings'] = timings
+        features['computed'] = tuple(context.computed)
+        features['path'] = path
+        return features
+
+    def tokens_to_command(self, tokens: List[str]) -> Tuple[str, Optional[str], Optional[str]]:
+        """把语法解析得到的记号列表按命令声明的参数转换为 (command, preference, parameter)"""
+        return ParsedCommand.from_tokens(tokens).as_tuple()
+
+    def respond(self, text: str, intent: Intent) -> str:
+        """根据意图执行命令并生成回复"""
+        cmd, preference, param, features = intent
         if not cmd:
+            suggestions = self.get_suggestions(text)
+            return f"抱歉，我不太理解您的意思。您是想要{suggestions}吗？"
+
+        result = self.execute(ParsedCommand(cmd, preference, param))
+        return self.format_response(result, features)
+
+    def execute(self, parsed: Union[ParsedCommand, List[str]]) -> str:
+        """
+        按命令注册表分派执行解析后的命令
+
+        Args:
+            parsed: 解析得到的命令；也接受以命令名开头的记号列表
+
+        Returns:
+            命令的回复
+        """
+        if not isinstance(parsed, ParsedCommand):
+            parsed = ParsedCommand.from_tokens(parsed)
+        if not parsed.name:
             return "抱歉，我没有理解您的指令"
 
-        if cmd == "打招呼":
-            return self.robot.greet()
-        elif cmd == "推荐食堂":
-            return self.robot.recommend_canteen()
-        elif cmd == "推荐美食":
-            return self.robot.recommend_food()
-        elif cmd == "设置口味":
-            if len(parsed) >= 3 and parsed[1]:
-                preference = parsed[1]
-                flavor = parsed[2]
-                setting_reply = self.robot.set_flavor_preference(preference, flavor)
-                # 检查当前状态，如果是美食推荐，则立即更新推荐
-                if self.robot.current_state == "美食推荐":
-                    recommendations = self.robot.recommend_food()
-                    return f"{setting_reply} {recommendations}"
-                return setting_reply
-            elif len(parsed) >= 2 and parsed[1] == "随便":
-                # 处理“口味随便”的情况
-                setting_reply = self.robot.set_flavor_preference("随便")
-                # 检查当前状态，如果是美食推荐，则立即更新推荐
-                if self.robot.current_state == "美食推荐":
-                    recommendations = self.robot.recommend_food()
-                    return f"{setting_reply} {recommendations}"
-                return setting_reply
-            return "请指定您的口味偏好，例如：'设置口味 喜欢酸'，或者说'设置口味 随便'"
-        elif cmd == "设置种类":
-            if len(parsed) >= 3 and parsed[1]:
-                preference = parsed[1]
-                kind = parsed[2]
-                setting_reply = self.robot.set_kind_preference(preference, kind)
-                # 检查当前状态，如果是美食推荐，则立即更新推荐
-                if self.robot.current_state == "美食推荐":
-                    recommendations = self.robot.recommend_food()
-                    return f"{setting_reply} {recommendations}"
-                return setting_reply
-            elif len(parsed) >= 2 and parsed[1] == "随便":
-                # 处理“种类随便”的情况
-                setting_reply = self.robot.set_kind_preference("随便")
-                # 检查当前状态，如果是美食推荐，则立即更新推荐
-                if self.robot.current_state == "美食推荐":
-                    recommendations = self.robot.recommend_food()
-                    return f"{setting_reply} {recommendations}"
-                return setting_reply
-            return "请指定您的种类偏好，例如：'设置种类 喜欢米'，或者说'设置种类 随便'"
-        elif cmd == "查询时间":
-            return self.robot.query_time()
-        elif cmd == "查询天气":
-            return self.robot.query_weather()
-        elif cmd == "调整语速":
-            if len(parsed) >= 2 and parsed[1]:
-                # 处理各种可能的语速表述
-                speed_mapping = {
-                    # 快速相关表述
-                    "快": "快",
-                    "快点": "快",
-                    "快一些": "快",
-                    "快一点": "快",
-                    "快些": "快",
-                    "快速": "快",
-                    "加快": "快",
-                    "说快点": "快",
-
-                    # 慢速相关表述
-                    "慢": "慢",
-                    "慢点": "慢",
-                    "慢一些": "慢",
-                    "慢一点": "慢",
-                    "慢些": "慢",
-                    "慢速": "慢",
-                    "放慢": "慢",
-                    "说慢点": "慢",
-
-                    # 正常速度相关表述
-                    "正常": "正常",
-                    "普通": "正常",
-                    "标准": "正常",
-                    "一般": "正常",
-                    "默认": "正常",
-                    "正常速度": "正常",
-                    "标准速度": "正常",
-                    "恢复正常": "正常"
-                }
-
-                # 获取用户输入的速度表述
-                user_speed = parsed[1].strip()
-                # 转换为标准速度参数
-                speed = speed_mapping.get(user_speed)
-
-                if speed:
-                    return self.robot.adjust_speed(speed)
-                else:
-                    # 如果输入不匹配任何预设，给出提示
-                    speed_tips = [
-                        "请说'快一点'、'正常'或'慢一点'来调整语速",
-                        "您可以说'快点'、'正常速度'或'慢点'来设置语速",
-                        "试试说'说快点'、'标准速度'或'说慢点'吧",
-                        "可以使用'快速'、'普通'或'慢速'来调整语速哦",
-                        "语速可以设置为'快'、'正常'或'慢'～"
-                    ]
-                    return random.choice(speed_tips)
-
-            # 未提供速度参数时的提示
-            help_messages = [
-                "请告诉我您想要的语速，比如'调整语速 快一点'",
-                "您想要调整到什么语速呢？可以说'调整语速 正常'",
-                "请指定想要的语速，例如：'调整语速 慢一点'",
-                "语速调整需要说明具体速度，比如'调整语速 标准'",
-                "您可以这样调整语速：'调整语速 快点'"
-            ]
-            return random.choice(help_messages)
-        elif cmd == "退出":
-            return self.robot.exit()
-        elif cmd == "换一个":
-            return self.robot.change_canteen()
-        elif cmd == "帮助":
-            return self.robot.help()
-        elif cmd == "播放音乐":
-            return self.robot.play_music()
-        elif cmd == "停止音乐":
-            return self.robot.stop_music()
-        elif cmd == "暂停音乐":
-            return self.robot.pause_music()
-        elif cmd == "继续音乐":
-            return self.robot.resume_music()
-        elif cmd == "换一首":
-            return self.robot.change_song()
-        else:
-            unknown_cmd = f"未知命令: {cmd}"
+        spec = COMMANDS.get(parsed.name)
+        if spec is None:
+            unknown_cmd = f"未知命令: {parsed.name}"
             print(unknown_cmd)
             return unknown_cmd
+        return spec.run(self, parsed)
 
     def get_suggestions(self, text: str) -> str:
         """获取可能的命令建议"""
-        suggestions = []
-        for cmd, synonyms in self.command_synonyms.items():
-            for syn in synonyms:
-                if syn in text:
-                    suggestions.append(cmd)
-                    break
-
+        suggestions = self.scan_lexicons(text)['suggestions']
+        if not suggestions:
+            # 没有字面出现的同义词时，先按编辑距离、再按字符二元组相似度给出最接近的命令
+            normalized_text = self.normalize_text(text)
+            ranked = [cmd for cmd, _ in self.typo_candidates(normalized_text)]
+            ranked += [cmd for cmd, _ in self.score_intents(
+                normalized_text, min_confidence=self.NGRAM_SUGGESTION_CONFIDENCE)]
+            suggestions = list(dict.fromkeys(ranked))[:self.SUGGESTION_LIMIT]
         if suggestions:
-            unique_suggestions = list(set(suggestions))  # 去重
-            return '、'.join(unique_suggestions)
-        return "打招呼、推荐食堂、推荐美食、设置口味、设置种类、查询时间、查询天气、调整语速、退出、播放音乐、暂停音乐、继续音乐、换一首等功能"
+            return '、'.join(suggestions)
+        return '、'.join(name for name, spec in COMMANDS.items() if spec.suggest) + "等功能"
@@ -0,0 +1,112 @@
+# dsl/segmenter.py
+
+import csv
+import os
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+# 字典树节点中保存词性的键；单个字符的键不可能为空串
+_POS = ''
+
+# 菜品名称所在的资源文件
+FOOD_LIST_PATH = os.path.join('resources', 'food_list.csv')
+
+# 小型词性表中的代词，clean_text 会保留代词（r）
+PRONOUNS = ('我', '你', '您', '他', '她', '它', '我们', '你们', '他们', '咱们',
+            '这', '那', '这个', '那个', '什么', '哪个', '哪里', '自己')
+
+
+class TrieSegmenter:
+    """
+    基于字典树的正向最大匹配分词器，只识别领域词典中的词。
+
+    与 jieba.posseg.cut 一样产出 (词, 词性) 对：词典中的词使用登记的词性，
+    连续的字母数字合并为一个词（eng/m），其余未登录字符逐字切出，词性为 x。
+    """
+
+    def __init__(self):
+        self.root: Dict = {}
+        self.words = 0
+
+    def add(self, word: str, pos: str):
+        """
+        登记一个词及其词性；同一个词重复登记时保留第一次的词性。
+
+        :param word: 词
+        :param pos: 词性，如 n、v、a
+        """
+        if not word:
+            return
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        if _POS not in node:
+            node[_POS] = pos
+            self.words += 1
+
+    def add_all(self, words: Iterable[str], pos: str):
+        """以同一词性登记多个词"""
+        for word in words:
+            self.add(word, pos)
+
+    def cut(self, text: str) -> List[Tuple[str, str]]:
+        """
+        正向最大匹配切分文本。
+
+        :param text: 待切分文本
+        :return: (词, 词性) 列表
+        """
+        root = self.root
+        result = []
+        index = 0
+        length = len(text)
+        while index < length:
+            # 沿字典树走到不能再走为止，记录最后一个完整词的位置
+            node = root
+            cursor = index
+            end = 0
+            pos = None
+            while cursor < length:
+                node = node.get(text[cursor])
+                if node is None:
+                    break
+                cursor += 1
+                if _POS in node:
+                    end = cursor
+                    pos = node[_POS]
+            if end:
+                result.append((text[index:end], pos))
+                index = end
+                continue
+
+            char = text[index]
+            if char.isascii() and char.isalnum():
+                # 未登录的字母数字串整体作为一个词
+                cursor = index + 1
+                while cursor < length and text[cursor].isascii() and text[cursor].isalnum():
+                    cursor += 1
+                word = text[index:cursor]
+                result.append((word, 'm' if word.isdigit() else 'eng'))
+                index = cursor
+            else:
+                result.append((char, 'x'))
+                index += 1
+        return result
+
+
+def load_dish_names(csv_path: str = None) -> List[str]:
+    """
+    读取 food_list.csv 中的菜品名称，文件不存在时返回空列表。
+
+    :param csv_path: CSV 路径，默认为项目（或打包后程序）resources 目录下的文件
+    """
+    if csv_path is None:
+        base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        csv_path = os.path.join(base_path, FOOD_LIST_PATH)
+    try:
+        with open(csv_path, encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)  # 跳过表头
+            return [row[0].strip() for row in reader if row and row[0].strip()]
+    except FileNotFoundError:
+        return []
@@ -0,0 +1,149 @@
+# dsl/typo.py
+
+from itertools import combinations
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+def distance_from(query: str) -> Callable[[str], int]:
+    """
+    返回计算 query 与任意字符串编辑距离（插入、删除、替换各计 1）的函数。
+
+    使用 Myers/Hyyrö 的位并行算法：query 中每个字符的出现位置预先编码为位掩码，
+    每比较一个字符只需常数次整数运算；同一查询与多个词比较时只需准备一次。
+
+    :param query: 查询串
+    """
+    peq: Dict[str, int] = {}
+    for index, char in enumerate(query):
+        peq[char] = peq.get(char, 0) | (1 << index)
+    length = len(query)
+    mask = (1 << length) - 1
+    high = 1 << (length - 1) if length else 0
+
+    def distance(word: str) -> int:
+        if not length:
+            return len(word)
+        # pv/mv：DP 当前列相邻两行之差为 +1/-1 的位置；score 为最后一行的值
+        pv, mv, score = mask, 0, length
+        for char in word:
+            eq = peq.get(char, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & mask)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            ph = ((ph << 1) | 1) & mask
+            mh = (mh << 1) & mask
+            pv = mh | (~(xv | ph) & mask)
+            mv = ph & xv
+        return score
+    return distance
+
+
+def levenshtein(a: str, b: str) -> int:
+    """
+    编辑距离（插入、删除、替换各计 1）。
+
+    :param a: 字符串
+    :param b: 字符串
+    """
+    if a == b:
+        return 0
+    return distance_from(a)(b)
+
+
+def deletions(word: str, depth: int) -> Set[str]:
+    """
+    删除 word 中至多 depth 个字符得到的全部字符串（包括 word 本身）。
+
+    :param word: 词
+    :param depth: 最多删除的字符数
+    """
+    variants = {word}
+    for count in range(1, min(depth, len(word)) + 1):
+        for removed in combinations(range(len(word)), count):
+            variants.add(''.join(char for index, char in enumerate(word) if index not in removed))
+    return variants
+
+
+class TypoIndex:
+    """
+    对称删除（symmetric deletion）编辑距离索引。
+
+    编辑距离不超过 d 的两个词，各自删除至多 d 个字符后必能得到同一个字符串，
+    因此登记时把每个词的删除变体映射回该词，查询时只需查找查询词自身的删除变体，
+    再用编辑距离核对候选。查询耗时只取决于查询词的长度和候选数，不随词典规模增长。
+
+    删除变体的数量随查询词长度按 d 次方增长，比最长的词长出 d 个字符以上的查询不可能命中，
+    因此不生成变体直接返回空结果，任意长的输入都不会拖慢查询。
+    """
+
+    def __init__(self, max_distance: int = 2):
+        """
+        :param max_distance: 支持查询的最大编辑距离，决定登记的删除深度
+        """
+        self.max_distance = max_distance
+        self.words: List[str] = []
+        self.payloads: List[Any] = []
+        self.ids: Dict[str, int] = {}
+        # 已登记的最长词的长度
+        self.longest = 0
+        # 删除变体 -> 产生该变体的词的编号
+        self.variants: Dict[str, List[int]] = {}
+
+    def add(self, word: str, payload: Any = None) -> bool:
+        """
+        登记一个词；重复登记时保留第一次的负载。
+
+        :param word: 词
+        :param payload: 随查询结果返回的负载
+        :return: 是否新增了词
+        """
+        if word in self.ids:
+            return False
+        word_id = self.ids[word] = len(self.words)
+        self.words.append(word)
+        self.payloads.append(payload)
+        self.longest = max(self.longest, len(word))
+        for variant in deletions(word, self.max_distance):
+            self.variants.setdefault(variant, []).append(word_id)
+        return True
+
+    def search(self, word: str, max_distance: int,
+               stats: Optional[Dict] = None) -> List[Tuple[int, str, Any]]:
+        """
+        查找与 word 的编辑距离不超过 max_distance 的全部词。
+
+        :param word: 查询词
+        :param max_distance: 最大编辑距离，不能超过登记时的 max_distance
+        :param stats: 若提供，写入查找的删除变体数（'probes'）和核对距离的候选数（'candidates'）
+        :return: (距离, 词, 负载) 列表，按距离、登记顺序排列
+        """
+        if max_distance > self.max_distance:
+            raise ValueError(f"最大编辑距离 {max_distance} 超过索引支持的 {self.max_distance}")
+        if len(word) > self.longest + max_distance:
+            # 长度之差已超过最大编辑距离
+            if stats is not None:
+                stats['probes'] = stats['candidates'] = 0
+            return []
+        probes = deletions(word, max_distance)
+        candidates = set()
+        for variant in probes:
+            candidates.update(self.variants.get(variant, ()))
+        distance = distance_from(word)
+        matches = []
+        for word_id in candidates:
+            dist = distance(self.words[word_id])
+            if dist <= max_distance:
+                matches.append((dist, word_id))
+        if stats is not None:
+            stats['probes'] = len(probes)
+            stats['candidates'] = len(candidates)
+        matches.sort()
+        return [(dist, self.words[word_id], self.payloads[word_id]) for dist, word_id in matches]
+
+    def __len__(self) -> int:
+        return len(self.words)
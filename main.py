@@ -28,12 +28,17 @@ def main():
     app_icon = QIcon(icon_path)
     app.setWindowIcon(app_icon)
 
+    # 客户端与服务器同机运行，设置 USHALLEAT_UNIX_SOCKET 后改用 Unix 套接字通信
+    # （如 /tmp/ushalleat.sock，或 Linux 上的抽象命名空间 @ushalleat），默认使用 TCP
+    unix_path = os.environ.get("USHALLEAT_UNIX_SOCKET") or None
+
     # 初始化服务器并启动
-    server = Server()
+    server = Server(unix_path=unix_path)
     server.start()
+    server.ready.wait(timeout=5)
 
     # 初始化客户端窗口并设置相关属性
-    client_window = Client(server_host='127.0.0.1', server_port=65432)
+    client_window = Client(server_host='127.0.0.1', server_port=65432, server_unix_path=unix_path)
     client_window.setWindowIcon(app_icon)  # 确保客户端窗口图标一致
     client_window.setWindowTitle("邮小食——U Small Eat")  # 设置客户端窗口标题
     client_window.show()
@@ -0,0 +1,100 @@
+# src/canteen.py
+
+import csv
+import math
+import random
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+
+class AliasTable:
+    """
+    Walker 别名表：按任意非负实数权重抽样，预处理 O(n)，每次抽样 O(1)。
+
+    每个槽位保存一个接受概率和一个别名，抽样时等概率选一个槽位，
+    再用一次均匀随机数决定取该槽位本身还是它的别名。
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        :param weights: 各项的权重，不要求归一化
+        :raises ValueError: 权重为空、为负、非有限值或总和为 0
+        """
+        weights = [float(weight) for weight in weights]
+        if not weights:
+            raise ValueError("权重列表为空")
+        if any(not math.isfinite(weight) or weight < 0 for weight in weights):
+            raise ValueError(f"权重必须是非负的有限值：{weights}")
+        total = math.fsum(weights)
+        if total <= 0:
+            raise ValueError("权重之和必须大于 0")
+
+        size = len(weights)
+        self.weights = tuple(weights)
+        self.probability = [1.0] * size
+        self.alias = list(range(size))
+        # Vose 的做法：缩放后不足 1 的槽位由超过 1 的项补齐
+        scaled = [weight * size / total for weight in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # 剩余槽位只是浮点误差造成的，接受概率取 1
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.probability)
+
+    def sample(self, rng: random.Random = random) -> int:
+        """
+        抽取一项的下标。
+
+        :param rng: 随机数生成器，默认使用 random 模块的全局实例
+        """
+        u = rng.random() * len(self.probability)
+        slot = int(u)
+        return slot if u - slot < self.probability[slot] else self.alias[slot]
+
+    def distribution(self) -> List[float]:
+        """别名表实际表示的各项概率，用于校验"""
+        size = len(self.probability)
+        result = [0.0] * size
+        for slot, probability in enumerate(self.probability):
+            result[slot] += probability / size
+            result[self.alias[slot]] += (1.0 - probability) / size
+        return result
+
+
+@lru_cache(maxsize=16)
+def alias_table(weights: Tuple[float, ...]) -> AliasTable:
+    """按权重缓存别名表，权重不变时不重新构建"""
+    return AliasTable(weights)
+
+
+def load_canteens(csv_path: str) -> List[Dict]:
+    """
+    读取食堂列表，每行为 名称,位置,权重，跳过表头和不足三列的行。
+
+    :param csv_path: CSV 路径
+    :return: 食堂列表，每项包含 name、location 和 prob
+    :raises ValueError: 权重不是非负数，或全部权重为 0
+    """
+    canteens = []
+    with open(csv_path, encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)  # 跳过表头
+        for row in reader:
+            if len(row) < 3:
+                continue  # 跳过不完整的行
+            weight = float(row[2])
+            if not math.isfinite(weight) or weight < 0:
+                raise ValueError(f"食堂 {row[0].strip()} 的权重无效：{row[2]}")
+            canteens.append({"name": row[0].strip(), "location": row[1].strip(), "prob": weight})
+    if canteens and not any(canteen["prob"] > 0 for canteen in canteens):
+        raise ValueError("所有食堂的权重都为 0")
+    return canteens
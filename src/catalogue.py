@@ -0,0 +1,265 @@
+# src/catalogue.py
+
+import csv
+import hashlib
+import io
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 缓存文件格式：文件头之后依次为种类表、口味表（UTF-8，以换行分隔）、种类编码列（uint16）、
+# 口味位图列（uint64，第 i 位表示口味表中的第 i 个口味）、菜名偏移列（uint32，行数 + 1 个）和菜名数据
+MAGIC = b"USECAT01"
+# 魔数, CSV 的 mtime_ns, CSV 大小, CSV 的 SHA-256, 行数, 种类表字节数, 口味表字节数, 菜名数据字节数
+HEADER = struct.Struct("<8sqq32sIIII")
+MAX_FLAVORS = 64
+
+# 每个进程内按 CSV 路径与缓存目录共享同一个目录对象（以及同一份映射）
+_catalogues: Dict[Tuple[str, Optional[str]], "FoodCatalogue"] = {}
+_catalogues_lock = threading.Lock()
+
+
+def _align(offset: int) -> int:
+    """按 8 字节对齐，使各列可以直接作为 NumPy 数组读取"""
+    return (offset + 7) & ~7
+
+
+def parse_food_csv(data: bytes) -> List[Tuple[str, str, List[str]]]:
+    """
+    解析 food_list.csv 的内容，规则与原先逐行加载时相同：跳过表头和不足三列的行，
+    口味先按 '/' 分割，再拆分为单个字符。
+
+    :param data: CSV 文件的字节内容
+    :return: (菜名, 种类, 口味字符列表) 列表
+    """
+    records = []
+    reader = csv.reader(io.StringIO(data.decode('utf-8')))
+    next(reader, None)  # 跳过表头
+    for row in reader:
+        if len(row) < 3:
+            continue  # 跳过不完整的行
+        flavors_raw = row[2].strip()
+        flavors = [ch for s in flavors_raw.split('/') for ch in s] if flavors_raw else []
+        records.append((row[0].strip(), row[1].strip(), flavors))
+    return records
+
+
+def build_catalogue(records: Sequence[Tuple[str, str, Iterable[str]]], mtime_ns: int = 0,
+                    size: int = 0, digest: bytes = b"\0" * 32) -> bytes:
+    """
+    把记录编码为列式目录的二进制内容。
+
+    :param records: (菜名, 种类, 口味字符) 序列
+    :param mtime_ns: 来源 CSV 的修改时间，写入文件头用于校验
+    :param size: 来源 CSV 的大小
+    :param digest: 来源 CSV 的 SHA-256
+    """
+    kinds: Dict[str, int] = {}
+    flavors: Dict[str, int] = {}
+    kind_codes, flavor_bits, encoded = [], [], []
+    for name, kind, row_flavors in records:
+        kind_codes.append(kinds.setdefault(kind, len(kinds)))
+        bits = 0
+        for flavor in row_flavors:
+            bits |= 1 << flavors.setdefault(flavor, len(flavors))
+        flavor_bits.append(bits)
+        encoded.append(name.encode('utf-8'))
+    name_offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(name) for name in encoded], out=name_offsets[1:])
+    names = b"".join(encoded)
+    if len(flavors) > MAX_FLAVORS:
+        raise ValueError(f"口味种类超过 {MAX_FLAVORS} 种，无法编码为位图")
+
+    kinds_table = '\n'.join(kinds).encode('utf-8')
+    flavors_table = '\n'.join(flavors).encode('utf-8')
+    parts = [HEADER.pack(MAGIC, mtime_ns, size, digest, len(records),
+                         len(kinds_table), len(flavors_table), len(names)),
+             kinds_table, flavors_table]
+    columns = (np.array(kind_codes, dtype='<u2'), np.array(flavor_bits, dtype='<u8'), name_offsets)
+    for column in columns:
+        length = sum(len(part) for part in parts)
+        parts.append(b"\0" * (_align(length) - length))
+        parts.append(column.tobytes())
+    parts.append(names)
+    return b"".join(parts)
+
+
+class FoodCatalogue:
+    """
+    列式食物目录：菜名、种类、口味按列存放，种类与口味字符串只保存一份（驻留），
+    口味编码为每行一个 64 位位图。
+
+    数据直接读取自缓冲区（通常是只读映射的缓存文件），不为每道菜创建字典，
+    同一台机器上映射同一缓存文件的进程共享同一份物理内存。
+    """
+
+    def __init__(self, buffer, origin: str = "memory", path: Optional[str] = None):
+        """
+        :param buffer: build_catalogue 生成的内容（bytes 或只读 mmap）
+        :param origin: 数据来源："mapped"（映射已有缓存）、"rebuilt"（重新生成缓存）、"memory"（仅在内存中）
+        :param path: 缓存文件路径
+        """
+        if len(buffer) < HEADER.size:
+            raise ValueError("食物目录缓存已损坏")
+        (magic, self.source_mtime_ns, self.source_size, self.source_digest, rows,
+         kinds_length, flavors_length, names_length) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("食物目录缓存格式不匹配")
+        self.buffer = buffer
+        self.origin = origin
+        self.path = path
+
+        offset = HEADER.size
+        self.kinds = self._table(buffer, offset, kinds_length)
+        offset += kinds_length
+        self.flavors = self._table(buffer, offset, flavors_length)
+        offset += flavors_length
+        columns = []
+        for dtype, count in (('<u2', rows), ('<u8', rows), ('<u4', rows + 1)):
+            offset = _align(offset)
+            columns.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset))
+            offset += columns[-1].nbytes
+        self.kind_codes, self.flavor_bits, self.name_offsets = columns
+        self.names_offset = offset
+        if offset + names_length != len(buffer):
+            raise ValueError("食物目录缓存已损坏")
+
+    @staticmethod
+    def _table(buffer, offset: int, length: int) -> Tuple[str, ...]:
+        if not length:
+            return ()
+        return tuple(sys.intern(item) for item in bytes(buffer[offset:offset + length]).decode('utf-8').split('\n'))
+
+    @classmethod
+    def from_records(cls, records: Sequence[Tuple[str, str, Iterable[str]]]) -> "FoodCatalogue":
+        """由内存中的记录构建目录，不写缓存文件"""
+        return cls(build_catalogue(records))
+
+    def __len__(self) -> int:
+        return len(self.kind_codes)
+
+    def name(self, row: int) -> str:
+        """第 row 行的菜名"""
+        start = self.names_offset + int(self.name_offsets[row])
+        end = self.names_offset + int(self.name_offsets[row + 1])
+        return bytes(self.buffer[start:end]).decode('utf-8')
+
+    def kind(self, row: int) -> str:
+        """第 row 行的种类"""
+        return self.kinds[self.kind_codes[row]]
+
+    def flavors_of(self, row: int) -> List[str]:
+        """第 row 行的口味，按口味表顺序"""
+        bits = int(self.flavor_bits[row])
+        return [flavor for bit, flavor in enumerate(self.flavors) if bits >> bit & 1]
+
+    def food(self, row: int) -> Dict:
+        """以原先 load_food_data 的字典形式返回第 row 行"""
+        return {"name": self.name(row), "flavors": self.flavors_of(row), "kind": self.kind(row)}
+
+
+def catalogue_cache_path(csv_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    CSV 对应的缓存文件路径，不同路径的 CSV 使用不同的缓存文件。
+
+    :param csv_path: CSV 路径
+    :param cache_dir: 缓存目录，默认使用系统临时目录下的 ushalleat
+    """
+    directory = cache_dir or os.path.join(tempfile.gettempdir(), 'ushalleat')
+    key = hashlib.sha1(os.path.abspath(csv_path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(directory, f"food_catalogue.{key}.bin")
+
+
+def _map_file(path: str):
+    """只读映射缓存文件，文件不存在或为空时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomically(path: str, payload: bytes):
+    """写入临时文件后替换，已映射旧文件的进程不受影响"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.food_catalogue.', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def open_catalogue(csv_path: str, cache_dir: Optional[str] = None) -> FoodCatalogue:
+    """
+    打开 CSV 对应的列式目录：缓存文件记录的 mtime 与大小和 CSV 一致时直接映射；
+    不一致时计算 CSV 的 SHA-256，内容未变只刷新文件头，内容变化才重新生成。
+    缓存目录不可写时退回到仅在内存中构建。
+
+    :param csv_path: CSV 路径
+    :param cache_dir: 缓存目录，默认使用系统临时目录下的 ushalleat
+    :raises FileNotFoundError: CSV 不存在
+    """
+    stat = os.stat(csv_path)
+    cache_path = catalogue_cache_path(csv_path, cache_dir)
+    buffer = _map_file(cache_path)
+    catalogue = None
+    if buffer is not None:
+        try:
+            catalogue = FoodCatalogue(buffer, "mapped", cache_path)
+        except (ValueError, struct.error):
+            buffer.close()
+        else:
+            if (catalogue.source_mtime_ns, catalogue.source_size) == (stat.st_mtime_ns, stat.st_size):
+                return catalogue
+
+    with open(csv_path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).digest()
+    if catalogue is not None and catalogue.source_digest == digest:
+        # 只是 mtime 变了（如重新检出），沿用已编码的列，更新文件头中的时间戳
+        payload = HEADER.pack(MAGIC, stat.st_mtime_ns, stat.st_size, digest, len(catalogue),
+                              *HEADER.unpack_from(catalogue.buffer, 0)[5:]) + catalogue.buffer[HEADER.size:]
+        origin = "mapped"
+    else:
+        payload = build_catalogue(parse_food_csv(data), stat.st_mtime_ns, stat.st_size, digest)
+        origin = "rebuilt"
+
+    try:
+        _write_atomically(cache_path, payload)
+    except OSError as e:
+        print(f"警告：无法写入食物目录缓存 {cache_path}：{e}")
+        return FoodCatalogue(payload, "memory")
+    buffer = _map_file(cache_path)
+    if buffer is None:
+        return FoodCatalogue(payload, "memory")
+    return FoodCatalogue(buffer, origin, cache_path)
+
+
+def load_catalogue(csv_path: str, cache_dir: Optional[str] = None) -> FoodCatalogue:
+    """
+    返回本进程共享的目录对象；CSV 的 mtime 或大小变化后重新打开。
+
+    :param csv_path: CSV 路径
+    :param cache_dir: 缓存目录，默认使用系统临时目录下的 ushalleat
+    :raises FileNotFoundError: CSV 不存在
+    """
+    stat = os.stat(csv_path)
+    key = (os.path.abspath(csv_path), cache_dir)
+    with _catalogues_lock:
+        catalogue = _catalogues.get(key)
+        if catalogue is None or (catalogue.source_mtime_ns, catalogue.source_size) != (stat.st_mtime_ns, stat.st_size):
+            catalogue = _catalogues[key] = open_catalogue(csv_path, cache_dir)
+        return catalogue
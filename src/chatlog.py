@@ -0,0 +1,126 @@
+# chatlog.py
+
+import os
+import queue
+import threading
+import time
+import datetime
+import logging
+
+from src.debug_logging import DEBUG_LOGGER_NAME
+
+
+class ChatLogWriter:
+    """
+    对话日志的后台写入器。
+
+    处理线程只把日志条目放入队列，后台线程把队列中积累的条目合并为一批，
+    用一次 write 写入文件，磁盘延迟因此不再出现在回复路径上。
+    fsync 策略：
+        "batch"    —— 每写入一批后 fsync
+        "interval" —— 距上次 fsync 超过 fsync_interval 秒后 fsync
+        "shutdown" —— 仅在关闭时 fsync（每批仍会 flush 到操作系统）
+    """
+    FSYNC_POLICIES = ("batch", "interval", "shutdown")
+
+    # 队列中的结束标记
+    _STOP = object()
+
+    def __init__(self, file_path: str, fsync_policy: str = "shutdown",
+                 fsync_interval: float = 1.0, max_batch: int = 512):
+        """
+        :param file_path: 日志文件路径（追加写入）
+        :param fsync_policy: fsync 策略，见类说明
+        :param fsync_interval: "interval" 策略下两次 fsync 的最小间隔（秒）
+        :param max_batch: 单批最多合并的条目数
+        """
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"未知的 fsync 策略: {fsync_policy}，可选值为 {self.FSYNC_POLICIES}")
+        self.file_path = file_path
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="ChatLogWriter", daemon=True)
+        self.logger = logging.getLogger(DEBUG_LOGGER_NAME)
+        self.batches_written = 0
+        self.entries_written = 0
+
+    def start(self):
+        """启动后台写入线程"""
+        self.thread.start()
+
+    def write(self, speaker: str, message: str):
+        """
+        记录一条对话消息，时间戳在调用时确定，写入由后台线程完成。
+
+        :param speaker: 消息发送者，如“机器人”或“用户”
+        :param message: 消息内容
+        """
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        self.queue.put(f"{speaker},{timestamp},{message}\n")
+
+    def close(self, timeout: float = 5.0):
+        """
+        写入队列中剩余的全部条目并 fsync，然后关闭文件。
+
+        :param timeout: 等待后台线程结束的最长秒数
+        """
+        if self.thread.is_alive():
+            self.queue.put(self._STOP)
+            self.thread.join(timeout)
+
+    def run(self):
+        """
+        后台线程主循环：阻塞等待第一条记录，再尽量多地取出已排队的记录。
+        日志文件在写入第一批记录时才打开，没有对话时不会留下空文件。
+        """
+        last_fsync = time.monotonic()
+        dirty = False  # 是否有尚未 fsync 的数据
+        log_file = None
+        try:
+            stopping = False
+            while not stopping:
+                # "interval" 策略下即使没有新消息，也要按时 fsync 已写入的数据
+                wait = self.fsync_interval if dirty and self.fsync_policy == "interval" else None
+                try:
+                    entry = self.queue.get(timeout=wait)
+                except queue.Empty:
+                    entry = None
+
+                batch = []
+                while entry is not None:
+                    if entry is self._STOP:
+                        stopping = True
+                        break
+                    batch.append(entry)
+                    if len(batch) >= self.max_batch:
+                        break
+                    try:
+                        entry = self.queue.get_nowait()
+                    except queue.Empty:
+                        entry = None
+
+                if batch:
+                    try:
+                        if log_file is None:
+                            log_file = open(self.file_path, "a", encoding="utf-8")
+                        log_file.write(''.join(batch))
+                        log_file.flush()
+                    except OSError as e:
+                        self.logger.error(f"写入对话日志时发生错误: {e}")
+                        continue
+                    dirty = True
+                    self.batches_written += 1
+                    self.entries_written += len(batch)
+
+                now = time.monotonic()
+                if dirty and (stopping or self.fsync_policy == "batch"
+                              or (self.fsync_policy == "interval"
+                                  and now - last_fsync >= self.fsync_interval)):
+                    os.fsync(log_file.fileno())
+                    last_fsync = now
+                    dirty = False
+        finally:
+            if log_file is not None:
+                log_file.close()
@@ -2,7 +2,6 @@
 
 import sys
 import os
-import socket
 import threading
 import pyttsx3
 import json
@@ -11,6 +10,7 @@ from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QApplicatio
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QPixmap, QMovie, QPainter, QIcon
 from src.history import HistoryView
+from src import transport
 import random
 
 
@@ -24,16 +24,18 @@ class Client(QWidget):
     state_received = pyqtSignal(str)
     speed_received = pyqtSignal(int)  # 新增信号，用于接收语速设置
 
-    def __init__(self, server_host: str, server_port: int):
+    def __init__(self, server_host: str, server_port: int, server_unix_path: str = None):
         """
         初始化客户端窗口，设置UI、日志、语音引擎，并建立与服务器的连接。
         
         :param server_host: 服务器主机地址
         :param server_port: 服务器监听端口
+        :param server_unix_path: 服务器的 Unix 套接字路径，指定后忽略主机和端口
         """
         super().__init__()
         self.server_host = server_host
         self.server_port = server_port
+        self.server_unix_path = server_unix_path
         self.is_closing = False  # 标志位，跟踪客户端是否正在关闭
         self.init_logging()  # 初始化日志系统
         self.logger.info("初始化用户界面")
@@ -339,14 +341,15 @@ class Client(QWidget):
         """
         self.logger.info("尝试连接到服务器...")
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.server_host, self.server_port))
-            self.logger.info(f"已连接到服务器 {self.server_host}:{self.server_port}")
+            # 与服务器同机运行时可使用 Unix 套接字，协议与 TCP 相同
+            self.socket = transport.connect(self.server_host, self.server_port, self.server_unix_path)
+            address = transport.describe(self.server_host, self.server_port, self.server_unix_path)
+            self.logger.info(f"已连接到服务器 {address}")
 
             # 启动监听线程，接收服务器消息
             self.listener_thread = threading.Thread(target=self.listen_to_server, daemon=True)
             self.listener_thread.start()
-        except ConnectionRefusedError:
+        except (ConnectionRefusedError, FileNotFoundError):
             self.logger.error("无法连接到服务器，请确保服务器正在运行。")
             self.reply_received.emit("无法连接到服务器，请确保服务器正在运行。")
             self.state_received.emit("")
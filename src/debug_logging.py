@@ -0,0 +1,112 @@
+# debug_logging.py
+
+import atexit
+import logging
+import queue
+import random
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+# 服务器调试日志使用的记录器名称
+DEBUG_LOGGER_NAME = "ServerDebugLogger"
+
+DEBUG_FORMAT = logging.Formatter(
+    fmt='[%(levelname)s] %(asctime)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+_setup_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_ring_handler: Optional["RingBufferHandler"] = None
+_sampling_filter: Optional["SamplingFilter"] = None
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    只把日志记录放入队列、不在调用线程中格式化的 QueueHandler。
+    标准 QueueHandler.prepare 会立即拼接消息，这里推迟到监听线程中进行。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """按比例保留 DEBUG 记录，INFO 及以上级别全部保留"""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class RingBufferHandler(logging.Handler):
+    """把最近的日志记录保存在内存环形缓冲区中，需要时再格式化输出"""
+
+    def __init__(self, capacity: int = 1000):
+        super().__init__(logging.DEBUG)
+        self.records = deque(maxlen=capacity)
+        self.setFormatter(DEBUG_FORMAT)
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+    def dump(self) -> List[str]:
+        """按时间顺序返回缓冲区中全部记录的格式化文本"""
+        self.acquire()
+        try:
+            records = list(self.records)
+        finally:
+            self.release()
+        return [self.format(record) for record in records]
+
+
+def setup_debug_logging(level: int = logging.DEBUG, sample_rate: float = 1.0,
+                        ring_size: int = 1000) -> logging.Logger:
+    """
+    配置服务器调试日志，可重复调用：处理器只在第一次调用时添加，
+    之后的调用只更新级别和采样率，不会导致日志重复输出。
+
+    调用线程中的 logger 只把记录放入队列，由监听线程格式化后
+    写到终端，并保存到环形缓冲区供 dump_debug_ring 导出。
+
+    :param level: 记录器级别，低于该级别的调用直接返回，不产生记录
+    :param sample_rate: 输出到终端的 DEBUG 记录比例（0~1），环形缓冲区不受影响
+    :param ring_size: 环形缓冲区保留的记录条数
+    :return: 调试日志记录器
+    """
+    global _listener, _ring_handler, _sampling_filter
+    logger = logging.getLogger(DEBUG_LOGGER_NAME)
+    with _setup_lock:
+        logger.setLevel(level)
+        if _listener is None:
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(logging.DEBUG)
+            console_handler.setFormatter(DEBUG_FORMAT)
+            _sampling_filter = SamplingFilter(sample_rate)
+            console_handler.addFilter(_sampling_filter)
+            _ring_handler = RingBufferHandler(ring_size)
+
+            log_queue = queue.SimpleQueue()
+            logger.addHandler(LazyQueueHandler(log_queue))
+            logger.propagate = False
+            _listener = QueueListener(log_queue, console_handler, _ring_handler,
+                                      respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+        else:
+            _sampling_filter.rate = sample_rate
+    return logger
+
+
+def dump_debug_ring() -> List[str]:
+    """导出环形缓冲区中的最近日志；尚未配置调试日志时返回空列表"""
+    if _ring_handler is None:
+        return []
+    return _ring_handler.dump()
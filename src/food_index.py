@@ -0,0 +1,79 @@
+# src/food_index.py
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.catalogue import FoodCatalogue
+
+# 偏好签名：((口味, 偏好), ...), ((种类, 偏好), ...)，只包含“喜欢”“不喜欢”的条目
+Signature = Tuple[Tuple[Tuple[str, str], ...], Tuple[Tuple[str, str], ...]]
+
+PREFERENCES = ("喜欢", "不喜欢")
+
+
+class FoodIndex:
+    """
+    食物目录的位图索引：加载时由目录的种类编码列和口味位图列为每种口味和每个种类
+    各生成一个布尔数组，一组偏好只需几次按位与 / 与非运算即可得到候选集合。
+
+    候选行号按偏好签名缓存，所有会话视图共享同一个索引和缓存；
+    返回的行号按目录顺序排列，调用方不得修改。
+    """
+
+    def __init__(self, catalogue: FoodCatalogue, cache_size: int = 256):
+        """
+        :param catalogue: 列式食物目录
+        :param cache_size: 最多缓存的偏好签名数
+        """
+        self.catalogue = catalogue
+        self.all = np.ones(len(catalogue), dtype=bool)
+        self.flavor_masks = {flavor: (catalogue.flavor_bits & np.uint64(1 << bit)) != 0
+                             for bit, flavor in enumerate(catalogue.flavors)}
+        self.kind_masks = {kind: catalogue.kind_codes == code for code, kind in enumerate(catalogue.kinds)}
+
+        self.select = lru_cache(maxsize=cache_size)(self._select)
+
+    @staticmethod
+    def signature(flavor_pref: Dict[str, Optional[str]], kind_pref: Dict[str, Optional[str]]) -> Signature:
+        """
+        把会话的偏好字典转换为可哈希的签名，未设置（None）的条目不影响结果，不计入签名。
+
+        :param flavor_pref: 口味偏好
+        :param kind_pref: 种类偏好
+        """
+        return (tuple((flavor, pref) for flavor, pref in flavor_pref.items() if pref in PREFERENCES),
+                tuple((kind, pref) for kind, pref in kind_pref.items() if pref in PREFERENCES))
+
+    def mask(self, signature: Signature) -> np.ndarray:
+        """
+        计算满足偏好签名的行的布尔数组。
+
+        :param signature: 偏好签名
+        """
+        flavors, kinds = signature
+        mask = self.all.copy()
+        for masks, prefs in ((self.flavor_masks, flavors), (self.kind_masks, kinds)):
+            for key, pref in prefs:
+                column = masks.get(key)
+                if pref == "喜欢":
+                    if column is None:
+                        mask[:] = False
+                    else:
+                        mask &= column
+                elif column is not None:
+                    mask &= ~column
+        return mask
+
+    def _select(self, signature: Signature) -> List[int]:
+        return np.flatnonzero(self.mask(signature)).tolist()
+
+    def filter(self, flavor_pref: Dict[str, Optional[str]], kind_pref: Dict[str, Optional[str]]) -> List[int]:
+        """
+        返回满足偏好的食物在目录中的行号（缓存结果，不得修改）。
+
+        :param flavor_pref: 口味偏好
+        :param kind_pref: 种类偏好
+        """
+        return self.select(self.signature(flavor_pref, kind_pref))
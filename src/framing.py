@@ -0,0 +1,57 @@
+# framing.py
+
+from typing import List
+
+
+class FrameTooLongError(ValueError):
+    """单行消息超过允许的最大长度"""
+
+
+class LineFramer:
+    """
+    换行分隔协议的增量分帧器。
+
+    接收到的字节先追加到 bytearray 缓冲区，再按 b'\\n' 切分出完整的行后才解码。
+    UTF-8 多字节字符的任何字节都不会等于 0x0A，因此被拆在两次 recv 之间的
+    消息或汉字会留在缓冲区中等待后续数据，而不会被当成两条指令或引发解码错误。
+    """
+
+    def __init__(self, max_line_length: int = 8192):
+        """
+        :param max_line_length: 单行允许的最大字节数（不含换行符）
+        """
+        self.max_line_length = max_line_length
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[str]:
+        """
+        追加接收到的数据，返回其中所有完整的非空行。
+
+        :param data: 本次接收到的字节
+        :return: 解码后的行列表，不含换行符
+        :raises FrameTooLongError: 某一行超过最大长度
+        """
+        buffer = self.buffer
+        buffer += data
+        lines = []
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            if end - start > self.max_line_length:
+                raise FrameTooLongError(f"消息长度超过 {self.max_line_length} 字节")
+            line = buffer[start:end].decode('utf-8', errors='replace').rstrip('\r')
+            if line.strip():
+                lines.append(line)
+            start = end + 1
+        del buffer[:start]
+
+        # 尚未出现换行符的残余数据同样受长度限制，避免缓冲区无限增长
+        if len(buffer) > self.max_line_length:
+            raise FrameTooLongError(f"消息长度超过 {self.max_line_length} 字节")
+        return lines
+
+    def pending(self) -> int:
+        """返回缓冲区中尚未成行的字节数"""
+        return len(self.buffer)
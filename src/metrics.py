@@ -0,0 +1,277 @@
+# metrics.py
+
+import bisect
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+# 延迟直方图的桶上界（秒），覆盖 50 微秒到 5 秒
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+class Histogram:
+    """固定桶的延迟直方图，记录一次只需一次二分查找和几次加法"""
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        # 最后一个元素对应 +Inf 桶
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        """记录一次耗时（调用方持有锁）"""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, fraction: float) -> float:
+        """按桶上界估算分位数（秒）"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        """返回 JSON 可序列化的摘要，时间单位为毫秒"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+        }
+
+
+class ServerMetrics:
+    """
+    服务器指标：按指令统计次数与处理延迟，按阶段统计耗时，按上游服务统计请求延迟与失败次数。
+
+    每次记录只在一把锁内做常数次操作，可在生产环境中常开。
+    """
+    STAGES = ("framing", "intent_cache", "lexicon_scan", "clean_text", "grammar", "find_best_command",
+              "typo", "ngram", "execute", "logging", "send")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.command_latency: Dict[str, Histogram] = {}
+        self.stage_latency: Dict[str, Histogram] = {stage: Histogram() for stage in self.STAGES}
+        self.errors = 0
+        # 各解析路径的命中次数，以及解析上下文各字段的计算次数
+        # （可看出分词 cleaned_text 实际被调用的比例）
+        self.parsed_messages = 0
+        self.resolve_paths: Dict[str, int] = {}
+        self.context_fields: Dict[str, int] = {}
+        # 上游服务（如天气接口）每次 HTTP 请求的耗时与失败次数
+        self.upstream_latency: Dict[str, Histogram] = {}
+        self.upstream_failures: Dict[str, int] = {}
+
+    def observe_command(self, command: str, seconds: float):
+        """记录一条指令从收到到生成回复的耗时"""
+        with self.lock:
+            histogram = self.command_latency.get(command)
+            if histogram is None:
+                histogram = self.command_latency[command] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_stage(self, stage: str, seconds: float):
+        """记录某个处理阶段的耗时"""
+        with self.lock:
+            histogram = self.stage_latency.get(stage)
+            if histogram is None:
+                histogram = self.stage_latency[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_stages(self, stages: Dict[str, float]):
+        """一次记录多个阶段的耗时"""
+        with self.lock:
+            for stage, seconds in stages.items():
+                histogram = self.stage_latency.get(stage)
+                if histogram is None:
+                    histogram = self.stage_latency[stage] = Histogram()
+                histogram.observe(seconds)
+
+    def observe_upstream(self, upstream: str, seconds: float, ok: bool = True):
+        """
+        记录一次上游 HTTP 请求
+
+        :param upstream: 上游服务名，如 "weather"
+        :param seconds: 请求耗时（秒）
+        :param ok: 请求是否成功
+        """
+        with self.lock:
+            histogram = self.upstream_latency.get(upstream)
+            if histogram is None:
+                histogram = self.upstream_latency[upstream] = Histogram()
+                self.upstream_failures[upstream] = 0
+            histogram.observe(seconds)
+            if not ok:
+                self.upstream_failures[upstream] += 1
+
+    def observe_parse(self, path: Optional[str], fields):
+        """
+        记录一条消息的解析路径和实际计算过的上下文字段
+
+        :param path: 解析路径，如 "exact"、"grammar"、"lexicon"
+        :param fields: 计算过的上下文字段名
+        """
+        with self.lock:
+            self.parsed_messages += 1
+            path = path or "unknown"
+            self.resolve_paths[path] = self.resolve_paths.get(path, 0) + 1
+            for field in fields:
+                self.context_fields[field] = self.context_fields.get(field, 0) + 1
+
+    def record_error(self):
+        """记录一次处理异常"""
+        with self.lock:
+            self.errors += 1
+
+    def snapshot(self) -> Dict:
+        """返回 JSON 可序列化的指标快照"""
+        with self.lock:
+            return {
+                "commands": {command: histogram.snapshot()
+                             for command, histogram in self.command_latency.items()},
+                "stages": {stage: histogram.snapshot()
+                           for stage, histogram in self.stage_latency.items()},
+                "errors": self.errors,
+                "parser": {
+                    "messages": self.parsed_messages,
+                    "paths": dict(self.resolve_paths),
+                    "hit_rates": {path: round(count / self.parsed_messages, 4)
+                                  for path, count in self.resolve_paths.items()},
+                    "context_fields": dict(self.context_fields),
+                },
+                "upstreams": {upstream: dict(histogram.snapshot(), failures=self.upstream_failures[upstream])
+                              for upstream, histogram in self.upstream_latency.items()},
+            }
+
+    def render_prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """
+        以 Prometheus 文本格式输出全部指标。
+
+        :param gauges: 额外输出的瞬时值，如会话数、解析队列深度
+        """
+        lines = []
+        with self.lock:
+            lines.append("# HELP ushalleat_commands_total 按指令统计的处理次数")
+            lines.append("# TYPE ushalleat_commands_total counter")
+            for command, histogram in self.command_latency.items():
+                lines.append(f'ushalleat_commands_total{{command="{_escape(command)}"}} {histogram.count}')
+            lines.extend(_render_histogram(
+                "ushalleat_command_latency_seconds", "按指令统计的处理延迟",
+                "command", self.command_latency))
+            lines.extend(_render_histogram(
+                "ushalleat_stage_latency_seconds", "按处理阶段统计的耗时",
+                "stage", self.stage_latency))
+            lines.append("# HELP ushalleat_errors_total 处理指令时发生的异常次数")
+            lines.append("# TYPE ushalleat_errors_total counter")
+            lines.append(f"ushalleat_errors_total {self.errors}")
+            lines.append("# HELP ushalleat_parsed_messages_total 经过解析器的消息数")
+            lines.append("# TYPE ushalleat_parsed_messages_total counter")
+            lines.append(f"ushalleat_parsed_messages_total {self.parsed_messages}")
+            lines.append("# HELP ushalleat_resolve_path_total 按解析路径统计的消息数")
+            lines.append("# TYPE ushalleat_resolve_path_total counter")
+            for path, count in self.resolve_paths.items():
+                lines.append(f'ushalleat_resolve_path_total{{path="{_escape(path)}"}} {count}')
+            lines.append("# HELP ushalleat_context_field_computed_total 按字段统计的解析上下文计算次数")
+            lines.append("# TYPE ushalleat_context_field_computed_total counter")
+            for field, count in self.context_fields.items():
+                lines.append(f'ushalleat_context_field_computed_total{{field="{_escape(field)}"}} {count}')
+            lines.extend(_render_histogram(
+                "ushalleat_upstream_latency_seconds", "按上游服务统计的 HTTP 请求耗时",
+                "upstream", self.upstream_latency))
+            lines.append("# HELP ushalleat_upstream_failures_total 按上游服务统计的失败请求数")
+            lines.append("# TYPE ushalleat_upstream_failures_total counter")
+            for upstream, count in self.upstream_failures.items():
+                lines.append(f'ushalleat_upstream_failures_total{{upstream="{_escape(upstream)}"}} {count}')
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE ushalleat_{name} gauge")
+            lines.append(f"ushalleat_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """转义 Prometheus 标签值"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histogram(name: str, help_text: str, label: str,
+                      histograms: Dict[str, Histogram]):
+    """输出一组带标签的直方图（调用方持有锁）"""
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} histogram"
+    for key, histogram in histograms.items():
+        escaped = _escape(key)
+        cumulative = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+            cumulative += bucket_count
+            yield f'{name}_bucket{{{label}="{escaped}",le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{label}="{escaped}",le="+Inf"}} {histogram.count}'
+        yield f'{name}_sum{{{label}="{escaped}"}} {histogram.total}'
+        yield f'{name}_count{{{label}="{escaped}"}} {histogram.count}'
+
+
+class MetricsHTTPServer:
+    """
+    本地 HTTP 指标端点：GET /metrics 返回 Prometheus 文本，GET /stats 返回 JSON。
+    """
+
+    def __init__(self, host: str, port: int,
+                 render_prometheus: Callable[[], str], collect_stats: Callable[[], Dict]):
+        """
+        :param host: 监听地址，建议仅监听本机
+        :param port: 监听端口，0 表示由系统分配
+        :param render_prometheus: 生成 Prometheus 文本的函数
+        :param collect_stats: 生成 JSON 指标的函数
+        """
+        handler = self._make_handler(render_prometheus, collect_stats)
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.address: Tuple[str, int] = self.httpd.server_address[:2]
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       name="MetricsHTTPServer", daemon=True)
+
+    @staticmethod
+    def _make_handler(render_prometheus, collect_stats):
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = render_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/stats":
+                    body = json.dumps(collect_stats(), ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 不把每次抓取写到终端
+                pass
+
+        return MetricsHandler
+
+    def start(self):
+        """在后台线程中开始服务"""
+        self.thread.start()
+
+    def stop(self):
+        """停止服务并释放端口"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
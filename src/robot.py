@@ -1,46 +1,107 @@
 # src/robot.py
 
-import requests
 import random
-import csv
 import os
 import sys
-import pygame
 import threading
+import copy
 from datetime import datetime
 from typing import List, Dict, Optional
 
+from src.session import SessionState
+from src.canteen import AliasTable, alias_table, load_canteens
+from src.catalogue import FoodCatalogue, load_catalogue
+from src.food_index import FoodIndex
+from src.weather import CircuitOpenError, WeatherCache, WeatherClient, WeatherError
+
+
+# pygame 仅在首次使用音乐功能时导入，无需音乐的无界面服务器不会加载它
+_pygame = None
+_pygame_lock = threading.Lock()
+
+
+def load_pygame():
+    """导入 pygame 并初始化 mixer（只执行一次），返回 pygame 模块"""
+    global _pygame
+    with _pygame_lock:
+        if _pygame is None:
+            import pygame
+            pygame.mixer.init()
+            _pygame = pygame
+    return _pygame
+
+
+def _delegate(holder: str, name: str) -> property:
+    """生成一个把属性读写转发到 self.<holder>.<name> 的 property"""
+    def getter(self):
+        return getattr(getattr(self, holder), name)
+
+    def setter(self, value):
+        setattr(getattr(self, holder), name, value)
+
+    return property(getter, setter)
+
+
+class PlayerState:
+    """音乐播放状态。扬声器只有一个，因此由所有会话共享。"""
+    __slots__ = ("current_song", "is_playing", "is_paused", "music_thread")
 
-class Robot:
     def __init__(self):
-        # 口味偏好，仅支持“酸”、“甜”、“辣”、“咸”
-        self.flavor_pref = {
-            "酸": None,
-            "甜": None,
-            "辣": None,
-            "咸": None
-        }
-        # 种类偏好，仅支持“米”、“面”、“其他”
-        self.kind_pref = {
-            "米": None,
-            "面": None,
-            "其他": None
-        }
-        self.speed = 200  # 默认语速
-        self.current_state = "默认状态"
-        self.food_list = self.load_food_data()
-        
-        # 音乐播放相关属性
-        self.music_directory = self.resource_path("resources/music")
-        self.music_files = self.load_music_files()
         self.current_song = None
         self.is_playing = False
         self.is_paused = False
         self.music_thread = None
+
+
+class Robot:
+    # 每个会话独立的可变状态，保存在 self.state（SessionState）中
+    flavor_pref = _delegate("state", "flavor_pref")
+    kind_pref = _delegate("state", "kind_pref")
+    speed = _delegate("state", "speed")
+    current_state = _delegate("state", "current_state")
+    last_recommendation = _delegate("state", "last_recommendation")
+
+    # 音乐播放状态，保存在所有会话共享的 self.player 中
+    current_song = _delegate("player", "current_song")
+    is_playing = _delegate("player", "is_playing")
+    is_paused = _delegate("player", "is_paused")
+    music_thread = _delegate("player", "music_thread")
+
+    def __init__(self, state: Optional[SessionState] = None, cache_directory: Optional[str] = None,
+                 weather: Optional[WeatherCache] = None):
+        """
+        :param state: 会话状态，默认新建
+        :param cache_directory: 食物目录缓存文件所在目录，默认使用系统临时目录
+        :param weather: 天气缓存，默认以默认的 TTL 和客户端设置请求 OpenWeather
+        """
+        # 口味、种类偏好、语速和当前状态
+        self.state = state if state is not None else SessionState()
+        # 列式食物目录（只读映射的缓存文件）及其位图索引，各会话视图和同一进程内的机器人共享
+        self.catalogue = self.load_catalogue(cache_directory)
+        self.food_index = FoodIndex(self.catalogue)
+        # 食堂列表及其别名表，各会话视图共享
+        self.canteens = self.load_canteen_data()
+        self.canteen_table = AliasTable([canteen["prob"] for canteen in self.canteens]) if self.canteens else None
+        # 天气缓存，各会话视图共享
+        self.weather = weather if weather is not None else WeatherCache(WeatherClient().fetch)
+        
+        # 音乐播放相关属性
+        self.music_directory = self.resource_path("resources/music")
+        self.music_files = self.load_music_files()
+        self.player = PlayerState()
         self.music_lock = threading.Lock()
 
-        # 初始化 pygame mixer
-        pygame.mixer.init()
+    def for_session(self, state: SessionState) -> "Robot":
+        """
+        返回绑定到指定会话状态的机器人视图。
+        食物列表、音乐列表和播放状态与原对象共享，只有会话状态独立。
+
+        :param state: 会话状态
+        :return: 新的机器人视图
+        """
+        view = copy.copy(self)
+        view.state = state
+        return view
 
     def resource_path(self, relative_path):
         """
@@ -61,33 +122,34 @@ class Robot:
         
         return os.path.join(base_path, relative_path)
 
-    def load_food_data(self) -> List[Dict]:
-        """加载食物数据"""
-        food_list = []
+    def load_catalogue(self, cache_directory: Optional[str] = None) -> FoodCatalogue:
+        """
+        加载列式食物目录，CSV 未变化时直接映射缓存文件，不再逐行解析。
+
+        :param cache_directory: 缓存文件所在目录
+        """
         csv_path = self.resource_path('resources/food_list.csv')  # 使用 resource_path 获取路径
         try:
-            with open(csv_path, encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                header = next(reader, None)  # 跳过表头
-                for row in reader:
-                    if len(row) < 3:
-                        continue  # 跳过不完整的行
-                    name = row[0].strip()
-                    kind = row[1].strip()
-                    flavors_raw = row[2].strip()
-                    # 首先按'/'分割，然后将每个部分拆分为单个字符
-                    flavors = [ch for s in flavors_raw.split('/') for ch in s] if flavors_raw else []
-                    food = {
-                        "name": name,
-                        "flavors": flavors,
-                        "kind": kind
-                    }
-                    food_list.append(food)
+            return load_catalogue(csv_path, cache_directory)
         except FileNotFoundError:
             print("错误：找不到 'resources/food_list.csv' 文件。")
         except Exception as e:
             print(f"加载食物数据时发生错误：{e}")
-        return food_list
+        return FoodCatalogue.from_records([])
+
+    def load_canteen_data(self) -> List[Dict]:
+        """加载食堂数据"""
+        try:
+            return load_canteens(self.resource_path('resources/canteen_list.csv'))
+        except FileNotFoundError:
+            print("错误：找不到 'resources/canteen_list.csv' 文件。")
+        except Exception as e:
+            print(f"加载食堂数据时发生错误：{e}")
+        return []
+
+    def load_food_data(self) -> List[Dict]:
+        """以字典列表的形式返回食物数据"""
+        return [self.catalogue.food(row) for row in range(len(self.catalogue))]
 
     def load_music_files(self) -> List[str]:
         """加载音乐文件列表"""
@@ -111,6 +173,7 @@ class Robot:
     def play_music_thread(self, song_path: str):
         """后台线程播放音乐"""
         try:
+            pygame = load_pygame()
             pygame.mixer.music.load(song_path)
             pygame.mixer.music.play()
             pygame.mixer.music.set_volume(1.0)  # 设置音量为最大
@@ -187,7 +250,7 @@ class Robot:
                     "音乐还没有开始播放呢。"
                 ])
 
-            pygame.mixer.music.stop()
+            load_pygame().mixer.music.stop()
             self.is_playing = False
             self.is_paused = False
             self.current_song = None
@@ -221,7 +284,7 @@ class Robot:
                     "音乐当前已暂停。"
                 ])
 
-            pygame.mixer.music.pause()
+            load_pygame().mixer.music.pause()
             self.is_paused = True
             return self.get_random_response([
                 "音乐已暂停。",
@@ -253,7 +316,7 @@ class Robot:
                     "音乐已经在播放了。"
                 ])
 
-            pygame.mixer.music.unpause()
+            load_pygame().mixer.music.unpause()
             self.is_paused = False
             return self.get_random_response([
                 "音乐已继续播放。",
@@ -286,7 +349,7 @@ class Robot:
                 ])
 
             # 停止当前音乐
-            pygame.mixer.music.stop()
+            load_pygame().mixer.music.stop()
             self.is_playing = False
             self.is_paused = False
 
@@ -389,18 +452,10 @@ class Robot:
     def recommend_canteen(self) -> str:
         """推荐食堂"""
         self.current_state = "食堂推荐"
-        canteens = [
-            {"name": "风味餐厅", "location": "综合食堂一楼", "prob": 1},
-            {"name": "学宜餐厅", "location": "综合食堂二楼", "prob": 1},
-            {"name": "民族餐厅", "location": "综合食堂四楼", "prob": 1},
-            {"name": "学苑风味餐厅", "location": "学生餐厅对面", "prob": 1},
-            {"name": "老食堂", "location": "学生餐厅一层", "prob": 1},
-            {"name": "清真餐厅", "location": "学生餐厅二层", "prob": 1},
-            {"name": "楼上楼餐厅", "location": "学生餐厅三层", "prob": 0.2},
-            {"name": "麦当劳", "location": "综合食堂对面", "prob": 0.1},
-            {"name": "金谷园饺子", "location": "学校东北角北侧", "prob": 0.1}
-        ]
-        canteen = self.random_canteen(canteens)
+        if not self.canteens:
+            return "抱歉，我暂时没有可以推荐的食堂。"
+        canteen = self.random_canteen()
+        self.last_recommendation = canteen['name']
 
         # 准备多个话语模板
         templates = [
@@ -414,22 +469,28 @@ class Robot:
         # 随机选择一个模板
         return random.choice(templates)
 
-    def random_canteen(self, canteens: List[Dict]) -> Dict:
-        """根据概率随机选择一个食堂"""
-        choices = []
-        for canteen in canteens:
-            choices.extend([canteen] * int(canteen["prob"] * 100))
-        return random.choice(choices)
+    def random_canteen(self, canteens: Optional[List[Dict]] = None) -> Dict:
+        """
+        按权重随机选择一个食堂，权重可以是任意非负实数。
+
+        :param canteens: 食堂列表，默认使用加载的列表；别名表按权重缓存，权重不变时不重新构建
+        """
+        if canteens is None:
+            canteens, table = self.canteens, self.canteen_table
+        else:
+            table = alias_table(tuple(canteen["prob"] for canteen in canteens))
+        return canteens[table.sample()]
 
     def recommend_food(self) -> str:
         """推荐美食"""
         self.current_state = "美食推荐"
-        filtered_food = self.filter_food()
+        rows = self.food_index.filter(self.flavor_pref, self.kind_pref)
 
-        if not filtered_food:
+        if not rows:
             return "你的口味太挑剔了，我暂时找不到合适的美食哦。你可以告诉我“随便”来重置偏好。"
 
-        recommendations = random.sample(filtered_food, min(3, len(filtered_food)))
+        recommendations = [self.catalogue.name(row) for row in random.sample(rows, min(3, len(rows)))]
+        self.last_recommendation = tuple(recommendations)
 
         # 准备多个推荐模板（去除换行符）
         templates = [
@@ -441,7 +502,7 @@ class Robot:
         ]
 
         # 构造推荐的食物列表字符串，按照“1 宫保鸡丁盖饭，2.清汤牛肉面，3.皮蛋瘦肉粥”格式
-        food_list = "，".join([f"{i + 1} {food['name']}" for i, food in enumerate(recommendations)])
+        food_list = "，".join([f"{i + 1} {name}" for i, name in enumerate(recommendations)])
 
         # 随机选择一个模板并填入食物列表
         response = random.choice(templates).format(food_list)
@@ -449,21 +510,8 @@ class Robot:
         return response
 
     def filter_food(self) -> List[Dict]:
-        """根据用户偏好过滤食物"""
-        filtered = self.food_list
-        # 过滤口味
-        for flavor, pref in self.flavor_pref.items():
-            if pref == "喜欢":
-                filtered = [f for f in filtered if flavor in f['flavors']]
-            elif pref == "不喜欢":
-                filtered = [f for f in filtered if flavor not in f['flavors']]
-        # 过滤种类
-        for kind, pref in self.kind_pref.items():
-            if pref == "喜欢":
-                filtered = [f for f in filtered if f['kind'] == kind]
-            elif pref == "不喜欢":
-                filtered = [f for f in filtered if f['kind'] != kind]
-        return filtered
+        """根据用户偏好过滤食物，返回字典列表"""
+        return [self.catalogue.food(row) for row in self.food_index.filter(self.flavor_pref, self.kind_pref)]
 
     def set_flavor_preference(self, preference: str, flavor: Optional[str] = None) -> str:
         """设置口味偏好"""
@@ -621,86 +669,85 @@ class Robot:
     def query_weather(self) -> str:
         """查询北京天气信息"""
         self.current_state = "默认状态"
-        # OpenWeather API URL
-        url = f"http://api.openweathermap.org/data/2.5/weather?q=BEIJING&appid=5af7f8db2727027fdb8abe6510b4203e&units=metric&lang=zh_cn"
 
         try:
-            # 发送请求
-            response = requests.get(url)
-
-            # 如果请求成功，处理返回的数据
-            if response.status_code == 200:
-                data = response.json()
-
-                # 提取天气信息
-                temperature = round(data['main']['temp'], 1)  # 保留一位小数
-                weather_description = data['weather'][0]['description']
-                humidity = data['main']['humidity']
-                wind_speed = data['wind']['speed']
-                pressure = data['main']['pressure']
-                temp_min = round(data['main']['temp_min'], 1)
-                temp_max = round(data['main']['temp_max'], 1)
-
-                # 根据温度范围给出着装建议
-                def get_clothing_advice(temp: float) -> str:
-                    if temp < 5:
-                        return "要穿厚厚的羽绒服哦"
-                    elif temp < 12:
-                        return "适合穿外套加毛衣"
-                    elif temp < 18:
-                        return "可以穿薄外套"
-                    elif temp < 25:
-                        return "穿件衬衫就很舒适"
-                    else:
-                        return "可以穿清凉的夏装"
-
-                clothing_advice = get_clothing_advice(temperature)
-
-                # 定义多个天气回复模板
-                weather_templates = [
-                    # 基础天气信息
-                    f"北京现在{temperature}°C，{weather_description}，{clothing_advice}。",
-                    
-                    # 详细天气信息
-                    f"北京天气实况：气温{temperature}°C，{weather_description}。空气湿度{humidity}%，风速{wind_speed}米/秒。{clothing_advice}！",
-                    
-                    # 简洁版本
-                    f"北京现在{weather_description}，气温{temperature}°C哦～",
-                    
-                    # 关心版本
-                    f"亲，北京现在{temperature}°C，{weather_description}呢。{clothing_advice}～",
-                    
-                    # 温馨提示版本
-                    f"北京天气：{temperature}°C，{weather_description}。温馨提示：{clothing_advice}。",
-                    
-                    # 预测版本
-                    f"北京目前{temperature}°C，{weather_description}。{clothing_advice}。"
-                ]
-
-                # 根据天气状况添加特殊提醒
-                if "雨" in weather_description:
-                    weather_templates.extend([
-                        f"北京正在下雨，气温{temperature}°C。记得带伞出门哦！",
-                        f"外面在下雨呢，气温{temperature}°C。出门记得带伞～"
-                    ])
-                elif "雪" in weather_description:
-                    weather_templates.extend([
-                        f"北京正在下雪，气温{temperature}°C。注意保暖，小心路滑！",
-                        f"外面下雪啦！气温{temperature}°C，注意保暖哦～"
-                    ])
-                elif temperature > 30:
-                    weather_templates.extend([
-                        f"北京现在气温{temperature}°C，{weather_description}。天气炎热，记得防晒降温哦！",
-                        f"今天太热啦！气温已经{temperature}°C了，记得多喝水～"
-                    ])
-                elif temperature < 5:
-                    weather_templates.extend([
-                        f"北京气温{temperature}°C，{weather_description}。天气寒冷，要注意保暖哦！",
-                        f"今天真冷！气温只有{temperature}°C，要穿得暖暖的～"
-                    ])
-
-                return random.choice(weather_templates)
+            # 读取共享的天气缓存，数据过期时先返回旧数据并在后台刷新
+            data = self.weather.get()
+
+            # 提取天气信息
+            temperature = round(data['main']['temp'], 1)  # 保留一位小数
+            weather_description = data['weather'][0]['description']
+            humidity = data['main']['humidity']
+            wind_speed = data['wind']['speed']
+            pressure = data['main']['pressure']
+            temp_min = round(data['main']['temp_min'], 1)
+            temp_max = round(data['main']['temp_max'], 1)
+
+            # 根据温度范围给出着装建议
+            def get_clothing_advice(temp: float) -> str:
+                if temp < 5:
+                    return "要穿厚厚的羽绒服哦"
+                elif temp < 12:
+                    return "适合穿外套加毛衣"
+                elif temp < 18:
+                    return "可以穿薄外套"
+                elif temp < 25:
+                    return "穿件衬衫就很舒适"
+                else:
+                    return "可以穿清凉的夏装"
+
+            clothing_advice = get_clothing_advice(temperature)
+
+            # 定义多个天气回复模板
+            weather_templates = [
+                # 基础天气信息
+                f"北京现在{temperature}°C，{weather_description}，{clothing_advice}。",
                 
+                # 详细天气信息
+                f"北京天气实况：气温{temperature}°C，{weather_description}。空气湿度{humidity}%，风速{wind_speed}米/秒。{clothing_advice}！",
+                
+                # 简洁版本
+                f"北京现在{weather_description}，气温{temperature}°C哦～",
+                
+                # 关心版本
+                f"亲，北京现在{temperature}°C，{weather_description}呢。{clothing_advice}～",
+                
+                # 温馨提示版本
+                f"北京天气：{temperature}°C，{weather_description}。温馨提示：{clothing_advice}。",
+                
+                # 预测版本
+                f"北京目前{temperature}°C，{weather_description}。{clothing_advice}。"
+            ]
+
+            # 根据天气状况添加特殊提醒
+            if "雨" in weather_description:
+                weather_templates.extend([
+                    f"北京正在下雨，气温{temperature}°C。记得带伞出门哦！",
+                    f"外面在下雨呢，气温{temperature}°C。出门记得带伞～"
+                ])
+            elif "雪" in weather_description:
+                weather_templates.extend([
+                    f"北京正在下雪，气温{temperature}°C。注意保暖，小心路滑！",
+                    f"外面下雪啦！气温{temperature}°C，注意保暖哦～"
+                ])
+            elif temperature > 30:
+                weather_templates.extend([
+                    f"北京现在气温{temperature}°C，{weather_description}。天气炎热，记得防晒降温哦！",
+                    f"今天太热啦！气温已经{temperature}°C了，记得多喝水～"
+                ])
+            elif temperature < 5:
+                weather_templates.extend([
+                    f"北京气温{temperature}°C，{weather_description}。天气寒冷，要注意保暖哦！",
+                    f"今天真冷！气温只有{temperature}°C，要穿得暖暖的～"
+                ])
+
+            return random.choice(weather_templates)
+
+        except CircuitOpenError:
+            # 上游持续故障，熔断期间不再等待请求
+            return "天气服务暂时不可用，请稍后再查询哦～"
+
+        except WeatherError:
             # 如果请求失败，返回随机的错误提示
             error_messages = [
                 "抱歉，天气信息暂时获取不到，要不待会再试试看？",
@@ -710,7 +757,7 @@ class Robot:
                 "sorry，天气数据出了点小问题，晚点再来看看吧～"
             ]
             return random.choice(error_messages)
-            
+
         except Exception as e:
             return "抱歉，查询天气时出现了意外错误，请稍后重试。"
 
@@ -1,59 +1,188 @@
 # server.py
 
+import time
+
+# 记录模块开始导入的时间，用于启动耗时报告
+_IMPORT_STARTED = time.perf_counter()
+
+import sys
 import socket
 import threading
+import asyncio
 import json
 import os
 import datetime
 import logging
-from PyQt5.QtCore import QObject, pyqtSignal
+import itertools
+import argparse
+import signal
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 
 # 导入Robot和DSLParser
 from src.robot import Robot
+from src.weather import DEFAULT_WEATHER_URL, CircuitBreaker, WeatherCache, WeatherClient
+from src.session import SessionRegistry, ClientSession
+from src.framing import LineFramer, FrameTooLongError
+from src.chatlog import ChatLogWriter
+from src.metrics import ServerMetrics, MetricsHTTPServer
+from src.debug_logging import setup_debug_logging, dump_debug_ring
+from src import transport
 from dsl.parser import DSLParser
+from dsl.backend import LocalParseBackend, ProcessPoolParseBackend
+
+
+# 导入完成的时间，用于启动耗时报告
+_IMPORT_FINISHED = time.perf_counter()
+
+# 服务器本身不需要的图形界面与音频依赖，启动报告中检查它们是否被意外加载
+OPTIONAL_HEAVY_MODULES = ("PyQt5", "pygame", "pyttsx3")
 
 
-class Server(QObject):
+class Server:
     """
     服务器类，负责监听客户端连接，处理消息，并与机器人进行交互。
+    不依赖 Qt，可在无图形界面的环境中运行。
     """
-    # 定义一个信号，用于将接收到的消息发送到主线程
-    message_received = pyqtSignal(str)
-
-    def __init__(self, host: str = '127.0.0.1', port: int = 65432):
+    # 可选的连接处理引擎：每连接一线程，或基于 asyncio 的单线程事件循环
+    ENGINES = ("threaded", "asyncio")
+
+    # 可选的意图解析后端：当前进程内解析，或分发到进程池
+    PARSE_BACKENDS = ("local", "process")
+
+    # 停止时等待连接处理线程（或协程）处理完当前消息的最长秒数
+    SHUTDOWN_TIMEOUT = 5.0
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 65432,
+                 engine: str = "threaded", parse_workers: int = 4,
+                 backlog: int = 1024, max_sessions: int = 1024,
+                 session_idle_timeout: float = 1800.0,
+                 max_line_length: int = 8192, log_directory: str = "logs",
+                 log_fsync_policy: str = "shutdown",
+                 log_fsync_interval: float = 1.0,
+                 parse_backend: str = "local",
+                 parse_processes: Optional[int] = None,
+                 metrics_port: Optional[int] = None,
+                 metrics_host: str = '127.0.0.1',
+                 debug_level: int = logging.DEBUG,
+                 debug_sample_rate: float = 1.0,
+                 unix_path: Optional[str] = None,
+                 cache_directory: Optional[str] = None,
+                 warmup_timeout: float = 30.0,
+                 segmenter: str = "jieba",
+                 intent_cache_size: int = 1024,
+                 weather_ttl: float = 600.0,
+                 weather_stale_ttl: float = 3600.0,
+                 weather_url: str = DEFAULT_WEATHER_URL):
         """
         初始化服务器对象，设置主机和端口，初始化机器人和解析器，
         配置日志，并准备启动服务器线程。
         
         :param host: 服务器主机地址
         :param port: 服务器监听端口
+        :param engine: 连接处理引擎，"threaded" 或 "asyncio"
+        :param parse_workers: asyncio 引擎下用于执行解析的线程数
+        :param backlog: 监听套接字的连接等待队列长度
+        :param max_sessions: 最多同时保持的连接（会话）数量，超出时新连接收到提示后被断开
+        :param session_idle_timeout: 连接超过该秒数没有发送消息时被断开
+        :param max_line_length: 单条消息允许的最大字节数，超出则断开连接
+        :param log_directory: 对话日志目录
+        :param log_fsync_policy: 对话日志的 fsync 策略，"batch"、"interval" 或 "shutdown"
+        :param log_fsync_interval: "interval" 策略下两次 fsync 的最小间隔（秒）
+        :param parse_backend: 意图解析后端，"local" 或 "process"
+        :param parse_processes: "process" 后端的工作进程数，默认为 CPU 核数
+        :param metrics_port: Prometheus 指标 HTTP 端口，None 表示不启用
+        :param metrics_host: 指标 HTTP 端点的监听地址
+        :param debug_level: 调试日志级别，低于该级别的日志在调用处即被丢弃
+        :param debug_sample_rate: 输出到终端的 DEBUG 日志比例（0~1）
+        :param unix_path: Unix 套接字路径，指定后不再监听 TCP；以 '@' 开头表示 Linux 抽象命名空间
+        :param cache_directory: jieba 词典与食物目录的缓存目录，默认使用系统临时目录
+        :param warmup_timeout: 消息等待解析器预热完成的最长时间（秒）
+        :param segmenter: 分词器，"jieba" 或基于领域词典的 "trie"（不加载 jieba）
+        :param intent_cache_size: 意图缓存条目数，各会话共享，0 表示不缓存
+        :param weather_ttl: 天气数据保持新鲜的秒数
+        :param weather_stale_ttl: 天气数据过期后仍先返回旧数据、在后台刷新的秒数
+        :param weather_url: 天气接口地址，测试时可指向本地替身
         """
-    def __init__(self, host: str = '127.0.0.1', port: int = 65432):
-        """
-        初始化服务器对象，设置主机和端口，初始化机器人和解析器，
-        配置日志，并准备启动服务器线程。
-        
-        :param host: 服务器主机地址
-        :param port: 服务器监听端口
-        """
-        super().__init__()
+        if engine not in self.ENGINES:
+            raise ValueError(f"未知的服务器引擎: {engine}，可选值为 {self.ENGINES}")
+        if parse_backend not in self.PARSE_BACKENDS:
+            raise ValueError(f"未知的解析后端: {parse_backend}，可选值为 {self.PARSE_BACKENDS}")
         self.host = host
         self.port = port
+        self.unix_path = unix_path
+        self.unix_address = transport.unix_address(unix_path) if unix_path else None
+        self.engine = engine
+        self.parse_workers = parse_workers
+        self.backlog = backlog
+        self.session_idle_timeout = session_idle_timeout
+        self.max_line_length = max_line_length
         self.is_running = False  # 标志位，指示服务器是否正在运行
-        self.server_thread = threading.Thread(target=self.start_server, daemon=True)
+        self.ready = threading.Event()  # 监听套接字就绪后置位
+        if engine == "asyncio":
+            target = self.start_async_server
+        else:
+            target = self.start_server
+        self.server_thread = threading.Thread(target=target, daemon=True)
+        # 线程引擎下仍在运行的连接处理线程及其套接字，stop 时断开连接并等待线程结束
+        self.client_threads: Dict[threading.Thread, socket.socket] = {}
+        self.client_threads_lock = threading.Lock()
+
+        # asyncio 引擎相关对象，在服务器线程中创建
+        self.loop = None
+        self.async_server = None
+        self.async_stop_event = None
+        self.async_writers = set()
+        self.async_handlers = set()
+        self.parse_executor = None
+
+        # 天气客户端与缓存由所有会话共享，每次 HTTP 请求的耗时与成败记入上游指标
+        self.weather_client = WeatherClient(
+            weather_url, on_request=lambda seconds, ok: self.metrics.observe_upstream("weather", seconds, ok))
+        self.weather = WeatherCache(self.weather_client.fetch, weather_ttl, weather_stale_ttl)
+
+        # 初始化机器人和DSL解析器，二者只保存共享的只读数据，
+        # 每个连接通过 open_session 获得绑定到自身会话状态的视图
+        self.robot = Robot(cache_directory=cache_directory, weather=self.weather)
+        self.parser = DSLParser(self.robot, segmenter, intent_cache_size)
+        self.sessions = SessionRegistry(max_sessions, session_idle_timeout)
+
+        # 指令与阶段延迟指标，可通过控制指令或 HTTP 端点读取
+        self.metrics = ServerMetrics()
+        self.metrics_server = None
+        if metrics_port is not None:
+            self.metrics_server = MetricsHTTPServer(
+                metrics_host, metrics_port, self.render_prometheus, self.collect_stats)
+
+        # 意图解析后端；命令执行始终在本进程中针对会话状态进行
+        if parse_backend == "process":
+            self.parse_backend = ProcessPoolParseBackend(
+                parse_processes, cache_directory, segmenter, intent_cache_size)
+        else:
+            self.parse_backend = LocalParseBackend(self.parser, cache_directory)
+
+        # 解析器在 start 时于后台预热，消息处理前等待预热完成
+        self.warmup_timeout = warmup_timeout
+        self.parser_warm = threading.Event()
+        self.warmup_seconds = None
+        self.warmup_thread = threading.Thread(target=self.warm_up_parser, daemon=True)
+        self.session_ids = itertools.count(1)
 
-        # 初始化机器人和DSL解析器
-        self.robot = Robot()
-        self.parser = DSLParser(self.robot)
+        # 配置调试日志（终端输出）
+        self.debug_level = debug_level
+        self.debug_sample_rate = debug_sample_rate
+        self.setup_debug_logging()
 
-        # 设置日志相关
-        self.log_directory = "logs"
+        # 设置日志相关，对话日志由后台线程批量写入
+        self.log_directory = log_directory
         self.log_file_path = os.path.join(self.log_directory, "chat.log")
-        self.log_lock = threading.Lock()  # 日志文件访问锁
         self.ensure_log_directory()
+        self.chat_log = ChatLogWriter(
+            self.log_file_path,
+            fsync_policy=log_fsync_policy,
+            fsync_interval=log_fsync_interval
+        )
 
-        # 配置调试日志（终端输出）
-        self.setup_debug_logging()
     def ensure_log_directory(self):
         """
         确保日志目录存在，如果不存在则创建。
@@ -64,24 +193,13 @@ class Server(QObject):
 
     def setup_debug_logging(self):
         """
-        配置调试日志，仅输出到终端。
+        配置调试日志（终端输出 + 内存环形缓冲区）。
+        处理器在进程内只添加一次，重复创建 Server 不会导致日志重复输出。
         """
-        self.debug_logger = logging.getLogger("ServerDebugLogger")
-        self.debug_logger.setLevel(logging.DEBUG)  # 设置最低日志级别
-
-        # 创建控制台日志处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.DEBUG)
-
-        # 定义日志输出格式
-        formatter = logging.Formatter(
-            fmt='[%(levelname)s] %(asctime)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
+        self.debug_logger = setup_debug_logging(
+            level=self.debug_level,
+            sample_rate=self.debug_sample_rate
         )
-        console_handler.setFormatter(formatter)
-
-        # 添加处理器到记录器
-        self.debug_logger.addHandler(console_handler)
 
     def log_message(self, speaker: str, message: str):
         """
@@ -90,18 +208,20 @@ class Server(QObject):
         :param speaker: 消息发送者，如“机器人”或“用户”
         :param message: 消息内容
         """
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        log_entry = f"{speaker},{timestamp},{message}\n"
-        with self.log_lock:
-            with open(self.log_file_path, "a", encoding="utf-8") as log_file:
-                log_file.write(log_entry)
-        self.debug_logger.debug(f"已记录消息: {log_entry.strip()}")
+        self.chat_log.write(speaker, message)
+        self.debug_logger.debug("已记录消息: %s,%s", speaker, message)
 
     def start(self):
         """
         启动服务器线程，开始监听客户端连接。
         """
         self.is_running = True
+        self.chat_log.start()
+        self.warmup_thread.start()
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+            self.debug_logger.info(f"指标端点已启动: http://{self.metrics_server.address[0]}:"
+                                   f"{self.metrics_server.address[1]}/metrics")
         self.server_thread.start()
         self.debug_logger.info("服务器线程已启动。")
 
@@ -110,20 +230,32 @@ class Server(QObject):
         停止服务器，关闭监听套接字，并重命名日志文件以保存当前会话。
         """
         self.is_running = False
-        # 通过连接自身来中断服务器的 accept 阻塞
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as interrupt_socket:
-                interrupt_socket.connect((self.host, self.port))
-                interrupt_socket.close()
-                self.debug_logger.info("已发送中断信号以停止服务器。")
-        except Exception as e:
-            self.debug_logger.warning(f"发送中断信号时发生异常: {e}")
+        if self.engine == "asyncio":
+            # 通知事件循环关闭监听并断开所有连接
+            if self.loop is not None and self.async_stop_event is not None:
+                self.loop.call_soon_threadsafe(self.async_stop_event.set)
+                self.debug_logger.info("已通知事件循环停止服务器。")
+        else:
+            # 通过连接自身来中断服务器的 accept 阻塞
+            try:
+                with transport.connect(self.host, self.port, self.unix_path, timeout=1):
+                    self.debug_logger.info("已发送中断信号以停止服务器。")
+            except Exception as e:
+                self.debug_logger.warning(f"发送中断信号时发生异常: {e}")
 
-        # 等待服务器线程结束
-        self.server_thread.join(timeout=1)
+        # 等待服务器线程结束；asyncio 引擎的服务器线程会先等待全部连接处理协程结束
+        self.server_thread.join(timeout=self.SHUTDOWN_TIMEOUT + 1)
         self.debug_logger.info("服务器线程已停止。")
+        # 断开仍在处理的连接并等待处理线程结束，它们在退出前写入的对话日志不会丢失
+        self.close_client_threads()
+
+        self.parse_backend.shutdown()
+        self.weather_client.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
 
-        # 重命名日志文件
+        # 写完队列中剩余的对话日志后再重命名日志文件
+        self.chat_log.close()
         if os.path.exists(self.log_file_path):
             timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
             new_log_file = os.path.join(self.log_directory, f"{timestamp}.log")
@@ -133,26 +265,45 @@ class Server(QObject):
             except Exception as e:
                 self.debug_logger.error(f"重命名日志文件时发生错误: {e}")
 
+    def close_client_threads(self):
+        """
+        线程引擎：关闭全部客户端连接的读写，使阻塞在 recv 上的处理线程退出，
+        正在处理消息的线程处理完当前消息后退出；最多等待 SHUTDOWN_TIMEOUT 秒。
+        """
+        with self.client_threads_lock:
+            clients = list(self.client_threads.items())
+        for _, connection in clients:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        deadline = time.monotonic() + self.SHUTDOWN_TIMEOUT
+        for thread, _ in clients:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
     def start_server(self):
         """
         服务器主循环，监听并接受客户端连接。
         为每个客户端连接启动一个新的处理线程。
         """
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
-            # 允许地址重用
-            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            server_socket.bind((self.host, self.port))
-            server_socket.listen()
-            self.debug_logger.info(f"服务器已启动，监听 {self.host}:{self.port}")
+        with self.create_listen_socket() as server_socket:
+            self.ready.set()
+            self.debug_logger.info(f"服务器已启动，监听 {self.describe_address()}")
             while self.is_running:
                 try:
                     connection, address = server_socket.accept()
-                    self.debug_logger.info(f"接收到来自 {address} 的连接请求。")
+                    if not self.is_running:
+                        # stop() 发来的中断连接，不作为客户端处理
+                        connection.close()
+                        break
+                    self.debug_logger.info("接收到来自 %s 的连接请求。", address)
                     client_thread = threading.Thread(
                         target=self.handle_client, 
                         args=(connection, address), 
                         daemon=True
                     )
+                    with self.client_threads_lock:
+                        self.client_threads[client_thread] = connection
                     client_thread.start()
                 except socket.error as e:
                     if self.is_running:
@@ -161,6 +312,273 @@ class Server(QObject):
                 except Exception as e:
                     self.debug_logger.error(f"服务器主循环中发生异常: {e}")
                     break
+        self.remove_unix_socket()
+
+    def warm_up_parser(self):
+        """
+        在后台线程中预热解析后端（加载 jieba 词典、启动工作进程），
+        完成或失败后都会放行等待中的消息。
+        """
+        try:
+            self.warmup_seconds = self.parse_backend.warmup()
+            self.debug_logger.info(f"解析器预热完成，耗时 {self.warmup_seconds * 1000:.0f} ms")
+        except Exception as e:
+            self.debug_logger.error(f"解析器预热失败: {e}")
+        finally:
+            self.parser_warm.set()
+
+    def rebuild_lexicons(self):
+        """
+        修改解析器词典后调用：重建本进程的词典并清空意图缓存；
+        进程池后端用新词典启动一组工作进程，就绪后替换原进程池。
+        """
+        self.parser.rebuild_lexicons()
+        self.parse_backend.rebuild_lexicons(self.parser.export_lexicons())
+
+    def create_listen_socket(self) -> socket.socket:
+        """
+        创建并绑定监听套接字：配置了 unix_path 时使用 AF_UNIX，否则使用 TCP。
+
+        :return: 已开始监听的套接字
+        """
+        if self.unix_address is not None:
+            transport.remove_stale_socket(self.unix_address)
+            server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server_socket.bind(self.unix_address)
+        else:
+            server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # 允许地址重用
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server_socket.bind((self.host, self.port))
+            # 端口为 0 时由系统分配，记录实际端口
+            self.port = server_socket.getsockname()[1]
+        server_socket.listen(self.backlog)
+        return server_socket
+
+    def remove_unix_socket(self):
+        """
+        删除服务器创建的 Unix 套接字文件；抽象命名空间地址随套接字关闭自动释放。
+        """
+        if self.unix_address is None or transport.is_abstract(self.unix_address):
+            return
+        try:
+            os.unlink(self.unix_address)
+        except FileNotFoundError:
+            pass
+
+    def describe_address(self) -> str:
+        """
+        返回监听地址的描述，用于日志输出。
+        """
+        return transport.describe(self.host, self.port, self.unix_path)
+
+    def open_session(self) -> ClientSession:
+        """
+        为新连接分配会话 ID，并创建绑定到该会话状态的机器人与解析器视图。
+
+        :return: 会话视图；会话数已达 max_sessions 时返回 None
+        """
+        session_id = next(self.session_ids)
+        # 连接打开期间固定会话，偏好设置不会被淘汰；空闲过久的连接由连接处理逻辑断开
+        state = self.sessions.pin(session_id)
+        if state is None:
+            return None
+        robot = self.robot.for_session(state)
+        parser = self.parser.for_robot(robot)
+        return ClientSession(session_id, robot, parser)
+
+    def close_session(self, session: ClientSession):
+        """连接关闭时释放会话状态"""
+        self.sessions.release(session.session_id)
+
+    def touch_session(self, session: ClientSession):
+        """刷新会话的使用时间"""
+        self.sessions.acquire(session.session_id)
+
+    def wait_for_parser(self):
+        """
+        等待后台预热完成（最多 warmup_timeout 秒），欢迎语和消息都不与预热争抢分词器的初始化。
+        """
+        if not self.parser_warm.is_set():
+            self.parser_warm.wait(self.warmup_timeout)
+
+    def generate_welcome(self, session: ClientSession) -> str:
+        """
+        执行“欢迎”指令并记录机器人回复，返回发送给客户端的 JSON 响应行。
+
+        :param session: 当前连接的会话视图
+        :return: 以换行符结尾的 JSON 响应字符串
+        """
+        self.wait_for_parser()
+        welcome_command = "打招呼"
+        # 与普通消息一样经由解析后端解析，process 后端下服务器进程无需加载分词器
+        trace = {}
+        try:
+            welcome_reply = session.parser.parse_command(welcome_command, self.parse_backend.resolve, trace)
+            if not welcome_reply:
+                welcome_reply = "抱歉，我无法理解您的指令。"
+            self.debug_logger.debug("执行欢迎指令，回复: %s", welcome_reply)
+        except Exception as e:
+            welcome_reply = "抱歉，处理欢迎指令时发生错误。"
+            self.debug_logger.error(f"处理欢迎指令时发生异常: {e}")
+
+        # 欢迎语不计入指令与解析路径统计，只记录各阶段耗时
+        if 'stages' in trace:
+            self.metrics.observe_stages(trace['stages'])
+
+        # 记录机器人回复（不记录用户发送的欢迎指令）
+        self.log_message("机器人", welcome_reply)
+        return self.build_response(welcome_reply, session)
+
+    def generate_reply(self, message: str, session: ClientSession) -> str:
+        """
+        记录用户消息，解析指令并记录机器人回复，返回 JSON 响应行。
+
+        :param message: 客户端发送的一条消息（不含换行符）
+        :param session: 当前连接的会话视图
+        :return: 以换行符结尾的 JSON 响应字符串
+        """
+        # 控制指令（如 {"control": "stats"}）不经过解析器，也不写入对话日志
+        if message.startswith('{'):
+            control_response = self.handle_control(message)
+            if control_response is not None:
+                return control_response
+
+        self.wait_for_parser()
+        started = time.perf_counter()
+        self.touch_session(session)
+
+        # 记录用户消息
+        self.log_message("用户", message)
+        logged = time.perf_counter()
+
+        # 使用DSLParser解析指令并生成机器人回复
+        trace = {}
+        try:
+            reply = session.parser.parse_command(message, self.parse_backend.resolve, trace)
+            self.debug_logger.debug("解析指令 '%s' 得到回复: %s", message, reply)
+        except Exception as e:
+            reply = "抱歉，处理您的指令时发生错误。"
+            self.debug_logger.error(f"解析指令时发生异常: {e}")
+
+        response_str = self.build_response(reply, session)
+
+        # 记录机器人回复
+        replied = time.perf_counter()
+        self.log_message("机器人", reply)
+        finished = time.perf_counter()
+
+        # parse_command 仅在成功时填写 trace，否则计为一次错误
+        if 'stages' in trace:
+            stages = trace['stages']
+            command_label = trace['command'] or "未识别"
+            self.metrics.observe_parse(trace['path'], trace['computed'])
+        else:
+            stages = {}
+            command_label = "错误"
+            self.metrics.record_error()
+        stages['logging'] = (logged - started) + (finished - replied)
+        self.metrics.observe_stages(stages)
+        self.metrics.observe_command(command_label, finished - started)
+        return response_str
+
+    def handle_control(self, message: str) -> Optional[str]:
+        """
+        处理 JSON 格式的控制指令。
+
+        :param message: 以 '{' 开头的消息
+        :return: JSON 响应行；消息不是控制指令时返回 None，按普通文本处理
+        """
+        try:
+            request = json.loads(message)
+        except ValueError:
+            return None
+        if not isinstance(request, dict) or "control" not in request:
+            return None
+
+        if request["control"] == "stats":
+            response = {"stats": self.collect_stats()}
+        elif request["control"] == "debug_dump":
+            response = {"debug_log": dump_debug_ring()}
+        else:
+            response = {"error": f"未知的控制指令: {request['control']}"}
+        return json.dumps(response, ensure_ascii=False) + '\n'
+
+    def collect_stats(self) -> Dict:
+        """汇总指令/阶段延迟、会话、解析后端、天气缓存与客户端和对话日志的统计信息"""
+        return {
+            "engine": self.engine,
+            "metrics": self.metrics.snapshot(),
+            "sessions": self.sessions.stats(),
+            "parse_backend": self.parse_backend.stats(),
+            "parser_warmup_s": self.warmup_seconds,
+            "segmenter": self.parser.segmenter,
+            "weather": {"cache": self.weather.stats(), "client": self.weather_client.stats()},
+            "chat_log": {
+                "batches": self.chat_log.batches_written,
+                "entries": self.chat_log.entries_written,
+            },
+        }
+
+    def render_prometheus(self) -> str:
+        """以 Prometheus 文本格式输出指标，附带会话数、解析队列深度、意图缓存、天气缓存与熔断器状态"""
+        sessions = self.sessions.stats()
+        gauges = {
+            "sessions": sessions["sessions"],
+            "session_evictions": sessions["evictions"],
+            "parse_queue_depth": self.parse_backend.queue_depth(),
+            "chat_log_batches": self.chat_log.batches_written,
+        }
+        intent_cache = self.parse_backend.stats().get("intent_cache")
+        if intent_cache is not None:
+            for name in ("size", "hits", "misses", "evictions", "invalidations"):
+                gauges[f"intent_cache_{name}"] = intent_cache[name]
+        for name, value in self.weather.stats().items():
+            gauges[f"weather_cache_{name}"] = value
+        breaker = self.weather_client.breaker.stats()
+        # 0 关闭、1 半开、2 打开
+        gauges["weather_breaker_state"] = CircuitBreaker.STATES.index(breaker["state"])
+        gauges["weather_breaker_opened"] = breaker["times_opened"]
+        return self.metrics.render_prometheus(gauges)
+
+    def build_response(self, reply: str, session: ClientSession) -> str:
+        """
+        根据机器人回复与会话的当前状态、语速构建 JSON 响应。
+
+        :param reply: 机器人回复文本
+        :param session: 当前连接的会话视图
+        :return: 以换行符结尾的 JSON 响应字符串
+        """
+        # 获取当前机器人状态与语速
+        current_state = session.robot.current_state
+        state_message = f"{current_state}"
+        current_speed = session.robot.speed
+        self.debug_logger.debug("当前机器人状态: %s，语速设置: %s", state_message, current_speed)
+
+        response = {
+            "reply": reply,
+            "state": state_message,
+            "speed": current_speed  # 新增语速字段
+        }
+        response_str = json.dumps(response, ensure_ascii=False) + '\n'  # 添加换行符作为分隔符
+        self.debug_logger.debug("构建响应: %s", response_str[:-1])
+        return response_str
+
+    def build_overflow_response(self, session: ClientSession) -> str:
+        """构建消息过长、即将断开连接时的 JSON 响应"""
+        reply = f"抱歉，您的消息过长（超过 {self.max_line_length} 字节），连接将被断开。"
+        return self.build_response(reply, session)
+
+    def build_busy_response(self) -> str:
+        """构建会话数已达上限、即将断开连接时的 JSON 响应，状态与语速取默认值"""
+        reply = f"抱歉，当前连接数已达上限（{self.sessions.max_sessions}），请稍后再试。"
+        response = {"reply": reply, "state": self.robot.current_state, "speed": self.robot.speed}
+        return json.dumps(response, ensure_ascii=False) + '\n'
+
+    def build_idle_response(self, session: ClientSession) -> str:
+        """构建连接空闲超时、即将断开连接时的 JSON 响应"""
+        reply = f"您已超过 {self.session_idle_timeout:g} 秒没有发送消息，连接将被断开。"
+        return self.build_response(reply, session)
 
     def handle_client(self, connection: socket.socket, address):
         """
@@ -169,125 +587,319 @@ class Server(QObject):
         :param connection: 客户端的套接字连接
         :param address: 客户端的地址
         """
-        self.debug_logger.info(f"开始处理来自 {address} 的客户端连接。")
+        self.debug_logger.info("开始处理来自 %s 的客户端连接。", address)
+        try:
+            self.serve_connection(connection, address)
+        finally:
+            with self.client_threads_lock:
+                self.client_threads.pop(threading.current_thread(), None)
+
+    def serve_connection(self, connection: socket.socket, address):
+        """
+        handle_client 的主体：分配会话，发送欢迎语，然后逐条回复消息直到连接关闭。
+
+        :param connection: 客户端的套接字连接
+        :param address: 客户端的地址
+        """
+        session = self.open_session()
+        if session is None:
+            self.debug_logger.warning("会话数已达上限，拒绝来自 %s 的连接。", address)
+            with connection:
+                try:
+                    connection.sendall(self.build_busy_response().encode('utf-8'))
+                except socket.error:
+                    pass
+            return
+        # 先释放会话再关闭套接字，客户端看到连接断开时会话名额已经空出
         with connection:
-            # 自动发送“欢迎”指令
-            welcome_command = "打招呼"
-            try:
-                welcome_reply = self.parser.parse_command(welcome_command)
-                if not welcome_reply:
-                    welcome_reply = "抱歉，我无法理解您的指令。"
-                self.debug_logger.debug(f"执行欢迎指令，回复: {welcome_reply}")
-            except Exception as e:
-                welcome_reply = "抱歉，处理欢迎指令时发生错误。"
-                self.debug_logger.error(f"处理欢迎指令时发生异常: {e}")
-
-            # 记录机器人回复（不记录用户发送的欢迎指令）
-            self.log_message("机器人", welcome_reply)
-            self.debug_logger.debug(f"已记录机器人回复: {welcome_reply}")
-
-            # 获取当前机器人状态
-            current_state = self.robot.current_state
-            state_message = f"{current_state}"
-            self.debug_logger.debug(f"当前机器人状态: {state_message}")
-
-            # 获取当前语速
-            current_speed = self.robot.speed
-            self.debug_logger.debug(f"当前语速设置: {current_speed}")
-
-            # 构建JSON响应
-            response = {
-                "reply": welcome_reply,
-                "state": state_message,
-                "speed": current_speed  # 新增语速字段
-            }
-            response_str = json.dumps(response, ensure_ascii=False) + '\n'  # 添加换行符作为分隔符
-
-            # 发送欢迎消息给客户端
             try:
-                connection.sendall(response_str.encode('utf-8'))
-                self.debug_logger.info(f"已发送欢迎回复给 {address}: {response_str.strip()}")
-                # self.message_received.emit(welcome_reply)  # 移除这一行
-            except socket.error as e:
-                self.debug_logger.error(f"发送欢迎消息时发生错误: {e}")
-                return
+                # 超过空闲时间没有收到数据时 recv 抛出 socket.timeout
+                connection.settimeout(self.session_idle_timeout)
+                # 自动发送“欢迎”指令
+                response_str = self.generate_welcome(session)
 
-            while self.is_running:
+                # 发送欢迎消息给客户端
                 try:
-                    data = connection.recv(4096)  # 增加接收缓冲区大小
-                    if not data:
-                        self.debug_logger.info(f"连接关闭来自 {address}")
-                        break
-                    messages = data.decode('utf-8').split('\n')
-                    for message in messages:
-                        if not message.strip():
-                            continue
-                        self.debug_logger.info(f"收到来自 {address} 的消息: {message}")
-
-                        if message:
-                            # 记录用户消息
-                            self.log_message("用户", message)
-                            self.debug_logger.debug(f"已记录用户消息: {message}")
-
-                            # 使用DSLParser解析指令并生成机器人回复
-                            try:
-                                reply = self.parser.parse_command(message)
-                                self.debug_logger.debug(f"解析指令 '{message}' 得到回复: {reply}")
-                            except Exception as e:
-                                reply = "抱歉，处理您的指令时发生错误。"
-                                self.debug_logger.error(f"解析指令时发生异常: {e}")
-
-                            # 获取当前机器人状态
-                            current_state = self.robot.current_state
-                            state_message = f"{current_state}"
-                            self.debug_logger.debug(f"当前机器人状态: {state_message}")
-
-                            # 获取当前语速
-                            current_speed = self.robot.speed
-                            self.debug_logger.debug(f"当前语速设置: {current_speed}")
-
-                            # 构建JSON响应
-                            response = {
-                                "reply": reply,
-                                "state": state_message,
-                                "speed": current_speed  # 新增语速字段
-                            }
-                            response_str = json.dumps(response, ensure_ascii=False) + '\n'  # 添加换行符作为分隔符
-                            self.debug_logger.debug(f"构建响应: {response_str.strip()}")
-
-                            # 发送JSON响应给客户端
-                            try:
-                                connection.sendall(response_str.encode('utf-8'))
-                                self.debug_logger.info(f"已发送回复给 {address}: {response_str.strip()}")
-                                # self.message_received.emit(reply)  # 移除这一行
-                            except socket.error as e:
-                                self.debug_logger.error(f"发送回复时发生错误: {e}")
-                                break
-
-                            # 记录机器人回复
-                            self.log_message("机器人", reply)
-                            self.debug_logger.debug(f"已记录机器人回复: {reply}")
+                    connection.sendall(response_str.encode('utf-8'))
+                    self.debug_logger.debug("已发送欢迎回复给 %s: %s", address, response_str[:-1])
                 except socket.error as e:
-                    self.debug_logger.error(f"与 {address} 的连接发生错误: {e}")
-                    break
-                except Exception as e:
-                    self.debug_logger.error(f"处理来自 {address} 的消息时发生异常: {e}")
-                    break
+                    self.debug_logger.error(f"发送欢迎消息时发生错误: {e}")
+                    return
+
+                framer = LineFramer(self.max_line_length)
+                while self.is_running:
+                    try:
+                        data = connection.recv(4096)  # 增加接收缓冲区大小
+                        if not data:
+                            self.debug_logger.info("连接关闭来自 %s", address)
+                            break
+                        # 一次接收中可能包含多条流水线指令，统一处理后一次发送
+                        framing_started = time.perf_counter()
+                        messages = framer.feed(data)
+                        self.metrics.observe_stage("framing", time.perf_counter() - framing_started)
+                        responses = []
+                        for message in messages:
+                            self.debug_logger.debug("收到来自 %s 的消息: %s", address, message)
+                            responses.append(self.generate_reply(message, session))
+                        if not responses:
+                            continue
 
+                        # 发送JSON响应给客户端
+                        try:
+                            send_started = time.perf_counter()
+                            connection.sendall(''.join(responses).encode('utf-8'))
+                            self.metrics.observe_stage("send", time.perf_counter() - send_started)
+                            self.debug_logger.debug("已发送 %d 条回复给 %s", len(responses), address)
+                        except socket.error as e:
+                            self.debug_logger.error(f"发送回复时发生错误: {e}")
+                            break
+                    except FrameTooLongError as e:
+                        self.debug_logger.warning(f"来自 {address} 的消息过长，断开连接: {e}")
+                        try:
+                            connection.sendall(self.build_overflow_response(session).encode('utf-8'))
+                        except socket.error:
+                            pass
+                        break
+                    except socket.timeout:
+                        self.debug_logger.info("来自 %s 的连接空闲超时，断开连接。", address)
+                        try:
+                            connection.sendall(self.build_idle_response(session).encode('utf-8'))
+                        except socket.error:
+                            pass
+                        break
+                    except socket.error as e:
+                        self.debug_logger.error(f"与 {address} 的连接发生错误: {e}")
+                        break
+                    except Exception as e:
+                        self.debug_logger.error(f"处理来自 {address} 的消息时发生异常: {e}")
+                        break
+            finally:
+                self.close_session(session)
 
-if __name__ == "__main__":
-    import sys
-    from PyQt5.QtWidgets import QApplication
+    def start_async_server(self):
+        """
+        asyncio 引擎的服务器线程入口：创建独立的事件循环，
+        在单个线程中承载所有客户端连接，解析工作交给线程池执行。
+        """
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.parse_executor = ThreadPoolExecutor(
+            max_workers=self.parse_workers,
+            thread_name_prefix="ParserWorker"
+        )
+        try:
+            self.async_stop_event = asyncio.Event()
+            self.loop.run_until_complete(self.serve_async())
+        except Exception as e:
+            self.debug_logger.error(f"事件循环中发生异常: {e}")
+        finally:
+            self.parse_executor.shutdown(wait=False)
+            self.loop.close()
+            self.debug_logger.info("事件循环已关闭。")
+
+    async def serve_async(self):
+        """
+        启动 asyncio 监听，并在收到停止通知后关闭监听与全部连接。
+        """
+        # 与线程引擎共用同一套监听套接字的创建逻辑（TCP 或 AF_UNIX）
+        server_socket = self.create_listen_socket()
+        if self.unix_address is not None:
+            self.async_server = await asyncio.start_unix_server(
+                self.handle_client_async, sock=server_socket, backlog=self.backlog)
+        else:
+            self.async_server = await asyncio.start_server(
+                self.handle_client_async, sock=server_socket, backlog=self.backlog)
+        self.ready.set()
+        self.debug_logger.info(f"服务器已启动（asyncio），监听 {self.describe_address()}")
+        # stop() 可能在事件循环启动前被调用
+        if not self.is_running:
+            self.async_stop_event.set()
+        async with self.async_server:
+            await self.async_stop_event.wait()
+            self.async_server.close()
+            for writer in list(self.async_writers):
+                writer.close()
+            # 等待连接处理协程写完对话日志后再返回，stop 之后才关闭对话日志
+            if self.async_handlers:
+                await asyncio.wait(list(self.async_handlers), timeout=self.SHUTDOWN_TIMEOUT)
+            await self.async_server.wait_closed()
+        self.remove_unix_socket()
+
+    async def run_in_parser(self, func, *args):
+        """
+        在解析线程池中执行阻塞的解析与日志工作，避免阻塞事件循环。
 
-    # 创建应用程序实例
-    app = QApplication(sys.argv)
+        :param func: 需要执行的可调用对象
+        :param args: 传递给 func 的参数
+        :return: func 的返回值
+        """
+        return await self.loop.run_in_executor(self.parse_executor, func, *args)
 
-    # 创建并启动服务器
-    server = Server(host='127.0.0.1', port=65432)
-    server.start()
+    async def handle_client_async(self, reader: asyncio.StreamReader,
+                                  writer: asyncio.StreamWriter):
+        """
+        asyncio 引擎下处理单个客户端连接，协议与 handle_client 相同：
+        每行一条 UTF-8 文本指令，每行一条 JSON 响应。
 
-    # 运行应用程序
+        :param reader: 连接的读取流
+        :param writer: 连接的写入流
+        """
+        address = writer.get_extra_info("peername")
+        self.debug_logger.info("开始处理来自 %s 的客户端连接（asyncio）。", address)
+        session = self.open_session()
+        if session is None:
+            self.debug_logger.warning("会话数已达上限，拒绝来自 %s 的连接。", address)
+            writer.write(self.build_busy_response().encode('utf-8'))
+            writer.close()
+            return
+        self.async_writers.add(writer)
+        self.async_handlers.add(asyncio.current_task())
+        try:
+            response_str = await self.run_in_parser(self.generate_welcome, session)
+            writer.write(response_str.encode('utf-8'))
+            await writer.drain()
+            self.debug_logger.debug("已发送欢迎回复给 %s: %s", address, response_str[:-1])
+
+            framer = LineFramer(self.max_line_length)
+            while self.is_running:
+                try:
+                    data = await asyncio.wait_for(reader.read(4096), self.session_idle_timeout)
+                except asyncio.TimeoutError:
+                    self.debug_logger.info("来自 %s 的连接空闲超时，断开连接。", address)
+                    writer.write(self.build_idle_response(session).encode('utf-8'))
+                    break
+                if not data:
+                    self.debug_logger.info("连接关闭来自 %s", address)
+                    break
+                framing_started = time.perf_counter()
+                messages = framer.feed(data)
+                self.metrics.observe_stage("framing", time.perf_counter() - framing_started)
+                for message in messages:
+                    self.debug_logger.debug("收到来自 %s 的消息: %s", address, message)
+                    response_str = await self.run_in_parser(self.generate_reply, message, session)
+                    writer.write(response_str.encode('utf-8'))
+                if messages:
+                    # 客户端读取过慢时在此等待，不再继续读取新的指令
+                    send_started = time.perf_counter()
+                    await writer.drain()
+                    self.metrics.observe_stage("send", time.perf_counter() - send_started)
+                    self.debug_logger.debug("已发送 %d 条回复给 %s", len(messages), address)
+        except FrameTooLongError as e:
+            self.debug_logger.warning(f"来自 {address} 的消息过长，断开连接: {e}")
+            writer.write(self.build_overflow_response(session).encode('utf-8'))
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            self.debug_logger.error(f"与 {address} 的连接发生错误: {e}")
+        except Exception as e:
+            self.debug_logger.error(f"处理来自 {address} 的消息时发生异常: {e}")
+        finally:
+            self.close_session(session)
+            self.async_writers.discard(writer)
+            self.async_handlers.discard(asyncio.current_task())
+            writer.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析无界面服务器的命令行参数"""
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m src.server",
+        description="邮小食无界面服务器"
+    )
+    arg_parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    arg_parser.add_argument("--port", type=int, default=65432, help="监听端口")
+    arg_parser.add_argument("--unix-socket", default=None,
+                            help="改为监听 Unix 套接字路径，'@名称' 表示 Linux 抽象命名空间")
+    arg_parser.add_argument("--engine", choices=Server.ENGINES, default="threaded",
+                            help="连接处理引擎")
+    arg_parser.add_argument("--workers", type=int, default=4,
+                            help="asyncio 引擎下的解析线程数")
+    arg_parser.add_argument("--parse-backend", choices=Server.PARSE_BACKENDS, default="local",
+                            help="意图解析后端")
+    arg_parser.add_argument("--parse-processes", type=int, default=None,
+                            help="process 解析后端的工作进程数，默认为 CPU 核数")
+    arg_parser.add_argument("--max-sessions", type=int, default=1024,
+                            help="最多同时保持的连接数，超出时新连接被拒绝")
+    arg_parser.add_argument("--session-idle-timeout", type=float, default=1800.0,
+                            help="连接超过该秒数没有发送消息时被断开")
+    arg_parser.add_argument("--log-dir", default="logs", help="对话日志目录")
+    arg_parser.add_argument("--segmenter", choices=DSLParser.SEGMENTERS, default="jieba",
+                            help="分词器，trie 使用领域词典、不加载 jieba")
+    arg_parser.add_argument("--intent-cache-size", type=int, default=1024,
+                            help="意图缓存条目数，0 表示不缓存")
+    arg_parser.add_argument("--cache-dir", default=None,
+                            help="jieba 词典与食物目录的缓存目录，默认使用系统临时目录")
+    arg_parser.add_argument("--weather-url", default=DEFAULT_WEATHER_URL,
+                            help="天气接口地址，默认使用 OpenWeather")
+    arg_parser.add_argument("--weather-ttl", type=float, default=600.0,
+                            help="天气数据缓存秒数")
+    arg_parser.add_argument("--weather-stale-ttl", type=float, default=3600.0,
+                            help="天气数据过期后仍先返回旧数据、在后台刷新的秒数")
+    arg_parser.add_argument("--metrics-port", type=int, default=None,
+                            help="Prometheus 指标 HTTP 端口，默认不启用")
+    arg_parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+                            default="INFO", help="调试日志级别")
+    arg_parser.add_argument("--debug-sample-rate", type=float, default=1.0,
+                            help="输出到终端的 DEBUG 日志比例（0~1）")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    无界面服务器入口：启动服务器，报告启动耗时，直到收到 Ctrl+C 或 SIGTERM。
+
+    :param argv: 命令行参数，默认读取 sys.argv
+    :return: 进程退出码
+    """
+    args = parse_args(argv)
+    init_started = time.perf_counter()
+    server = Server(
+        host=args.host,
+        port=args.port,
+        engine=args.engine,
+        parse_workers=args.workers,
+        parse_backend=args.parse_backend,
+        parse_processes=args.parse_processes,
+        max_sessions=args.max_sessions,
+        session_idle_timeout=args.session_idle_timeout,
+        log_directory=args.log_dir,
+        metrics_port=args.metrics_port,
+        debug_level=getattr(logging, args.log_level),
+        debug_sample_rate=args.debug_sample_rate,
+        unix_path=args.unix_socket,
+        cache_directory=args.cache_dir,
+        segmenter=args.segmenter,
+        intent_cache_size=args.intent_cache_size,
+        weather_ttl=args.weather_ttl,
+        weather_stale_ttl=args.weather_stale_ttl,
+        weather_url=args.weather_url
+    )
+    init_finished = time.perf_counter()
+    server.start()
+    if not server.ready.wait(timeout=30):
+        server.debug_logger.error("服务器未能在 30 秒内开始监听。")
+        server.stop()
+        return 1
+    listening = time.perf_counter()
+
+    loaded = [name for name in OPTIONAL_HEAVY_MODULES if name in sys.modules]
+    server.debug_logger.info(
+        f"启动耗时 {(listening - _IMPORT_STARTED) * 1000:.0f} ms"
+        f"（导入 {(_IMPORT_FINISHED - _IMPORT_STARTED) * 1000:.0f} ms，"
+        f"初始化 {(init_finished - init_started) * 1000:.0f} ms，"
+        f"开始监听 {(listening - init_finished) * 1000:.0f} ms），"
+        f"已加载的可选依赖: {'、'.join(loaded) if loaded else '无'}"
+    )
+
+    # SIGTERM 与 Ctrl+C 一样触发正常关闭
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
     try:
-        sys.exit(app.exec_())
+        while server.server_thread.is_alive():
+            server.server_thread.join(timeout=0.5)
     except KeyboardInterrupt:
+        server.debug_logger.info("收到停止信号，正在关闭服务器。")
+    finally:
         server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# session.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class SessionState:
+    """
+    单个会话的可变状态：口味/种类偏好、机器人状态、语速与最近一次推荐。
+    食物列表、音乐列表、词典等只读数据由所有会话共享，不在此保存。
+    """
+    __slots__ = ("flavor_pref", "kind_pref", "speed", "current_state",
+                 "last_recommendation", "last_active")
+
+    def __init__(self):
+        # 口味偏好，仅支持“酸”、“甜”、“辣”、“咸”
+        self.flavor_pref = {"酸": None, "甜": None, "辣": None, "咸": None}
+        # 种类偏好，仅支持“米”、“面”、“其他”
+        self.kind_pref = {"米": None, "面": None, "其他": None}
+        self.speed = 200  # 默认语速
+        self.current_state = "默认状态"
+        self.last_recommendation = None
+        self.last_active = time.monotonic()
+
+
+class ClientSession:
+    """
+    单个连接的会话视图，持有绑定到该会话状态的机器人和解析器。
+    """
+    __slots__ = ("session_id", "robot", "parser")
+
+    def __init__(self, session_id, robot, parser):
+        self.session_id = session_id
+        self.robot = robot
+        self.parser = parser
+
+
+class SessionRegistry:
+    """
+    按会话 ID 保存会话状态，按最近使用顺序淘汰超额或空闲过久的会话。
+
+    连接打开期间会话被固定（pin），不参与淘汰，连接关闭时由 release 移除；
+    固定的会话数量不超过 max_sessions，idle_timeout 只约束未固定的会话。
+
+    锁只保护字典本身的 O(1) 操作，指令解析与执行期间不持有锁，
+    因此不同会话之间不会相互阻塞。
+    """
+
+    def __init__(self, max_sessions: int = 1024, idle_timeout: float = 1800.0):
+        """
+        :param max_sessions: 最多同时固定的会话数量，也是最多保留的未固定会话数量
+        :param idle_timeout: 未固定的会话空闲超过该秒数后被淘汰
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[object, SessionState] = {}
+        # 未固定的会话 ID，按最近使用顺序排列，淘汰只在其中进行
+        self.unpinned: "OrderedDict[object, None]" = OrderedDict()
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, session_id) -> SessionState:
+        """
+        获取会话状态，不存在（或已被淘汰）时新建，并标记为最近使用。
+
+        :param session_id: 会话 ID
+        :return: 会话状态
+        """
+        now = time.monotonic()
+        with self.lock:
+            state = self.sessions.get(session_id)
+            if state is None:
+                state = SessionState()
+                self.sessions[session_id] = state
+                self.unpinned[session_id] = None
+            elif session_id in self.unpinned:
+                self.unpinned.move_to_end(session_id)
+            state.last_active = now
+            self._evict(now)
+        return state
+
+    def pin(self, session_id) -> Optional[SessionState]:
+        """
+        为新连接获取并固定会话，直到 release 都不会被淘汰。
+
+        :param session_id: 会话 ID
+        :return: 会话状态；固定的会话已达 max_sessions 时返回 None
+        """
+        now = time.monotonic()
+        with self.lock:
+            if len(self.sessions) - len(self.unpinned) >= self.max_sessions:
+                return None
+            state = self.sessions.get(session_id)
+            if state is None:
+                state = self.sessions[session_id] = SessionState()
+            self.unpinned.pop(session_id, None)
+            state.last_active = now
+            self._evict(now)
+        return state
+
+    def get(self, session_id) -> Optional[SessionState]:
+        """获取会话状态但不刷新使用时间，不存在时返回 None"""
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def release(self, session_id):
+        """连接关闭时移除会话"""
+        with self.lock:
+            self.sessions.pop(session_id, None)
+            self.unpinned.pop(session_id, None)
+
+    def _evict(self, now: float):
+        """淘汰空闲过久的未固定会话以及超出容量的最久未使用会话（调用方持有锁）"""
+        deadline = now - self.idle_timeout
+        while self.unpinned:
+            oldest = next(iter(self.unpinned))
+            if self.sessions[oldest].last_active >= deadline and len(self.unpinned) <= self.max_sessions:
+                break
+            self.unpinned.popitem(last=False)
+            del self.sessions[oldest]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """返回会话数量与累计淘汰次数"""
+        with self.lock:
+            return {"sessions": len(self.sessions), "evictions": self.evictions}
+
+    def __len__(self) -> int:
+        return len(self.sessions)
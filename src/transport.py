@@ -0,0 +1,63 @@
+# transport.py
+
+import os
+import socket
+import stat
+import sys
+from typing import Optional
+
+
+def unix_address(path: str) -> str:
+    """
+    把配置中的 Unix 套接字路径转换为 bind/connect 使用的地址。
+    以 '@' 开头的路径表示 Linux 抽象命名空间，不会在文件系统中创建文件。
+
+    :param path: 套接字文件路径，或 '@名称'
+    :return: 套接字地址
+    """
+    if path.startswith('@'):
+        if not sys.platform.startswith('linux'):
+            raise ValueError("抽象命名空间套接字仅在 Linux 上可用")
+        return '\0' + path[1:]
+    return path
+
+
+def is_abstract(address: str) -> bool:
+    """判断地址是否位于 Linux 抽象命名空间"""
+    return address.startswith('\0')
+
+
+def remove_stale_socket(address: str):
+    """删除上次运行遗留的套接字文件；路径被普通文件占用时报错而不是删除"""
+    if is_abstract(address) or not os.path.exists(address):
+        return
+    if not stat.S_ISSOCK(os.stat(address).st_mode):
+        raise FileExistsError(f"{address} 已存在且不是套接字文件")
+    os.unlink(address)
+
+
+def describe(host: str, port: int, unix_path: Optional[str]) -> str:
+    """返回便于日志输出的监听/连接地址描述"""
+    if unix_path:
+        return f"unix:{unix_path}"
+    return f"{host}:{port}"
+
+
+def connect(host: str, port: int, unix_path: Optional[str] = None,
+            timeout: Optional[float] = None) -> socket.socket:
+    """
+    连接到服务器：指定 unix_path 时使用 AF_UNIX，否则使用 TCP。
+    两种传输方式使用同样的换行分隔 JSON 协议。
+
+    :return: 已连接的套接字
+    """
+    if unix_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(unix_address(unix_path))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    return socket.create_connection((host, port), timeout=timeout)
@@ -0,0 +1,300 @@
+# src/weather.py
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+
+# OpenWeather 北京实时天气
+DEFAULT_WEATHER_URL = ("http://api.openweathermap.org/data/2.5/weather"
+                       "?q=BEIJING&appid=5af7f8db2727027fdb8abe6510b4203e&units=metric&lang=zh_cn")
+
+
+class WeatherError(Exception):
+    """天气数据获取失败：网络错误、超时、非 200 状态码或返回内容无法解析"""
+
+
+class CircuitOpenError(WeatherError):
+    """熔断器打开，未请求上游即失败"""
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续失败达到阈值后打开，在 reset_timeout 秒内直接拒绝请求；
+    之后进入半开状态，只放行一个探测请求，成功则关闭，失败则重新打开。
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    STATES = (CLOSED, HALF_OPEN, OPEN)
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param failure_threshold: 打开熔断器所需的连续失败次数
+        :param reset_timeout: 打开后到允许探测请求的秒数
+        :param clock: 单调时钟，测试时可替换
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """是否允许发出请求；打开状态超时后转为半开并放行一个探测请求"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"state": self.state, "consecutive_failures": self.consecutive_failures,
+                    "times_opened": self.times_opened}
+
+
+class WeatherClient:
+    """
+    天气接口客户端：复用同一个 requests.Session 的连接，分别限制连接和读取超时，
+    对网络错误、超时、429 和 5xx 按指数退避加随机抖动重试，并通过熔断器在上游故障时快速失败。
+
+    每次 fetch（含重试）在熔断器中只计一次成功或失败。
+    """
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, url: str = DEFAULT_WEATHER_URL, connect_timeout: float = 3.05,
+                 read_timeout: float = 5.0, retries: int = 2, backoff: float = 0.2, max_backoff: float = 2.0,
+                 breaker: Optional[CircuitBreaker] = None,
+                 on_request: Optional[Callable[[float, bool], None]] = None,
+                 session: Optional[requests.Session] = None,
+                 sleep: Callable[[float], None] = time.sleep, rng: random.Random = random):
+        """
+        :param url: 天气接口地址，测试时可指向本地替身
+        :param connect_timeout: 建立连接的超时（秒）
+        :param read_timeout: 等待响应数据的超时（秒）
+        :param retries: 首次请求失败后的最多重试次数
+        :param backoff: 第一次重试前的最长等待（秒），之后每次翻倍
+        :param max_backoff: 单次重试等待的上限（秒）
+        :param breaker: 熔断器，默认连续 5 次失败后熔断 30 秒
+        :param on_request: 每次 HTTP 请求结束后的回调，参数为耗时（秒）和是否成功
+        :param session: HTTP 会话，默认新建
+        :param sleep: 等待函数，测试时可替换
+        :param rng: 生成抖动的随机数生成器
+        """
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.on_request = on_request
+        self.session = session if session is not None else requests.Session()
+        self.sleep = sleep
+        self.rng = rng
+        self.lock = threading.Lock()
+        # 统计：HTTP 请求数、重试次数、失败的 fetch 数、被熔断器拒绝的 fetch 数
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    def fetch(self) -> Dict:
+        """
+        获取一次天气数据。
+
+        :raises CircuitOpenError: 熔断器打开
+        :raises WeatherError: 重试后仍然失败，原始异常保存在 __cause__ 中
+        """
+        if not self.breaker.allow():
+            with self.lock:
+                self.short_circuited += 1
+            raise CircuitOpenError("天气服务熔断中")
+
+        # 无论以何种方式结束（包括意料之外的异常）都要记录结果，否则半开状态的熔断器会一直拒绝请求
+        succeeded = False
+        try:
+            for attempt in range(self.retries + 1):
+                retryable, data, error = self._attempt()
+                if error is None:
+                    succeeded = True
+                    return data
+                if not retryable or attempt == self.retries:
+                    break
+                with self.lock:
+                    self.retried += 1
+                # 全抖动：在 [0, 退避上限) 内随机等待，避免多个实例同时重试
+                self.sleep(self.rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+        finally:
+            if succeeded:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+                with self.lock:
+                    self.failures += 1
+        raise WeatherError(f"获取天气失败：{error}") from error
+
+    def _attempt(self):
+        """发出一次 HTTP 请求，返回 (是否可重试, 数据, 异常)"""
+        started = time.perf_counter()
+        retryable, data, error = False, None, None
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+            if response.status_code == 200:
+                data = response.json()
+            else:
+                retryable = response.status_code in self.RETRY_STATUSES
+                error = WeatherError(f"天气服务返回状态码 {response.status_code}")
+        except ValueError as e:
+            # 返回内容不是 JSON（requests 的 JSONDecodeError 也是 ValueError）
+            error = e
+        except requests.RequestException as e:
+            retryable, error = True, e
+        with self.lock:
+            self.requests += 1
+        if self.on_request is not None:
+            self.on_request(time.perf_counter() - started, error is None)
+        return retryable, data, error
+
+    def stats(self) -> Dict:
+        """客户端与熔断器统计"""
+        with self.lock:
+            stats = {"requests": self.requests, "retries": self.retried, "failures": self.failures,
+                     "short_circuited": self.short_circuited}
+        stats["breaker"] = self.breaker.stats()
+        return stats
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+class _Flight:
+    """一次进行中的请求，等待同一次请求的调用方共享其结果"""
+    __slots__ = ("done", "data", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+
+class WeatherCache:
+    """
+    天气数据缓存，所有会话共享：
+
+    - 数据未超过 ttl 时直接返回；
+    - 超过 ttl 但未超过 ttl + stale_ttl 时立即返回旧数据，同时由后台线程刷新；
+    - 没有数据或数据过旧时同步请求，同一时刻并发的调用方只发出一次请求，共享其结果或异常。
+
+    后台刷新失败时保留旧数据，下一次调用会再次尝试刷新。
+    """
+
+    def __init__(self, fetch: Callable[[], Dict], ttl: float = 600.0, stale_ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param fetch: 请求一次天气数据的函数
+        :param ttl: 数据保持新鲜的秒数
+        :param stale_ttl: 过期后仍可先返回旧数据、在后台刷新的秒数
+        :param clock: 单调时钟，测试时可替换
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.data: Optional[Dict] = None
+        self.fetched_at = 0.0
+        self.flight: Optional[_Flight] = None
+        # 统计：新鲜命中、返回旧数据、未命中、合并到进行中请求的调用、完成的请求、失败的请求
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fetches = 0
+        self.failures = 0
+
+    def get(self) -> Dict:
+        """
+        返回天气数据。
+
+        :raises Exception: 需要同步请求且请求失败时，抛出 fetch 的异常
+        """
+        with self.lock:
+            if self.data is not None:
+                age = self.clock() - self.fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    return self.data
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    if self.flight is None:
+                        self.flight = _Flight()
+                        threading.Thread(target=self._run, args=(self.flight,),
+                                         name="weather-refresh", daemon=True).start()
+                    return self.data
+            flight, leader = self.flight, self.flight is None
+            if leader:
+                flight = self.flight = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            self._run(flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.data
+
+    def _run(self, flight: _Flight):
+        """执行一次请求并把结果交给所有等待者"""
+        try:
+            flight.data = self.fetch()
+        except Exception as e:
+            flight.error = e
+        with self.lock:
+            if flight.error is None:
+                self.data, self.fetched_at = flight.data, self.clock()
+                self.fetches += 1
+            else:
+                self.failures += 1
+            self.flight = None
+        flight.done.set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待进行中的请求（包括后台刷新）完成。
+
+        :param timeout: 最长等待秒数
+        :return: 没有进行中的请求或已完成时为 True
+        """
+        flight = self.flight
+        return flight is None or flight.done.wait(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self.lock:
+            return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses,
+                    "coalesced": self.coalesced, "fetches": self.fetches, "failures": self.failures}
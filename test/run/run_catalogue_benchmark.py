@@ -0,0 +1,92 @@
+# test/run/run_catalogue_benchmark.py
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.catalogue import open_catalogue
+
+FOOD_CSV = os.path.join(PROJECT_ROOT, 'resources', 'food_list.csv')
+
+
+def legacy_load(csv_path):
+    """优化前的做法：逐行解析，每道菜一个字典"""
+    food_list = []
+    with open(csv_path, encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 3:
+                continue
+            flavors_raw = row[2].strip()
+            flavors = [ch for s in flavors_raw.split('/') for ch in s] if flavors_raw else []
+            food_list.append({"name": row[0].strip(), "flavors": flavors, "kind": row[1].strip()})
+    return food_list
+
+
+def write_scaled_csv(path: str, size: int):
+    """把 food_list.csv 的菜品重复到 size 行，名称加上编号，模拟多校区目录"""
+    with open(FOOD_CSV, encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    header, body = rows[0], [row for row in rows[1:] if len(row) >= 3]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in range(size):
+            name, kind, flavors = body[row % len(body)][:3]
+            writer.writerow([f"{name}#{row}", kind, flavors])
+
+
+def elapsed_ms(func) -> float:
+    started = time.perf_counter()
+    func()
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def heap_bytes(func) -> int:
+    """结果对象在 Python 堆上占用的字节数"""
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(argv=None):
+    """食物目录加载基准测试入口"""
+    arg_parser = argparse.ArgumentParser(description="食物目录加载基准：逐行解析为字典 vs 列式目录缓存映射")
+    arg_parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[242, 10000, 100000, 500000],
+                            help="目录行数")
+    args = arg_parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_dir = os.path.join(workdir, "cache")
+        for size in args.sizes:
+            csv_path = os.path.join(workdir, f"food_list_{size}.csv")
+            write_scaled_csv(csv_path, size)
+            results.append({
+                "rows": size,
+                "csv_bytes": os.path.getsize(csv_path),
+                "legacy_load_ms": elapsed_ms(lambda: legacy_load(csv_path)),
+                "legacy_heap_bytes": heap_bytes(lambda: legacy_load(csv_path)),
+                "cold_build_ms": elapsed_ms(lambda: open_catalogue(csv_path, cache_dir)),
+                "mapped_open_ms": elapsed_ms(lambda: open_catalogue(csv_path, cache_dir)),
+                "mapped_heap_bytes": heap_bytes(lambda: open_catalogue(csv_path, cache_dir)),
+                "cache_bytes": os.path.getsize(open_catalogue(csv_path, cache_dir).path),
+            })
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
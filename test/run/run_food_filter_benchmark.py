@@ -0,0 +1,87 @@
+# test/run/run_food_filter_benchmark.py
+
+import os
+import sys
+import json
+import time
+import argparse
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from src.catalogue import FoodCatalogue
+from src.food_index import FoodIndex
+from src.robot import Robot
+
+# 有代表性的偏好组合：口味偏好, 种类偏好
+PREFERENCES = [
+    ({"辣": "喜欢"}, {}),
+    ({"酸": "不喜欢", "甜": "不喜欢"}, {"面": "不喜欢"}),
+    ({"咸": "喜欢", "辣": "不喜欢"}, {"米": "喜欢"}),
+    ({"酸": "喜欢", "甜": "喜欢", "辣": "喜欢", "咸": "不喜欢"}, {"其他": "不喜欢"}),
+]
+
+
+def comprehension_filter(food_list, flavor_pref, kind_pref):
+    """优化前的做法：每个已设置的偏好用一次列表推导过滤"""
+    filtered = food_list
+    for flavor, pref in flavor_pref.items():
+        if pref == "喜欢":
+            filtered = [f for f in filtered if flavor in f['flavors']]
+        elif pref == "不喜欢":
+            filtered = [f for f in filtered if flavor not in f['flavors']]
+    for kind, pref in kind_pref.items():
+        if pref == "喜欢":
+            filtered = [f for f in filtered if f['kind'] == kind]
+        elif pref == "不喜欢":
+            filtered = [f for f in filtered if f['kind'] != kind]
+    return filtered
+
+
+def scaled_food_list(base, size: int):
+    """把 food_list.csv 的菜品重复到 size 行，名称加上编号"""
+    return [dict(base[row % len(base)], name=f"{base[row % len(base)]['name']}#{row}") for row in range(size)]
+
+
+def average_ms(func, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        for flavor_pref, kind_pref in PREFERENCES:
+            func(flavor_pref, kind_pref)
+    return round((time.perf_counter() - started) / number / len(PREFERENCES) * 1000, 4)
+
+
+def main(argv=None):
+    """食物过滤基准测试入口"""
+    arg_parser = argparse.ArgumentParser(description="Robot.filter_food 基准：列表推导 vs 位图索引")
+    arg_parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[242, 10000, 100000, 500000],
+                            help="食物列表行数")
+    arg_parser.add_argument("-n", "--number", type=int, default=20, help="每种偏好组合的重复次数")
+    args = arg_parser.parse_args(argv)
+
+    base = Robot().load_food_data()
+    results = []
+    for size in args.sizes:
+        food_list = scaled_food_list(base, size)
+        catalogue = FoodCatalogue.from_records([(food['name'], food['kind'], food['flavors']) for food in food_list])
+        started = time.perf_counter()
+        index = FoodIndex(catalogue)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        uncached = FoodIndex(catalogue, cache_size=0)
+        results.append({
+            "rows": size,
+            "index_build_ms": round(build_ms, 2),
+            "comprehension_ms": average_ms(lambda f, k: comprehension_filter(food_list, f, k),
+                                           max(1, args.number // 10)),
+            "bitmask_only_ms": average_ms(lambda f, k: uncached.mask(uncached.signature(f, k)), args.number),
+            "bitmask_with_rows_ms": average_ms(uncached.filter, max(1, args.number // 10)),
+            "cached_ms": average_ms(index.filter, args.number * 50),
+        })
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
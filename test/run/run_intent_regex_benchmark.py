@@ -0,0 +1,59 @@
+# test/run/run_intent_regex_benchmark.py
+
+import os
+import re
+import sys
+import json
+import timeit
+import argparse
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.parser import DSLParser
+
+# 同义词未命中、需要走意图模式的输入，以及完全无法识别的输入（需尝试全部模式）
+SAMPLE_TEXTS = [
+    "哪个餐厅比较好", "附近有什么美食", "明天去哪儿吃", "今天吃什么好呢", "早上好",
+    "你能不能告诉我一些事情", "这句话和功能没有任何关系", "吃完饭以后推荐一下",
+    "我想知道现在是不是该出门了所以请告诉我外面的情况",
+]
+
+
+def loop_match(parser: DSLParser, text: str):
+    """优化前的做法：逐个命令、逐个模式字符串调用 re.match，依赖 re 模块的内部缓存"""
+    for cmd, patterns in parser.intention_patterns.items():
+        if any(re.match(pattern, text) for pattern in patterns):
+            return cmd
+    return None
+
+
+def measure(func, number: int) -> float:
+    """返回每条输入的平均耗时（微秒）"""
+    total = min(timeit.repeat(lambda: [func(text) for text in SAMPLE_TEXTS], number=number, repeat=5))
+    return round(total / number / len(SAMPLE_TEXTS) * 1e6, 3)
+
+
+def main(argv=None):
+    """意图正则基准测试入口"""
+    arg_parser = argparse.ArgumentParser(description="意图模式匹配基准：逐个 re.match vs 组合正则")
+    arg_parser.add_argument("-n", "--number", type=int, default=2000, help="每轮重复次数")
+    args = arg_parser.parse_args(argv)
+
+    parser = DSLParser(None)
+    mismatches = [text for text in SAMPLE_TEXTS
+                  if loop_match(parser, text) != parser.match_intention(text)]
+    result = {
+        "patterns": sum(len(patterns) for patterns in parser.intention_patterns.values()),
+        "samples": len(SAMPLE_TEXTS),
+        "mismatches": mismatches,
+        "loop_re_match_us": measure(lambda text: loop_match(parser, text), args.number),
+        "combined_regex_us": measure(parser.match_intention, args.number),
+    }
+    result["speedup"] = round(result["loop_re_match_us"] / result["combined_regex_us"], 2)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
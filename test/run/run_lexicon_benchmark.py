@@ -0,0 +1,92 @@
+# test/run/run_lexicon_benchmark.py
+
+import os
+import sys
+import json
+import random
+import timeit
+import argparse
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.parser import DSLParser
+
+# 压测用的输入：覆盖命令、偏好设置和未命中的情况
+SAMPLE_TEXTS = [
+    "推荐美食", "我不喜欢吃辣的", "说话快一点", "今天天气怎么样", "随便来点米饭",
+    "帮我换一家", "这个东西怎么样", "我想吃面条", "播放下一首", "现在几点了",
+]
+
+
+def nested_scan(parser: DSLParser, text: str):
+    """优化前的做法：逐个命令、逐个同义词做子串判断，再对各槽位词典重复扫描"""
+    best_command, best_score = None, 0
+    for cmd, synonyms in parser.command_synonyms.items():
+        for syn in [cmd] + synonyms:
+            if syn in text and len(syn) > best_score:
+                best_score, best_command = len(syn), cmd
+    slots = []
+    for dictionary in (parser.preference_synonyms, parser.flavor_synonyms, parser.kind_synonyms):
+        found = None
+        for canonical, synonyms in dictionary.items():
+            if any(word in text for word in [canonical] + synonyms):
+                found = canonical
+                break
+        slots.append(found)
+    return best_command, slots
+
+
+def inflate(parser: DSLParser, factor: int, seed: int = 0):
+    """把每个词典的同义词扩充到原来的 factor 倍，新增词由随机汉字组成、不会误命中样例"""
+    rng = random.Random(seed)
+
+    def fake_word():
+        return ''.join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 4)))
+
+    for dictionary in (parser.command_synonyms, parser.preference_synonyms,
+                       parser.flavor_synonyms, parser.kind_synonyms):
+        for key, synonyms in dictionary.items():
+            dictionary[key] = synonyms + [fake_word() for _ in range(len(synonyms) * (factor - 1))]
+    parser._build_lexicon()
+
+
+def measure(func, number: int) -> float:
+    """返回每条输入的平均耗时（微秒）"""
+    total = min(timeit.repeat(lambda: [func(text) for text in SAMPLE_TEXTS], number=number, repeat=5))
+    return round(total / number / len(SAMPLE_TEXTS) * 1e6, 3)
+
+
+def run(factors, number: int):
+    """对每个扩充倍数分别测量两种做法的耗时"""
+    results = []
+    for factor in factors:
+        parser = DSLParser(None)
+        if factor > 1:
+            inflate(parser, factor)
+        patterns = sum(len(v) + 1 for d in (parser.command_synonyms, parser.preference_synonyms,
+                                            parser.flavor_synonyms, parser.kind_synonyms)
+                       for v in d.values())
+        results.append({
+            "factor": factor,
+            "patterns": patterns,
+            "automaton_nodes": len(parser.lexicon),
+            "nested_scan_us": measure(lambda text: nested_scan(parser, text), number),
+            "automaton_us": measure(parser.scan_lexicons, number),
+        })
+    return results
+
+
+def main(argv=None):
+    """词典匹配基准测试入口"""
+    arg_parser = argparse.ArgumentParser(description="同义词匹配基准：逐词扫描 vs Aho-Corasick 自动机")
+    arg_parser.add_argument("--factors", default="1,10,50", help="词典扩充倍数，逗号分隔")
+    arg_parser.add_argument("-n", "--number", type=int, default=200, help="每轮重复次数")
+    args = arg_parser.parse_args(argv)
+    factors = [int(value) for value in args.factors.split(',')]
+    print(json.dumps(run(factors, args.number), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
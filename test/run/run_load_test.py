@@ -0,0 +1,316 @@
+# test/run/run_load_test.py
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+import tempfile
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src import transport
+
+# 默认的指令组合：指令类型 -> (发送的文本, 权重)
+# 不含查询天气和音乐指令，避免压测依赖外部网络和声卡
+DEFAULT_MIX = {
+    "打招呼": ("你好", 2),
+    "推荐美食": ("推荐美食", 4),
+    "设置口味": ("设置口味 喜欢辣", 2),
+    "设置种类": ("我想吃面条", 1),
+    "推荐食堂": ("推荐食堂", 2),
+    "换一个": ("换一个", 1),
+    "查询时间": ("查询时间", 2),
+    "帮助": ("帮助", 1),
+}
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, Tuple[str, float]]:
+    """
+    解析指令组合，格式为 “类型=文本:权重,类型=文本:权重”，权重可省略。
+    未指定时使用 DEFAULT_MIX。
+    """
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in spec.split(','):
+        label, _, rest = item.partition('=')
+        text, _, weight = rest.partition(':')
+        mix[label.strip()] = (text.strip() or label.strip(), float(weight) if weight else 1.0)
+    return mix
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """最近秩法求分位数，输入需已排序"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """汇总一组延迟（秒），输出毫秒为单位的统计"""
+    values = sorted(latencies)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+
+class LoadGenerator:
+    """
+    对 JSON 行协议服务器发起并发压测。
+
+    closed 模式：每个连接发送一条指令后等待回复再发送下一条；
+    open 模式：按固定总速率发送，不等待回复，延迟从计划发送时刻算起，
+    避免服务器变慢时压测端跟着降速而低估延迟。
+    """
+
+    def __init__(self, host: str, port: int, connections: int, duration: float,
+                 mix: Dict[str, Tuple[str, float]], mode: str = "closed",
+                 rate: float = 100.0, seed: Optional[int] = None,
+                 unix_path: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.connections = connections
+        self.duration = duration
+        self.mode = mode
+        self.rate = rate
+        self.labels = list(mix)
+        self.texts = {label: mix[label][0] for label in mix}
+        self.weights = [mix[label][1] for label in mix]
+        self.random = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors = 0
+        self.connect_failures = 0
+
+    def pick(self) -> str:
+        """按权重随机选择一种指令类型"""
+        return self.random.choices(self.labels, self.weights)[0]
+
+    async def open_connection(self):
+        """建立连接并读取欢迎消息"""
+        if self.unix_path:
+            reader, writer = await asyncio.open_unix_connection(
+                transport.unix_address(self.unix_path), limit=1 << 20)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port, limit=1 << 20)
+        await reader.readline()
+        return reader, writer
+
+    async def closed_loop(self, connection, deadline: float):
+        """closed 模式下单个连接的发送循环"""
+        reader, writer = connection
+        try:
+            while time.perf_counter() < deadline:
+                label = self.pick()
+                started = time.perf_counter()
+                writer.write((self.texts[label] + '\n').encode('utf-8'))
+                line = await reader.readline()
+                if not line:
+                    self.errors += 1
+                    break
+                self.record(label, started, line)
+        except (OSError, asyncio.IncompleteReadError):
+            self.errors += 1
+        finally:
+            writer.close()
+
+    async def open_loop(self, connection, deadline: float, interval: float, offset: float):
+        """open 模式下单个连接的发送循环，接收由独立任务完成"""
+        reader, writer = connection
+        in_flight = deque()
+        receiver = asyncio.create_task(self.receive(reader, in_flight))
+        try:
+            scheduled = time.perf_counter() + offset
+            while scheduled < deadline:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                label = self.pick()
+                in_flight.append((label, scheduled))
+                writer.write((self.texts[label] + '\n').encode('utf-8'))
+                await writer.drain()
+                scheduled += interval
+            # 给尚未返回的回复留出时间
+            grace = time.perf_counter() + 5.0
+            while in_flight and time.perf_counter() < grace:
+                await asyncio.sleep(0.01)
+            self.errors += len(in_flight)
+        except OSError:
+            self.errors += 1
+        finally:
+            receiver.cancel()
+            writer.close()
+
+    async def receive(self, reader: asyncio.StreamReader, in_flight: deque):
+        """按顺序把回复与已发送的指令对应起来"""
+        while True:
+            line = await reader.readline()
+            if not line or not in_flight:
+                return
+            label, started = in_flight.popleft()
+            self.record(label, started, line)
+
+    def record(self, label: str, started: float, line: bytes):
+        """记录一次回复的延迟，无法解析的回复计为错误"""
+        elapsed = time.perf_counter() - started
+        try:
+            json.loads(line.decode('utf-8'))
+        except ValueError:
+            self.errors += 1
+            return
+        self.latencies[label].append(elapsed)
+
+    async def run(self) -> Dict:
+        """执行压测并返回 JSON 可序列化的结果"""
+        # 先建立全部连接并读完欢迎消息，再开始计时
+        results = await asyncio.gather(
+            *(self.open_connection() for _ in range(self.connections)),
+            return_exceptions=True
+        )
+        connections = [result for result in results if not isinstance(result, BaseException)]
+        self.connect_failures = len(results) - len(connections)
+
+        started = time.perf_counter()
+        deadline = started + self.duration
+        if self.mode == "open":
+            interval = len(connections) / self.rate
+            tasks = [self.open_loop(connection, deadline, interval, interval * i / len(connections))
+                     for i, connection in enumerate(connections)]
+        else:
+            tasks = [self.closed_loop(connection, deadline) for connection in connections]
+        await asyncio.gather(*tasks)
+        # open 模式的计时不包括等待最后一批回复的时间
+        elapsed = min(time.perf_counter(), deadline) - started if self.mode == "open" \
+            else time.perf_counter() - started
+
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        return {
+            "mode": self.mode,
+            "connections": self.connections,
+            "duration_s": round(elapsed, 3),
+            "target_rate": self.rate if self.mode == "open" else None,
+            "requests": len(all_latencies),
+            "errors": self.errors,
+            "connect_failures": self.connect_failures,
+            "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency": summarize(all_latencies),
+            "per_command": {label: summarize(values) for label, values in sorted(self.latencies.items())},
+        }
+
+
+def free_port() -> int:
+    """向系统申请一个空闲端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def spawn_server(args, log_dir: str) -> Tuple[subprocess.Popen, int]:
+    """
+    以子进程方式启动无界面服务器，避免压测端与服务器争用同一个 GIL。
+
+    :return: (子进程, 端口)
+    """
+    port = free_port()
+    command = [
+        sys.executable, "-m", "src.server",
+        "--port", str(port),
+        *(["--unix-socket", args.unix_socket] if args.unix_socket else []),
+        "--engine", args.engine,
+        "--workers", str(args.workers),
+        "--parse-backend", args.parse_backend,
+        # 并发连接数超过默认上限时放宽，避免压测连接被拒绝
+        "--max-sessions", str(max(1024, args.connections + 1)),
+        "--log-dir", log_dir,
+    ]
+    process = subprocess.Popen(command, cwd=PROJECT_ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with transport.connect('127.0.0.1', port, args.unix_socket, timeout=1):
+                return process, port
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("服务器未能启动")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """解析压测参数"""
+    arg_parser = argparse.ArgumentParser(description="邮小食服务器压测工具")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="目标服务器地址")
+    arg_parser.add_argument("--port", type=int, default=65432, help="目标服务器端口")
+    arg_parser.add_argument("--unix-socket", default=None,
+                            help="通过 Unix 套接字连接（'@名称' 表示抽象命名空间），自动启动服务器时同样生效")
+    arg_parser.add_argument("--engine", choices=("threaded", "asyncio"), default=None,
+                            help="指定后自动启动该引擎的服务器作为压测目标")
+    arg_parser.add_argument("--workers", type=int, default=4, help="自动启动服务器时的解析线程数")
+    arg_parser.add_argument("--parse-backend", choices=("local", "process"), default="local",
+                            help="自动启动服务器时的解析后端")
+    arg_parser.add_argument("-c", "--connections", type=int, default=50, help="并发连接数")
+    arg_parser.add_argument("-d", "--duration", type=float, default=10.0, help="压测时长（秒）")
+    arg_parser.add_argument("--mode", choices=("closed", "open"), default="closed", help="发送节奏")
+    arg_parser.add_argument("--rate", type=float, default=200.0, help="open 模式下的总发送速率（条/秒）")
+    arg_parser.add_argument("--mix", default=None,
+                            help="指令组合，如 '推荐美食=推荐美食:3,查询时间=几点了:1'")
+    arg_parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    arg_parser.add_argument("-o", "--output", default=None, help="结果 JSON 文件路径，默认输出到终端")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None):
+    """压测入口"""
+    args = parse_args(argv)
+    process = None
+    host, port = args.host, args.port
+    if args.engine:
+        # 压测产生的对话日志写入临时目录，不污染 logs/
+        process, port = spawn_server(args, tempfile.mkdtemp(prefix="ushalleat-load-"))
+        host = '127.0.0.1'
+
+    try:
+        generator = LoadGenerator(host, port, args.connections, args.duration,
+                                  parse_mix(args.mix), args.mode, args.rate, args.seed,
+                                  args.unix_socket)
+        result = asyncio.run(generator.run())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    result["target"] = {"address": transport.describe(host, port, args.unix_socket),
+                        "engine": args.engine or "external"}
+    result["timestamp"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    report = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"压测结果已保存至: {args.output}")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
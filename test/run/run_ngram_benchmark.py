@@ -0,0 +1,78 @@
+# test/run/run_ngram_benchmark.py
+
+import os
+import sys
+import json
+import time
+import argparse
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.parser import DSLParser
+
+# 同义词与意图模式都无法识别的输入：错别字、口语化表达和无关内容
+SAMPLE_TEXTS = [
+    "推荐美时", "播方音乐", "天汽怎么样", "暂庭音乐", "换首哥", "几点钟了", "下雨吗",
+    "再来一个", "停止", "今天好热", "帮帮我", "你叫什么名字", "这句话和功能没有任何关系",
+    "我想知道今天中午去哪个地方吃点好的东西",
+]
+
+
+def load_corpus():
+    """读取 test/cases 下的测试用例，每行一条输入"""
+    path = os.path.join(PROJECT_ROOT, 'test', 'cases', 'test_cases.txt')
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def measure(parser: DSLParser, texts, number: int, budget_us: float):
+    """返回每条输入打分耗时的平均值与 P99（微秒），以及 P99 是否在预算之内"""
+    normalized = [parser.normalize_text(text) for text in texts]
+    samples = []
+    for _ in range(number):
+        for text in normalized:
+            started = time.perf_counter()
+            parser.score_intents(text)
+            samples.append(time.perf_counter() - started)
+    samples.sort()
+    p99_us = samples[int(len(samples) * 0.99)] * 1e6
+    return {
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 2),
+        "p99_us": round(p99_us, 2),
+        "within_budget": p99_us < budget_us,
+    }
+
+
+def main(argv=None):
+    """字符二元组打分基准测试入口"""
+    arg_parser = argparse.ArgumentParser(description="字符二元组意图打分基准")
+    arg_parser.add_argument("-n", "--number", type=int, default=200, help="每条输入的重复次数")
+    arg_parser.add_argument("-b", "--budget-us", type=float, default=1000.0,
+                            help="每条输入打分耗时的预算（微秒）")
+    args = arg_parser.parse_args(argv)
+
+    parser = DSLParser(None, intent_cache_size=0)
+    started = time.perf_counter()
+    parser.rebuild_lexicons()
+    scorer = parser.ngram_scorer
+
+    result = {
+        "matrix": {"phrases": scorer.phrases, "bigrams": len(scorer.vocabulary)},
+        "rebuild_lexicons_ms": round((time.perf_counter() - started) * 1000, 2),
+        "corpus": measure(parser, load_corpus(), args.number, args.budget_us),
+        "unrecognized": measure(parser, SAMPLE_TEXTS, args.number, args.budget_us),
+        "decisions": {
+            text: {
+                "resolved": parser.resolve_intent(text)[0],
+                "top_k": parser.score_intents(parser.normalize_text(text)),
+            }
+            for text in SAMPLE_TEXTS
+        },
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# test/run/run_segmenter_benchmark.py
+
+import os
+import sys
+import json
+import timeit
+import argparse
+import subprocess
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.parser import DSLParser, load_posseg
+from dsl.grammar import canonical_forms
+
+# 在子进程中测量构造解析器并预热分词器的耗时与峰值内存
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+from dsl.parser import DSLParser
+parser = DSLParser(None, segmenter=sys.argv[1])
+parser.warmup()
+parser.clean_text("推荐美食")
+elapsed = time.perf_counter() - started
+# ru_maxrss 在 Linux 上会继承父进程的峰值，优先读取本进程的 VmHWM
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+try:
+    with open("/proc/self/status") as status:
+        peak_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+except OSError:
+    pass
+print(json.dumps({"startup_ms": round(elapsed * 1000, 1),
+                  "peak_rss_mb": round(peak_kb / 1024, 1),
+                  "jieba_loaded": "jieba" in sys.modules}))
+"""
+
+
+def load_corpus():
+    """读取 test/cases 下的测试用例，每行一条输入"""
+    path = os.path.join(PROJECT_ROOT, 'test', 'cases', 'test_cases.txt')
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def measure_startup(segmenter: str):
+    """在全新进程中测量启动开销"""
+    env = dict(os.environ, SDL_AUDIODRIVER="dummy")
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, segmenter],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_cut(cut, corpus, number: int) -> float:
+    """返回每条输入的平均切分耗时（微秒）"""
+    total = min(timeit.repeat(lambda: [list(cut(text)) for text in corpus], number=number, repeat=5))
+    return round(total / number / len(corpus) * 1e6, 3)
+
+
+def compare_intents(jieba_parser: DSLParser, trie_parser: DSLParser, corpus):
+    """返回两种分词器下意图（命令、偏好、参数）不同的输入"""
+    differences = []
+    for text in corpus:
+        expected = jieba_parser.resolve_intent(text)[:3]
+        actual = trie_parser.resolve_intent(text)[:3]
+        if expected != actual:
+            differences.append({"text": text, "jieba": expected, "trie": actual})
+    return differences
+
+
+def main(argv=None):
+    """分词器基准测试入口"""
+    arg_parser = argparse.ArgumentParser(description="clean_text 分词器基准：jieba.posseg vs 字典树")
+    arg_parser.add_argument("-n", "--number", type=int, default=200, help="每轮重复次数")
+    args = arg_parser.parse_args(argv)
+
+    corpus = load_corpus()
+    # 语法的规范形式是最依赖分词结果的输入，单独比较
+    grammar_forms = [' '.join(tokens) for tokens in canonical_forms()]
+
+    jieba_parser = DSLParser(None, segmenter='jieba')
+    jieba_parser.warmup()
+    trie_parser = DSLParser(None, segmenter='trie')
+    pseg = load_posseg()
+
+    result = {
+        "corpus": len(corpus),
+        "trie_words": trie_parser.trie_segmenter.words,
+        "cut_us": {
+            "jieba": measure_cut(pseg.cut, corpus, args.number),
+            "trie": measure_cut(trie_parser.trie_segmenter.cut, corpus, args.number),
+        },
+        "startup": {
+            "jieba": measure_startup('jieba'),
+            "trie": measure_startup('trie'),
+        },
+        "intent_differences": {
+            "corpus": compare_intents(jieba_parser, trie_parser, corpus),
+            "grammar_forms": compare_intents(jieba_parser, trie_parser, grammar_forms),
+        },
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# test/run/run_typo_benchmark.py
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.parser import DSLParser
+from dsl.segmenter import load_dish_names
+from dsl.typo import TypoIndex, distance_from
+
+# 触屏输入常见的错别字
+QUERIES = ["推荐美时", "播方音乐", "天汽怎么样", "暂庭音乐", "换首哥", "几点钟了", "查询天汽", "hellp"]
+
+
+class BKTree:
+    """对照用的 BK 树：按与父节点的编辑距离组织子节点，查询时由三角不等式剪枝"""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, word: str):
+        node = [word, {}]
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+        distance = distance_from(word)
+        current = self.root
+        while True:
+            dist = distance(current[0])
+            if dist == 0:
+                self.size -= 1
+                return
+            if dist not in current[1]:
+                current[1][dist] = node
+                return
+            current = current[1][dist]
+
+    def search(self, word: str, max_distance: int, stats: dict):
+        distance = distance_from(word)
+        matches, stack, visited = [], [self.root], 0
+        while stack:
+            node = stack.pop()
+            visited += 1
+            dist = distance(node[0])
+            if dist <= max_distance:
+                matches.append(node[0])
+            stack.extend(child for edge, child in node[1].items()
+                         if dist - max_distance <= edge <= dist + max_distance)
+        stats['visited'] = visited
+        return matches
+
+
+def build_lexicon(parser: DSLParser, size: int, rng: random.Random):
+    """真实的命令短语和菜品名，不足 size 时用同一字表随机生成的短语补齐"""
+    phrases = []
+    for cmd, synonyms in parser.command_synonyms.items():
+        phrases.extend([cmd] + synonyms)
+    phrases.extend(load_dish_names())
+    alphabet = sorted({char for phrase in phrases for char in phrase})
+    phrases = list(dict.fromkeys(phrases))
+    while len(phrases) < size:
+        phrases.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(2, 6))))
+    return phrases[:size]
+
+
+def per_query_us(search, number: int) -> float:
+    """返回每次查询的平均耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(number):
+        for query in QUERIES:
+            search(query)
+    return round((time.perf_counter() - started) / number / len(QUERIES) * 1e6, 1)
+
+
+def measure(phrases, max_distance: int, number: int):
+    """同一词典上三种查找方式的耗时与工作量"""
+    index = TypoIndex(max_distance)
+    tree = BKTree()
+    for phrase in phrases:
+        index.add(phrase)
+        tree.add(phrase)
+
+    index_stats, tree_stats = [], []
+
+    def index_search(query):
+        stats = {}
+        index.search(query, max_distance, stats)
+        index_stats.append(stats['candidates'])
+
+    def tree_search(query):
+        stats = {}
+        tree.search(query, max_distance, stats)
+        tree_stats.append(stats['visited'])
+
+    def linear_search(query):
+        distance = distance_from(query)
+        return [phrase for phrase in phrases if distance(phrase) <= max_distance]
+
+    return {
+        "deletion_index_us": per_query_us(index_search, number),
+        "deletion_index_candidates": round(sum(index_stats) / len(index_stats), 1),
+        "deletion_variants": len(index.variants),
+        "bktree_us": per_query_us(tree_search, max(1, number // 10)),
+        "bktree_visited": round(sum(tree_stats) / len(tree_stats), 1),
+        "linear_us": per_query_us(linear_search, 1),
+    }
+
+
+def main(argv=None):
+    """错别字查找基准测试入口"""
+    arg_parser = argparse.ArgumentParser(
+        description="错别字查找基准：对称删除索引 vs BK 树 vs 逐个比较，词典规模逐步增大")
+    arg_parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[124, 1000, 5000, 20000],
+                            help="词典规模")
+    arg_parser.add_argument("-n", "--number", type=int, default=200, help="每个查询的重复次数")
+    args = arg_parser.parse_args(argv)
+
+    parser = DSLParser(None, intent_cache_size=0)
+    rng = random.Random(2024)
+    growth = []
+    for size in args.sizes:
+        phrases = build_lexicon(parser, size, rng)
+        growth.append({
+            "size": len(phrases),
+            "distance_1": measure(phrases, 1, args.number),
+            "distance_2": measure(phrases, 2, args.number),
+        })
+    print(json.dumps({
+        "queries": {query: parser.typo_candidates(query) for query in QUERIES},
+        "growth": growth,
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# test/test_automaton.py
+
+import sys
+import os
+
+import pytest
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.automaton import AhoCorasick
+from dsl.parser import DSLParser
+
+
+def test_finds_overlapping_matches():
+    """经典例子 he/she/his/hers：一次扫描找出全部重叠命中"""
+    automaton = AhoCorasick()
+    for word in ("he", "she", "his", "hers"):
+        automaton.add(word, word)
+    automaton.build()
+    matches = sorted((start, end, word) for start, end, word in automaton.iter_matches("ushers"))
+    assert matches == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_pattern_with_several_payloads():
+    """同一个模式串可以挂多个负载，重复添加同一负载只记录一次"""
+    automaton = AhoCorasick()
+    automaton.add("喜欢", "command")
+    automaton.add("喜欢", "preference")
+    automaton.add("喜欢", "preference")
+    automaton.build()
+    assert automaton.find_all("不喜欢") == [(1, 3, "command"), (1, 3, "preference")]
+
+
+def test_cannot_add_after_build():
+    """构建后不能再添加模式串"""
+    automaton = AhoCorasick().build()
+    with pytest.raises(RuntimeError):
+        automaton.add("你好", "打招呼")
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return DSLParser(None)
+
+
+def test_scan_prefers_longest_command(parser):
+    """命令取最长命中；槽位取词典中最靠前的命中"""
+    hits = parser.scan_lexicons("我想吃辣的面条")
+    assert hits['command'] == "设置种类"
+    assert hits['preference'] == "喜欢"
+    assert hits['flavor'] == "辣"
+    assert hits['kind'] == "面"
+
+
+def test_find_best_command_extracts_slots(parser):
+    """命令选择与槽位提取来自同一次扫描"""
+    assert parser.find_best_command(parser.extract_context("说快点")) == ("调整语速", None, "快点")
+    assert parser.find_best_command(parser.extract_context("讨厌甜口")) == ("设置口味", "不喜欢", "甜")
+    assert parser.find_best_command(parser.extract_context("无所谓米饭")) == ("设置种类", "随便", "米")
+
+
+def test_suggestions_follow_dictionary_order(parser):
+    """建议按词典顺序去重，不包含只命中命令名的命令"""
+    assert parser.get_suggestions("天气预报说快点") == "查询天气、调整语速"
+    # “退出”只是命令名，不是同义词，不在字面命中的建议中，改由二元组打分给出
+    assert parser.scan_lexicons("退出")["suggestions"] == []
+    assert parser.get_suggestions("退出") == "退出"
+    # 与任何命令都不相似时返回默认的功能列表
+    assert parser.get_suggestions("abc").startswith("打招呼、推荐食堂")
+
+
+def test_combined_intention_regex_matches_pattern_loop(parser):
+    """组合正则与逐个命令、逐个模式调用 re.match 的结果一致"""
+    import re
+
+    def loop_match(text):
+        for cmd, patterns in parser.intention_patterns.items():
+            if any(re.match(pattern, text) for pattern in patterns):
+                return cmd
+        return None
+
+    for text in ("哪个餐厅好", "今天吃什么呢", "去哪儿吃", "早上好", "语速快一点",
+                 "我喜欢的歌", "随便吧", "完全无关的话", ""):
+        assert parser.match_intention(text) == loop_match(text), text
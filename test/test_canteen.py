@@ -0,0 +1,94 @@
+# test/test_canteen.py
+
+import sys
+import os
+import math
+import random
+from collections import Counter
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+
+from src.canteen import AliasTable, alias_table, load_canteens
+from src.robot import Robot
+
+DRAWS = 200000
+
+
+def chi_square_critical(df: int, z: float = 3.09) -> float:
+    """卡方分布上侧 0.1% 分位数的 Wilson–Hilferty 近似"""
+    return df * (1 - 2 / (9 * df) + z * math.sqrt(2 / (9 * df))) ** 3
+
+
+def assert_matches_weights(counts: Counter, weights, draws: int):
+    """拟合优度检验：经验分布与配置的权重一致（显著性水平 0.1%）"""
+    total = math.fsum(weights)
+    expected = [draws * weight / total for weight in weights]
+    statistic = sum((counts[i] - e) ** 2 / e for i, e in enumerate(expected) if e > 0)
+    df = sum(1 for e in expected if e > 0) - 1
+    assert statistic < chi_square_critical(df), (statistic, counts, expected)
+    assert all(counts[i] == 0 for i, e in enumerate(expected) if e == 0)
+
+
+@pytest.mark.parametrize("weights", [
+    [1, 1, 1, 1, 1, 1, 0.2, 0.1, 0.1],
+    [1, 0.004],
+    [0.3, 0, 2.5, 1e-3, 7],
+    [5],
+])
+def test_table_represents_weights_exactly(weights):
+    table = AliasTable(weights)
+    total = math.fsum(weights)
+    assert table.distribution() == pytest.approx([weight / total for weight in weights], abs=1e-12)
+
+
+@pytest.mark.parametrize("weights", [
+    [1, 1, 1, 1, 1, 1, 0.2, 0.1, 0.1],
+    [1, 0.004],  # 按 int(prob * 100) 展开时这一项会被丢掉
+    [0.3, 0, 2.5, 1e-3, 7],
+])
+def test_empirical_distribution_matches_weights(weights):
+    table, rng = AliasTable(weights), random.Random(2024)
+    counts = Counter(table.sample(rng) for _ in range(DRAWS))
+    assert_matches_weights(counts, weights, DRAWS)
+
+
+@pytest.mark.parametrize("weights", [[], [1, -0.5], [float("nan")], [0, 0]])
+def test_invalid_weights(weights):
+    with pytest.raises(ValueError):
+        AliasTable(weights)
+
+
+def test_table_cached_by_weights():
+    assert alias_table((1.0, 0.5)) is alias_table((1.0, 0.5))
+    assert alias_table((1.0, 0.5)) is not alias_table((1.0, 0.25))
+
+
+def test_load_canteens(tmp_path):
+    path = tmp_path / "canteen_list.csv"
+    path.write_text("名称,位置,权重\n一食堂,东区,0.75\n不完整的行,西区\n二食堂, 西区 ,0.005\n", encoding='utf-8')
+    assert load_canteens(str(path)) == [
+        {"name": "一食堂", "location": "东区", "prob": 0.75},
+        {"name": "二食堂", "location": "西区", "prob": 0.005},
+    ]
+    path.write_text("名称,位置,权重\n一食堂,东区,-1\n", encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_canteens(str(path))
+
+
+def test_robot_samples_configured_canteens():
+    """机器人从 canteen_list.csv 加载食堂，推荐结果的分布与文件中的权重一致"""
+    robot = Robot()
+    assert [canteen["name"] for canteen in robot.canteens][:2] == ["风味餐厅", "学宜餐厅"]
+    assert robot.for_session(robot.state).canteen_table is robot.canteen_table
+
+    random.seed(2024)
+    names = [canteen["name"] for canteen in robot.canteens]
+    counts = Counter(names.index(robot.random_canteen()["name"]) for _ in range(DRAWS))
+    assert_matches_weights(counts, [canteen["prob"] for canteen in robot.canteens], DRAWS)
+
+    robot.recommend_canteen()
+    assert robot.last_recommendation in names
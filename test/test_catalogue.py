@@ -0,0 +1,145 @@
+# test/test_catalogue.py
+
+import sys
+import os
+import csv
+import subprocess
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+
+from src import catalogue as catalogue_module
+from src.catalogue import catalogue_cache_path, load_catalogue, open_catalogue
+from src.robot import Robot
+
+FOOD_CSV = os.path.join(PROJECT_ROOT, 'resources', 'food_list.csv')
+
+SAMPLE = "名称,种类,口味\n经典炒饭,米,咸\n酸辣粉,面,酸辣\n番茄牛腩盖饭,米,酸/甜\n不完整的行,米\n白粥,米,\n"
+
+
+def legacy_food_data(csv_path):
+    """原先 Robot.load_food_data 的逐行解析，作为对照"""
+    food_list = []
+    with open(csv_path, encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 3:
+                continue
+            flavors_raw = row[2].strip()
+            flavors = [ch for s in flavors_raw.split('/') for ch in s] if flavors_raw else []
+            food_list.append({"name": row[0].strip(), "flavors": flavors, "kind": row[1].strip()})
+    return food_list
+
+
+def same_foods(catalogue, food_list):
+    """目录中的口味按口味表排序，比较时忽略每道菜内的口味顺序"""
+    assert len(catalogue) == len(food_list)
+    for row, food in enumerate(food_list):
+        got = catalogue.food(row)
+        assert (got["name"], got["kind"], sorted(got["flavors"])) == \
+            (food["name"], food["kind"], sorted(set(food["flavors"])))
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    path = tmp_path / "food_list.csv"
+    path.write_text(SAMPLE, encoding='utf-8')
+    return str(path)
+
+
+def test_matches_legacy_parsing():
+    catalogue = open_catalogue(FOOD_CSV)
+    same_foods(catalogue, legacy_food_data(FOOD_CSV))
+    # 种类和口味字符串只保存一份
+    assert all(catalogue.food(row)["kind"] is catalogue.kinds[catalogue.kind_codes[row]]
+               for row in range(len(catalogue)))
+
+
+def test_columns_are_read_only_views_of_the_mapping(sample_csv, tmp_path):
+    catalogue = open_catalogue(sample_csv, str(tmp_path / "cache"))
+    assert catalogue.path == catalogue_cache_path(sample_csv, str(tmp_path / "cache"))
+    for column in (catalogue.kind_codes, catalogue.flavor_bits, catalogue.name_offsets):
+        assert not column.flags.writeable
+        assert not column.flags.owndata
+    with pytest.raises(ValueError):
+        catalogue.flavor_bits[0] = 0
+    assert [catalogue.name(row) for row in range(len(catalogue))] == ["经典炒饭", "酸辣粉", "番茄牛腩盖饭", "白粥"]
+    assert catalogue.flavors_of(3) == []
+
+
+def test_cache_rebuilt_only_when_csv_changes(sample_csv, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    assert open_catalogue(sample_csv, cache_dir).origin == "rebuilt"
+    assert open_catalogue(sample_csv, cache_dir).origin == "mapped"
+
+    # 只改 mtime：内容哈希相同，沿用缓存并刷新文件头中的时间戳
+    stat = os.stat(sample_csv)
+    os.utime(sample_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    touched = open_catalogue(sample_csv, cache_dir)
+    assert touched.origin == "mapped"
+    assert touched.source_mtime_ns == stat.st_mtime_ns + 10 ** 9
+    assert open_catalogue(sample_csv, cache_dir).origin == "mapped"
+
+    # 内容变化：重新生成，已映射的旧目录仍然可用
+    with open(sample_csv, 'a', encoding='utf-8') as f:
+        f.write("红豆饼,其他,甜\n")
+    changed = open_catalogue(sample_csv, cache_dir)
+    assert changed.origin == "rebuilt"
+    assert changed.name(len(changed) - 1) == "红豆饼"
+    assert touched.name(len(touched) - 1) == "白粥"
+
+
+def test_corrupt_cache_is_rebuilt(sample_csv, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cache_path = catalogue_cache_path(sample_csv, cache_dir)
+    os.makedirs(cache_dir)
+    with open(cache_path, 'wb') as f:
+        f.write(b"not a catalogue")
+    catalogue = open_catalogue(sample_csv, cache_dir)
+    assert catalogue.origin == "rebuilt"
+    same_foods(catalogue, legacy_food_data(sample_csv))
+
+
+def test_unwritable_cache_falls_back_to_memory(sample_csv, tmp_path):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    catalogue = open_catalogue(sample_csv, str(blocker / "cache"))
+    assert catalogue.origin == "memory"
+    same_foods(catalogue, legacy_food_data(sample_csv))
+
+
+def test_process_shares_one_catalogue(sample_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogue_module, "_catalogues", {})
+    cache_dir = str(tmp_path / "cache")
+    first = load_catalogue(sample_csv, cache_dir)
+    assert load_catalogue(sample_csv, cache_dir) is first
+    with open(sample_csv, 'a', encoding='utf-8') as f:
+        f.write("红豆饼,其他,甜\n")
+    assert load_catalogue(sample_csv, cache_dir) is not first
+
+
+def test_robots_share_the_catalogue():
+    first, second = Robot(), Robot()
+    assert first.catalogue is second.catalogue
+    assert first.load_food_data() == [first.catalogue.food(row) for row in range(len(first.catalogue))]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="需要 /proc/self/maps")
+def test_worker_process_maps_the_same_file(sample_csv, tmp_path):
+    """另一个进程直接映射已生成的缓存文件，不重新解析 CSV"""
+    cache_dir = str(tmp_path / "cache")
+    open_catalogue(sample_csv, cache_dir)
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from src.catalogue import load_catalogue\n"
+        "catalogue = load_catalogue(sys.argv[2], sys.argv[3])\n"
+        "print(catalogue.origin)\n"
+        "print(any(catalogue.path in line for line in open('/proc/self/maps')))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", script, PROJECT_ROOT, sample_csv, cache_dir],
+                            capture_output=True, text=True, check=True).stdout.split()
+    assert output == ["mapped", "True"]
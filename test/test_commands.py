@@ -0,0 +1,112 @@
+# test/test_commands.py
+
+import sys
+import os
+import random
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+
+from dsl.commands import (COMMANDS, SPEED_HELP_MESSAGES, SPEED_TIPS, Argument, ParsedCommand,
+                          register_command, robot_action)
+from dsl.grammar import canonical_forms
+from dsl.parser import DSLParser
+from test.test_parser import MockRobot
+
+
+@pytest.fixture
+def parser():
+    return DSLParser(MockRobot(), intent_cache_size=0)
+
+
+def test_dictionaries_generated_from_registry(parser):
+    """同义词、意图模式和语法分支的顺序都与命令的注册顺序一致"""
+    assert list(parser.command_synonyms) == list(COMMANDS)
+    assert list(parser.intention_patterns) == list(COMMANDS)
+    first_tokens = []
+    for tokens in canonical_forms(parser.grammar):
+        if tokens[0] not in first_tokens:
+            first_tokens.append(tokens[0])
+    assert first_tokens == list(COMMANDS)
+    assert parser.exact_commands["设置口味 喜欢 辣"] == ("设置口味", "喜欢", "辣")
+    assert parser.exact_commands["调整语速 快"] == ("调整语速", None, "快")
+
+
+def test_parsed_command_from_tokens():
+    """记号按命令声明的参数顺序分配到偏好与参数槽位"""
+    assert ParsedCommand.from_tokens(["设置种类", "不喜欢", "面"]) == ParsedCommand("设置种类", "不喜欢", "面")
+    assert ParsedCommand.from_tokens(["设置口味", "随便"]) == ParsedCommand("设置口味", "随便")
+    assert ParsedCommand.from_tokens(["播放音乐", "晴天"]).as_tuple() == ("播放音乐", None, "晴天")
+    assert ParsedCommand.from_tokens([]).name is None
+    with pytest.raises(AttributeError):
+        ParsedCommand("帮助").extra = 1
+
+
+def test_preference_commands_share_handler(parser):
+    """口味与种类共用同一套设置逻辑，美食推荐状态下偏好变化后立即更新推荐"""
+    assert parser.execute(ParsedCommand("设置口味", "喜欢", "辣")) == "设置口味偏好：喜欢 辣"
+    assert parser.execute(["设置种类", "随便"]) == "设置种类偏好：随便"
+    assert parser.execute(["设置种类", "喜欢"]).startswith("请指定您的种类偏好")
+    parser.robot.current_state = "美食推荐"
+    assert parser.execute(["设置口味", "不喜欢", "酸"]) == "设置口味偏好：不喜欢 酸 这是美食推荐"
+    # 参数不足时只给出提示，不触发后续动作
+    assert parser.execute(["设置口味"]).startswith("请指定您的口味偏好")
+
+
+def test_speed_mapping_and_tips(parser):
+    """语速表述映射到标准参数，未知表述与缺少参数时给出对应提示"""
+    assert parser.execute(["调整语速", " 说慢点 "]) == "语速已调整为：慢"
+    assert parser.execute(ParsedCommand("调整语速", param="标准速度")) == "语速已调整为：正常"
+    random.seed(3)
+    assert parser.execute(["调整语速", "中"]) in SPEED_TIPS
+    assert parser.execute(["调整语速"]) in SPEED_HELP_MESSAGES
+
+
+def test_unknown_and_empty_commands(parser):
+    assert parser.execute([]) == "抱歉，我没有理解您的指令"
+    assert parser.execute(["跳舞"]) == "未知命令: 跳舞"
+
+
+def test_registering_a_command_once():
+    """只注册一次，新建的解析器即可通过同义词、意图模式和语法识别并执行新命令"""
+    register_command(
+        "查询菜单",
+        synonyms=["看看菜单"],
+        patterns=[r".*菜单.*"],
+        handler=robot_action("query_time"),
+    )
+    try:
+        parser = DSLParser(MockRobot(), intent_cache_size=0)
+        assert parser.resolve_intent("看看菜单")[0] == "查询菜单"
+        assert parser.resolve_intent("今天的菜单是什么")[0] == "查询菜单"
+        assert parser.exact_commands["查询菜单"] == ("查询菜单", None, None)
+        assert parser.parse_command("看看菜单") == "现在是12:00"
+        with pytest.raises(ValueError):
+            register_command("查询菜单", [], [], robot_action("help"))
+    finally:
+        del COMMANDS["查询菜单"]
+
+
+def test_registered_arguments_filled_from_lexicons():
+    """参数声明的词典类别决定自然语言输入中的参数提取，兜底建议列表也由注册表生成"""
+    register_command(
+        "设置辣度",
+        synonyms=["辣度"],
+        patterns=[],
+        arguments=[Argument('param', ("酸", "甜", "辣", "咸"), optional=True, lexicon='flavor')],
+        handler=lambda parser, command: f"辣度已设置为：{command.param}",
+    )
+    register_command("隐藏功能", synonyms=["彩蛋"], patterns=[], handler=robot_action("help"), suggest=False)
+    try:
+        parser = DSLParser(MockRobot(), intent_cache_size=0)
+        assert parser.resolve_intent("辣度要麻辣的")[:3] == ("设置辣度", None, "辣")
+        assert parser.parse_command("辣度要麻辣的") == "辣度已设置为：辣"
+        fallback = parser.get_suggestions("%%%")
+        assert fallback.startswith("打招呼、推荐食堂") and fallback.endswith("换一首、设置辣度等功能")
+        assert "隐藏功能" not in fallback and "帮助" not in fallback
+    finally:
+        del COMMANDS["设置辣度"]
+        del COMMANDS["隐藏功能"]
@@ -0,0 +1,66 @@
+# test/test_context.py
+
+import sys
+import os
+
+import pytest
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.parser import DSLParser
+from dsl.context import ParseContext
+
+
+@pytest.fixture(scope="module")
+def parser():
+    # 关闭意图缓存，以便检查每次解析实际走过的路径
+    return DSLParser(None, intent_cache_size=0)
+
+
+def test_fields_computed_once_on_access(parser):
+    """字段在第一次访问时计算并缓存，computed 按顺序记录"""
+    context = parser.extract_context("请推荐一下美食！")
+    assert context.computed == []
+    assert context.normalized_text == "请推荐一下美食"
+    assert context['normalized_text'] == "请推荐一下美食"
+    assert context.is_polite is True
+    assert context.computed == ['normalized_text', 'is_polite']
+
+
+def test_unknown_field_raises(parser):
+    """未知字段按属性或下标访问时分别抛出 AttributeError 和 KeyError"""
+    context = ParseContext(parser, "你好")
+    with pytest.raises(AttributeError):
+        context.missing
+    with pytest.raises(KeyError):
+        context['missing']
+
+
+def test_natural_input_skips_segmentation(parser):
+    """不含语法命令关键词的输入不调用分词，含关键词的输入才尝试语法解析"""
+    cmd, _, _, features = parser.resolve_intent("今天有什么好吃的")
+    assert cmd == "推荐美食"
+    assert 'cleaned_text' not in features['computed']
+    assert 'clean_text' not in features['timings']
+
+    cmd, preference, param, features = parser.resolve_intent("设置口味 喜欢 辣")
+    assert (cmd, preference, param) == ("设置口味", "喜欢", "辣")
+    assert 'cleaned_text' in features['computed']
+
+
+def test_exact_table_matches_grammar(parser):
+    """精确匹配表中的每个规范形式与 pyparsing 的解析结果一致"""
+    from dsl.grammar import command
+    assert "设置口味 喜欢 辣" in parser.exact_commands
+    assert parser.exact_commands["调整语速 快"] == ("调整语速", None, "快")
+    for text, intent in parser.exact_commands.items():
+        tokens = command.parse_string(text, parse_all=True)
+        assert parser.tokens_to_command(tokens) == intent, text
+
+
+def test_resolve_paths(parser):
+    """分词结果为规范形式时走精确匹配，自然语言走同义词匹配"""
+    assert parser.resolve_intent("帮助")[3]['path'] == 'exact'
+    assert parser.resolve_intent("今天有什么好吃的")[3]['path'] == 'lexicon'
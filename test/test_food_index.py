@@ -0,0 +1,91 @@
+# test/test_food_index.py
+
+import sys
+import os
+import itertools
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+
+from src.catalogue import FoodCatalogue
+from src.food_index import FoodIndex
+from src.robot import Robot
+from src.session import SessionState
+
+FOODS = [
+    {"name": "经典炒饭", "kind": "米", "flavors": ["咸"]},
+    {"name": "宫保鸡丁盖饭", "kind": "米", "flavors": ["辣"]},
+    {"name": "番茄牛腩盖饭", "kind": "米", "flavors": ["酸", "甜"]},
+    {"name": "酸辣粉", "kind": "面", "flavors": ["酸", "辣"]},
+    {"name": "清汤牛肉面", "kind": "面", "flavors": ["咸"]},
+    {"name": "红豆饼", "kind": "其他", "flavors": ["甜"]},
+    {"name": "白粥", "kind": "米", "flavors": []},
+]
+
+
+def reference_filter(food_list, flavor_pref, kind_pref):
+    """逐个偏好用列表推导过滤，作为对照"""
+    filtered = food_list
+    for flavor, pref in flavor_pref.items():
+        if pref == "喜欢":
+            filtered = [f for f in filtered if flavor in f['flavors']]
+        elif pref == "不喜欢":
+            filtered = [f for f in filtered if flavor not in f['flavors']]
+    for kind, pref in kind_pref.items():
+        if pref == "喜欢":
+            filtered = [f for f in filtered if f['kind'] == kind]
+        elif pref == "不喜欢":
+            filtered = [f for f in filtered if f['kind'] != kind]
+    return filtered
+
+
+def all_preferences():
+    """枚举全部口味、种类偏好组合"""
+    state = SessionState()
+    flavors, kinds = list(state.flavor_pref), list(state.kind_pref)
+    for values in itertools.product((None, "喜欢", "不喜欢"), repeat=len(flavors) + len(kinds)):
+        yield dict(zip(flavors, values[:len(flavors)])), dict(zip(kinds, values[len(flavors):]))
+
+
+def sample_catalogue():
+    return FoodCatalogue.from_records([(food["name"], food["kind"], food["flavors"]) for food in FOODS])
+
+
+@pytest.mark.parametrize("catalogue", [sample_catalogue(), Robot().catalogue], ids=["sample", "food_list.csv"])
+def test_matches_reference_for_every_combination(catalogue):
+    index = FoodIndex(catalogue)
+    food_list = [catalogue.food(row) for row in range(len(catalogue))]
+    for flavor_pref, kind_pref in all_preferences():
+        expected = reference_filter(food_list, flavor_pref, kind_pref)
+        assert [food_list[row] for row in index.filter(flavor_pref, kind_pref)] == expected
+
+
+def test_unset_preferences_share_a_signature():
+    """未设置的偏好不计入签名，相同签名只计算一次"""
+    index = FoodIndex(sample_catalogue())
+    first = index.filter({"酸": None, "辣": "喜欢"}, {"米": None})
+    second = index.filter({"辣": "喜欢"}, {})
+    assert first is second
+    assert [index.catalogue.name(row) for row in first] == ["宫保鸡丁盖饭", "酸辣粉"]
+    assert index.select.cache_info().hits == 1
+
+
+def test_unknown_keys():
+    """没有任何食物具有的口味：喜欢时结果为空，不喜欢时不影响结果"""
+    index = FoodIndex(sample_catalogue())
+    assert index.filter({"苦": "喜欢"}, {}) == []
+    assert index.filter({"苦": "不喜欢"}, {"粉": "不喜欢"}) == list(range(len(FOODS)))
+
+
+def test_index_shared_across_sessions():
+    """会话视图共享同一个索引，各自的偏好得到各自的结果"""
+    robot = Robot()
+    spicy, plain = robot.for_session(SessionState()), robot.for_session(SessionState())
+    assert spicy.food_index is plain.food_index
+    spicy.set_flavor_preference("喜欢", "辣")
+    plain.set_kind_preference("不喜欢", "面")
+    assert all("辣" in food["flavors"] for food in spicy.filter_food())
+    assert all(food["kind"] != "面" for food in plain.filter_food())
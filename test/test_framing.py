@@ -0,0 +1,42 @@
+# test/test_framing.py
+
+import sys
+import os
+
+import pytest
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.framing import LineFramer, FrameTooLongError
+
+
+def test_message_split_across_packets():
+    """跨两次接收的消息只在收到换行符后作为一条指令返回"""
+    framer = LineFramer()
+    assert framer.feed("推荐".encode('utf-8')) == []
+    assert framer.feed("美食\n".encode('utf-8')) == ["推荐美食"]
+
+
+def test_multibyte_character_cut_at_boundary():
+    """被截断的多字节字符会等待后续字节，而不是解码失败"""
+    data = "查询天气\n".encode('utf-8')
+    framer = LineFramer()
+    assert framer.feed(data[:5]) == []
+    assert framer.feed(data[5:]) == ["查询天气"]
+
+
+def test_pipelined_commands():
+    """一次写入多条指令时按顺序全部返回，空行与 CRLF 被忽略"""
+    framer = LineFramer()
+    data = "你好\r\n\n推荐食堂\n几点了\n换".encode('utf-8')
+    assert framer.feed(data) == ["你好", "推荐食堂", "几点了"]
+    assert framer.pending() == len("换".encode('utf-8'))
+
+
+def test_line_too_long():
+    """未出现换行符的数据超过上限时报错"""
+    framer = LineFramer(max_line_length=8)
+    with pytest.raises(FrameTooLongError):
+        framer.feed(b"x" * 9)
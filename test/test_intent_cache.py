@@ -0,0 +1,81 @@
+# test/test_intent_cache.py
+
+import sys
+import os
+import threading
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.cache import IntentCache
+from dsl.parser import DSLParser
+
+
+def test_lru_eviction_and_counters():
+    """超出容量时淘汰最久未使用的条目，并统计命中、未命中和淘汰"""
+    cache = IntentCache(maxsize=2)
+    cache.put("a", ("打招呼", None, None, "lexicon"))
+    cache.put("b", ("帮助", None, None, "exact"))
+    assert cache.get("a") is not None
+    cache.put("c", ("退出", None, None, "exact"))
+    assert cache.get("b") is None
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 1,
+                             "evictions": 1, "invalidations": 0}
+
+
+def test_cache_keyed_by_normalized_text():
+    """标点、大小写和空白不同的输入命中同一条缓存，命中时不再扫描词典"""
+    parser = DSLParser(None)
+    first = parser.resolve_intent("Hello 推荐美食")
+    second = parser.resolve_intent("hello   推荐美食！")
+    assert first[3]['path'] != 'cache'
+    assert second[:3] == first[:3]
+    assert second[3]['path'] == 'cache'
+    assert second[3]['computed'] == ('normalized_text', 'intensity', 'is_urgent', 'is_polite')
+    assert parser.intent_cache.stats()["hits"] == 1
+
+
+def test_replies_are_not_cached():
+    """缓存只保存意图，命中缓存时回复仍由 execute 重新生成"""
+    class CountingRobot:
+        calls = 0
+
+        def recommend_food(self):
+            CountingRobot.calls += 1
+            return f"第 {CountingRobot.calls} 次推荐"
+
+    parser = DSLParser(CountingRobot())
+    assert parser.parse_command("推荐美食") == "第 1 次推荐"
+    assert parser.parse_command("推荐美食") == "第 2 次推荐"
+
+
+def test_rebuild_lexicons_invalidates_cache():
+    """修改词典后调用 rebuild_lexicons，旧的缓存结果不再生效"""
+    parser = DSLParser(None)
+    assert parser.resolve_intent("整点吃的")[0] is None
+    parser.command_synonyms["推荐美食"].append("整点吃的")
+    parser.rebuild_lexicons()
+    assert parser.resolve_intent("整点吃的")[0] == "推荐美食"
+    assert parser.intent_cache.stats()["invalidations"] == 1
+
+
+def test_shared_across_threads():
+    """多个会话视图并发解析时共享同一个缓存"""
+    parser = DSLParser(None)
+    views = [parser.for_robot(None) for _ in range(8)]
+    results = []
+
+    def worker(view):
+        for _ in range(50):
+            results.append(view.resolve_intent("几点了")[0])
+
+    threads = [threading.Thread(target=worker, args=(view,)) for view in views]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = parser.intent_cache.stats()
+    assert set(results) == {"查询时间"}
+    assert stats["hits"] + stats["misses"] == 400
+    assert stats["size"] == 1
@@ -0,0 +1,72 @@
+# test/test_ngram.py
+
+import sys
+import os
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+
+from dsl.ngram import BigramScorer, char_bigrams
+from dsl.parser import DSLParser
+from test.test_parser import MockRobot
+
+
+@pytest.fixture
+def parser():
+    return DSLParser(MockRobot(), intent_cache_size=0)
+
+
+def test_char_bigrams_with_boundaries():
+    assert char_bigrams("嗨") == ['\x02嗨', '嗨\x03']
+    assert char_bigrams(" 天 气 ") == ['\x02天', '天气', '气\x03']
+    assert char_bigrams("") == []
+
+
+def test_scorer_confidence_per_command():
+    """每个命令取其各短语相似度的最大值，完全相同的短语置信度为 1"""
+    scorer = BigramScorer({"查询天气": ["天气", "天气怎么样"], "查询时间": ["几点了"]})
+    assert scorer.phrases == 3
+    scores = scorer.score("天气怎么样")
+    assert scores.shape == (2,)
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[1] == 0
+    assert scorer.top_k("天汽怎么样") == [("查询天气", 0.6667)]
+    assert scorer.top_k("完全无关") == []
+
+
+def test_resolved_above_threshold(parser):
+    """同义词、意图模式和错别字纠正都未命中的输入，置信度达到阈值时直接执行"""
+    intent = parser.resolve_intent("推荐的")
+    assert intent[0] == "推荐美食"
+    assert intent[3]['path'] == 'ngram'
+    assert 'ngram' in intent[3]['timings']
+    assert parser.parse_command("天汽怎么样") == "今天天气晴朗"
+
+
+def test_low_confidence_becomes_suggestions(parser):
+    """置信度不足时不执行，只把最接近的命令作为建议"""
+    assert parser.resolve_intent("换首哥")[0] is None
+    assert parser.get_suggestions("换首哥") == "换一首"
+    assert parser.parse_command("换首哥") == "抱歉，我不太理解您的意思。您是想要换一首吗？"
+
+
+def test_scorer_rebuilt_with_lexicon(parser):
+    """修改同义词并重建词典后，打分矩阵包含新短语"""
+    assert parser.resolve_intent("来份宵夜单")[0] is None
+    parser.command_synonyms["推荐美食"].append("来份宵夜")
+    parser.rebuild_lexicons()
+    assert parser.score_intents("来份宵夜单", k=1) == [("推荐美食", 0.7303)]
+    assert parser.resolve_intent("来份宵夜单")[0] == "推荐美食"
+
+
+def test_scoring_ranks_long_inputs(parser):
+    """长句与错别字输入同样返回按置信度降序排列、不超过 k 条的候选；耗时见 test/run/run_ngram_benchmark.py"""
+    for text in ["天汽怎么样", "播方音乐", "我想知道今天中午去哪个地方吃点好的东西"]:
+        candidates = parser.score_intents(text)
+        assert 0 < len(candidates) <= parser.NGRAM_TOP_K
+        confidences = [confidence for _, confidence in candidates]
+        assert confidences == sorted(confidences, reverse=True)
+        assert all(0 < confidence <= 1 for confidence in confidences)
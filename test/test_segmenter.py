@@ -0,0 +1,65 @@
+# test/test_segmenter.py
+
+import sys
+import os
+
+import pytest
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.parser import DSLParser
+from dsl.segmenter import TrieSegmenter, load_dish_names
+
+
+def test_forward_maximum_match():
+    """优先取最长的词典词，未登录字符逐字切出，字母数字串整体切出"""
+    segmenter = TrieSegmenter()
+    segmenter.add("喜欢", "v")
+    segmenter.add("不喜欢", "v")
+    segmenter.add("辣", "a")
+    segmenter.add("辣", "n")
+    assert segmenter.words == 3
+    assert segmenter.cut("我不喜欢辣abc12") == [
+        ("我", "x"), ("不喜欢", "v"), ("辣", "a"), ("abc12", "eng")
+    ]
+    assert segmenter.cut("2024") == [("2024", "m")]
+
+
+def test_dish_names_loaded():
+    """菜品名称来自 food_list.csv，表头不计入"""
+    names = load_dish_names()
+    assert "经典炒饭" in names
+    assert "名称" not in names
+
+
+@pytest.fixture(scope="module")
+def parsers():
+    jieba_parser = DSLParser(None)
+    jieba_parser.warmup()
+    return jieba_parser, DSLParser(None, segmenter='trie')
+
+
+def test_trie_segmenter_matches_jieba_on_corpus(parsers):
+    """测试用例语料上，两种分词器得到的意图完全相同"""
+    jieba_parser, trie_parser = parsers
+    with open(os.path.join(PROJECT_ROOT, 'test', 'cases', 'test_cases.txt'), encoding='utf-8') as f:
+        corpus = [line.strip() for line in f if line.strip()]
+    for text in corpus:
+        assert trie_parser.resolve_intent(text)[:3] == jieba_parser.resolve_intent(text)[:3], text
+
+
+def test_trie_segmenter_keeps_grammar_forms_intact(parsers):
+    """字典树分词不会拆开语法关键词，规范形式直接命中精确匹配表"""
+    _, trie_parser = parsers
+    assert trie_parser.clean_text("请设置口味 不喜欢 辣吧") == "设置口味 不喜欢 辣"
+    cmd, preference, param, features = trie_parser.resolve_intent("设置口味 不喜欢 辣")
+    assert (cmd, preference, param) == ("设置口味", "不喜欢", "辣")
+    assert features['path'] == 'exact'
+
+
+def test_unknown_segmenter_rejected():
+    """未知分词器名称应在构造时报错"""
+    with pytest.raises(ValueError):
+        DSLParser(None, segmenter='hmm')
@@ -0,0 +1,353 @@
+# test/test_server.py
+
+import sys
+import os
+import json
+import time
+import socket
+import threading
+import urllib.request
+
+import pytest
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+# 无声卡环境下使用 SDL 的哑音频驱动
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from src.server import Server
+from src.debug_logging import LazyQueueHandler
+from src import transport
+
+
+def start_test_server(tmp_path, **kwargs) -> Server:
+    """在随机端口上启动服务器，日志写入临时目录"""
+    server = Server(host='127.0.0.1', port=0, log_directory=str(tmp_path), **kwargs)
+    server.start()
+    assert server.ready.wait(timeout=5), "服务器未能在规定时间内启动"
+    return server
+
+
+def read_response(reader) -> dict:
+    """从套接字文件对象中读取一行 JSON 响应"""
+    line = reader.readline()
+    assert line, "服务器关闭了连接"
+    return json.loads(line.decode('utf-8'))
+
+
+@pytest.mark.parametrize("engine", Server.ENGINES)
+def test_engine_serves_json_lines(tmp_path, engine):
+    """两种引擎都应返回欢迎语，并对每行指令回复一行 JSON"""
+    server = start_test_server(tmp_path, engine=engine)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as conn:
+            reader = conn.makefile('rb')
+            welcome = read_response(reader)
+            assert set(welcome) == {"reply", "state", "speed"}
+
+            conn.sendall("查询时间\n".encode('utf-8'))
+            reply = read_response(reader)
+            assert reply["reply"]
+            assert reply["speed"] == 200
+            # 第一条消息在解析器预热完成后才处理
+            assert server.parser_warm.is_set()
+            assert server.warmup_seconds is not None
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize("engine", Server.ENGINES)
+def test_welcome_waits_for_warmup(tmp_path, engine):
+    """欢迎语同样等待后台预热完成，不在连接处理线程中加载分词器"""
+    server = Server(host='127.0.0.1', port=0, log_directory=str(tmp_path), engine=engine)
+    warmup = server.parse_backend.warmup
+
+    def slow_warmup():
+        time.sleep(0.3)
+        return warmup()
+
+    server.parse_backend.warmup = slow_warmup
+    server.start()
+    assert server.ready.wait(timeout=5)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as conn:
+            read_response(conn.makefile('rb'))
+            assert server.parser_warm.is_set()
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize("engine", Server.ENGINES)
+def test_unix_socket_transport(tmp_path, engine):
+    """两种引擎都可监听 Unix 套接字文件，协议与 TCP 相同，停止后删除套接字文件"""
+    socket_path = str(tmp_path / "server.sock")
+    server = start_test_server(tmp_path, engine=engine, unix_path=socket_path)
+    try:
+        with transport.connect(server.host, server.port, socket_path, timeout=5) as conn:
+            assert conn.family == socket.AF_UNIX
+            reader = conn.makefile('rb')
+            read_response(reader)
+            conn.sendall("查询时间\n".encode('utf-8'))
+            assert read_response(reader)["reply"]
+    finally:
+        server.stop()
+    assert not os.path.exists(socket_path)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="抽象命名空间仅在 Linux 上可用")
+@pytest.mark.parametrize("engine", Server.ENGINES)
+def test_abstract_unix_socket(tmp_path, engine):
+    """'@' 开头的路径使用抽象命名空间，不在文件系统中创建文件"""
+    name = f"@ushalleat-test-{os.getpid()}-{engine}"
+    server = start_test_server(tmp_path, engine=engine, unix_path=name)
+    try:
+        with transport.connect(server.host, server.port, name, timeout=5) as conn:
+            reader = conn.makefile('rb')
+            read_response(reader)
+            conn.sendall("帮助\n".encode('utf-8'))
+            assert read_response(reader)["reply"]
+    finally:
+        server.stop()
+
+
+def test_unknown_engine_rejected():
+    """未知引擎名称应在构造时报错"""
+    with pytest.raises(ValueError):
+        Server(engine="forking")
+
+
+def test_sessions_do_not_share_preferences(tmp_path):
+    """不同连接的口味设置互不影响"""
+    server = start_test_server(tmp_path)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as first, \
+                socket.create_connection((server.host, server.port), timeout=5) as second:
+            first_reader = first.makefile('rb')
+            second_reader = second.makefile('rb')
+            read_response(first_reader)
+            read_response(second_reader)
+
+            first.sendall("我喜欢吃辣\n".encode('utf-8'))
+            assert read_response(first_reader)["state"] == "口味设置"
+            second.sendall("查询时间\n".encode('utf-8'))
+            assert read_response(second_reader)["state"] == "默认状态"
+
+            states = list(server.sessions.sessions.values())
+            assert len(states) == 2
+            assert sorted(state.flavor_pref["辣"] or "" for state in states) == ["", "喜欢"]
+            assert server.robot.flavor_pref["辣"] is None
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize("engine", Server.ENGINES)
+def test_session_limit_and_idle_timeout(tmp_path, engine):
+    """超出 max_sessions 的连接被拒绝，已有连接的偏好保持不变，空闲超时的连接被断开"""
+    server = start_test_server(tmp_path, engine=engine, max_sessions=1, session_idle_timeout=0.5)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as first:
+            first_reader = first.makefile('rb')
+            read_response(first_reader)
+            first.sendall("我喜欢吃辣\n".encode('utf-8'))
+            assert read_response(first_reader)["state"] == "口味设置"
+
+            with socket.create_connection((server.host, server.port), timeout=5) as second:
+                second_reader = second.makefile('rb')
+                assert "上限" in read_response(second_reader)["reply"]
+                assert second_reader.readline() == b""
+
+            state = next(iter(server.sessions.sessions.values()))
+            assert state.flavor_pref["辣"] == "喜欢"
+            assert "没有发送消息" in read_response(first_reader)["reply"]
+            assert first_reader.readline() == b""
+
+        # 空闲连接断开后会话被释放，新连接可以进入
+        with socket.create_connection((server.host, server.port), timeout=5) as third:
+            assert set(read_response(third.makefile('rb'))) == {"reply", "state", "speed"}
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize("engine", Server.ENGINES)
+def test_pipelined_and_split_messages(tmp_path, engine):
+    """一次写入多条指令、以及被拆开发送的指令都能得到逐条回复"""
+    server = start_test_server(tmp_path, engine=engine)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as conn:
+            reader = conn.makefile('rb')
+            read_response(reader)
+
+            conn.sendall("查询时间\n推荐食堂\n推荐".encode('utf-8'))
+            assert read_response(reader)["state"] == "默认状态"
+            assert read_response(reader)["state"] == "食堂推荐"
+            conn.sendall("美食\n".encode('utf-8'))
+            assert read_response(reader)["state"] == "美食推荐"
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize("engine", Server.ENGINES)
+def test_oversized_message_disconnects(tmp_path, engine):
+    """超长消息会收到提示并被断开连接"""
+    server = start_test_server(tmp_path, engine=engine, max_line_length=64)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as conn:
+            reader = conn.makefile('rb')
+            read_response(reader)
+
+            conn.sendall(b"a" * 256)
+            assert "过长" in read_response(reader)["reply"]
+            assert reader.readline() == b""
+    finally:
+        server.stop()
+
+
+def test_stop_drains_chat_log(tmp_path):
+    """停止服务器时先写完对话日志，再将其重命名为带时间戳的文件"""
+    server = start_test_server(tmp_path)
+    with socket.create_connection((server.host, server.port), timeout=5) as conn:
+        reader = conn.makefile('rb')
+        read_response(reader)
+        conn.sendall("查询时间\n".encode('utf-8'))
+        read_response(reader)
+    server.stop()
+
+    assert not os.path.exists(os.path.join(tmp_path, "chat.log"))
+    archived = [name for name in os.listdir(tmp_path) if name.endswith(".log")]
+    assert len(archived) == 1
+    with open(os.path.join(tmp_path, archived[0]), encoding="utf-8") as log_file:
+        speakers = [line.split(",", 1)[0] for line in log_file]
+    assert speakers == ["机器人", "用户", "机器人"]
+
+
+def test_stop_without_traffic_leaves_no_log(tmp_path):
+    """没有任何对话时不创建、也不归档空的日志文件"""
+    server = start_test_server(tmp_path)
+    server.stop()
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".log")] == []
+
+
+@pytest.mark.parametrize("engine", Server.ENGINES)
+def test_stop_waits_for_messages_in_flight(tmp_path, engine):
+    """停止时正在处理的消息处理完毕后才关闭对话日志，其对话仍写入归档的日志"""
+    server = start_test_server(tmp_path, engine=engine)
+    generate_reply = server.generate_reply
+    received = threading.Event()
+
+    def slow_reply(message, session):
+        received.set()
+        time.sleep(0.3)
+        return generate_reply(message, session)
+
+    server.generate_reply = slow_reply
+    with socket.create_connection((server.host, server.port), timeout=5) as conn:
+        read_response(conn.makefile('rb'))
+        conn.sendall("查询时间\n".encode('utf-8'))
+        assert received.wait(timeout=5)
+        server.stop()
+
+    logs = [name for name in os.listdir(tmp_path) if name.endswith(".log")]
+    assert len(logs) == 1
+    with open(os.path.join(tmp_path, logs[0]), encoding='utf-8') as f:
+        speakers = [line.split(',', 1)[0] for line in f]
+    assert speakers == ["机器人", "用户", "机器人"]
+
+
+def test_process_parse_backend(tmp_path):
+    """进程池后端解析意图，命令仍作用于服务器进程中的会话状态"""
+    server = start_test_server(tmp_path, parse_backend="process", parse_processes=1)
+    # 欢迎语和普通消息都不应在服务器进程中解析意图
+    local_resolves = []
+    server.parser.resolve_intent = local_resolves.append
+    try:
+        with socket.create_connection((server.host, server.port), timeout=30) as conn:
+            reader = conn.makefile('rb')
+            assert "抱歉" not in read_response(reader)["reply"]
+
+            conn.sendall("我喜欢吃辣\n".encode('utf-8'))
+            assert read_response(reader)["state"] == "口味设置"
+            assert local_resolves == []
+            state = next(iter(server.sessions.sessions.values()))
+            assert state.flavor_pref["辣"] == "喜欢"
+            stats = server.parse_backend.stats()
+            assert stats["backend"] == "process"
+            assert stats["workers"] == 1
+
+            # 工作进程的意图缓存统计随结果带回
+            conn.sendall("我喜欢吃辣\n".encode('utf-8'))
+            read_response(reader)
+            cache_stats = server.parse_backend.stats()["intent_cache"]
+            assert (cache_stats["hits"], cache_stats["invalidations"]) == (1, 0)
+
+            # 新增的同义词在重建词典后由工作进程识别，原有的缓存结果不再使用
+            assert server.parse_backend.resolve("咕噜咕噜")[0] != "推荐美食"
+            server.parser.command_synonyms["推荐美食"].append("咕噜咕噜")
+            server.rebuild_lexicons()
+            assert server.parse_backend.resolve("咕噜咕噜")[0] == "推荐美食"
+            conn.sendall("我喜欢吃辣\n".encode('utf-8'))
+            assert read_response(reader)["state"] == "口味设置"
+            cache_stats = server.parse_backend.stats()["intent_cache"]
+            assert (cache_stats["hits"], cache_stats["invalidations"], cache_stats["size"]) == (1, 1, 2)
+    finally:
+        server.stop()
+
+
+def test_stats_control_and_metrics_endpoint(tmp_path):
+    """stats 控制指令与 Prometheus 端点都能反映已处理的指令"""
+    server = start_test_server(tmp_path, metrics_port=0)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as conn:
+            reader = conn.makefile('rb')
+            read_response(reader)
+            conn.sendall("推荐食堂\n".encode('utf-8'))
+            read_response(reader)
+            # 不含语法命令关键词的消息不需要分词
+            conn.sendall("有什么好吃的\n".encode('utf-8'))
+            read_response(reader)
+
+            conn.sendall(b'{"control": "stats"}\n')
+            stats = read_response(reader)["stats"]
+            assert stats["metrics"]["commands"]["推荐食堂"]["count"] == 1
+            assert stats["metrics"]["stages"]["find_best_command"]["count"] >= 1
+            parser_stats = stats["metrics"]["parser"]
+            assert parser_stats["messages"] == 2
+            assert parser_stats["context_fields"]["lexicon_hits"] == 2
+            assert parser_stats["context_fields"]["cleaned_text"] == 1
+            assert sum(parser_stats["paths"].values()) == 2
+            assert parser_stats["hit_rates"]["lexicon"] > 0
+            assert stats["sessions"]["sessions"] == 1
+
+        host, port = server.metrics_server.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            body = response.read().decode('utf-8')
+        assert 'ushalleat_commands_total{command="推荐食堂"} 1' in body
+        assert 'ushalleat_stage_latency_seconds_count{stage="send"}' in body
+        assert 'ushalleat_context_field_computed_total{field="cleaned_text"} 1' in body
+        # 欢迎语与两条消息各未命中一次
+        assert 'ushalleat_intent_cache_misses 3' in body
+        assert 'ushalleat_weather_cache_fetches 0' in body
+    finally:
+        server.stop()
+
+
+def test_debug_logging_setup_is_idempotent(tmp_path):
+    """重复创建 Server 不会重复添加日志处理器，环形缓冲区可按需导出"""
+    first = Server(port=0, log_directory=str(tmp_path))
+    second = Server(port=0, log_directory=str(tmp_path))
+    assert first.debug_logger is second.debug_logger
+    queue_handlers = [handler for handler in second.debug_logger.handlers
+                      if isinstance(handler, LazyQueueHandler)]
+    assert len(queue_handlers) == 1
+
+    server = start_test_server(tmp_path)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as conn:
+            reader = conn.makefile('rb')
+            read_response(reader)
+            conn.sendall(b'{"control": "debug_dump"}\n')
+            lines = read_response(reader)["debug_log"]
+            assert any("服务器已启动" in line for line in lines)
+    finally:
+        server.stop()
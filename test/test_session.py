@@ -0,0 +1,73 @@
+# test/test_session.py
+
+import sys
+import os
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.session import SessionRegistry
+
+
+def test_acquire_returns_same_state():
+    """同一会话 ID 返回同一个状态对象"""
+    registry = SessionRegistry()
+    state = registry.acquire("a")
+    state.speed = 240
+    assert registry.acquire("a") is state
+
+
+def test_lru_eviction():
+    """超出容量时淘汰最久未使用的会话"""
+    registry = SessionRegistry(max_sessions=2)
+    registry.acquire("a")
+    registry.acquire("b")
+    registry.acquire("a")
+    registry.acquire("c")
+    assert registry.get("b") is None
+    assert registry.get("a") is not None
+    assert registry.stats() == {"sessions": 2, "evictions": 1}
+
+
+def test_idle_eviction():
+    """空闲超时的会话在下一次访问时被淘汰"""
+    registry = SessionRegistry(idle_timeout=0.0)
+    registry.acquire("a")
+    registry.acquire("b")
+    assert registry.get("a") is None
+    assert len(registry) == 1
+
+
+def test_release():
+    """连接关闭后会话被移除"""
+    registry = SessionRegistry()
+    registry.acquire("a")
+    registry.release("a")
+    assert len(registry) == 0
+
+
+def test_pinned_sessions_not_evicted():
+    """固定的会话不因容量或空闲超时被淘汰，释放后才移除"""
+    registry = SessionRegistry(max_sessions=2, idle_timeout=0.0)
+    live = registry.pin("a")
+    live.speed = 240
+    registry.pin("b")
+    registry.acquire("c")
+    registry.acquire("d")
+    assert registry.acquire("a") is live
+    assert registry.get("b") is not None
+    assert registry.get("c") is None
+    registry.release("a")
+    assert registry.get("a") is None
+    assert registry.stats() == {"sessions": 1, "evictions": 2}
+
+
+def test_pin_limited_to_max_sessions():
+    """固定的会话达到上限时拒绝新连接，释放后可再固定"""
+    registry = SessionRegistry(max_sessions=1)
+    assert registry.pin("a") is not None
+    assert registry.pin("b") is None
+    assert registry.get("b") is None
+    registry.release("a")
+    assert registry.pin("b") is not None
@@ -0,0 +1,114 @@
+# test/test_typo.py
+
+import sys
+import os
+import time
+import random
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+
+from dsl.typo import TypoIndex, deletions, levenshtein
+from dsl.parser import DSLParser
+from test.test_parser import MockRobot
+
+
+@pytest.fixture
+def parser():
+    return DSLParser(MockRobot(), intent_cache_size=0)
+
+
+def test_levenshtein():
+    assert levenshtein("推荐美食", "推荐美时") == 1
+    assert levenshtein("换首歌", "换一首") == 2
+    assert levenshtein("", "天气") == 2
+    assert levenshtein("kitten", "sitting") == 3
+
+
+def test_levenshtein_matches_dynamic_programming():
+    """位并行算法与逐格动态规划的结果一致"""
+    def reference(a, b):
+        previous = list(range(len(b) + 1))
+        for i, char_a in enumerate(a, 1):
+            current = [i]
+            for j, char_b in enumerate(b, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+            previous = current
+        return previous[-1]
+
+    rng = random.Random(3)
+    for _ in range(2000):
+        a = ''.join(rng.choice("推荐美食abc") for _ in range(rng.randint(0, 8)))
+        b = ''.join(rng.choice("推荐美食abc") for _ in range(rng.randint(0, 8)))
+        assert levenshtein(a, b) == reference(a, b)
+
+
+def test_deletions():
+    assert deletions("天气", 1) == {"天气", "天", "气"}
+    assert deletions("天气", 5) == {"天气", "天", "气", ""}
+
+
+def test_search_matches_linear_scan():
+    """索引的查询结果与逐个计算编辑距离一致，且只核对少量候选"""
+    rng = random.Random(5)
+    alphabet = "推荐美食堂播放音乐天气时间"
+    words = list(dict.fromkeys(''.join(rng.choice(alphabet) for _ in range(rng.randint(2, 6)))
+                               for _ in range(2000)))
+    index = TypoIndex(max_distance=2)
+    for order, word in enumerate(words):
+        assert index.add(word, order)
+    assert not index.add(words[0], "重复")
+    assert len(index) == len(words)
+
+    for query in ("推荐美食", "播放音", "天气时间乐"):
+        for max_distance in (1, 2):
+            stats = {}
+            expected = sorted((levenshtein(query, word), order, word) for order, word in enumerate(words)
+                              if levenshtein(query, word) <= max_distance)
+            assert index.search(query, max_distance, stats) == [(dist, word, order)
+                                                                for dist, order, word in expected]
+            if max_distance == 1:
+                assert stats['candidates'] < len(words) / 10
+    with pytest.raises(ValueError):
+        index.search("推荐", 3)
+
+
+def test_search_skips_queries_longer_than_any_word():
+    """比最长的词长出最大编辑距离以上的查询直接返回空结果，不生成删除变体"""
+    index = TypoIndex(max_distance=2)
+    index.add("推荐美食")
+    stats = {}
+    assert index.search("推荐美食堂吧", 2, stats) == [(2, "推荐美食", None)]
+    assert index.search("推荐美食堂吧呀", 2, stats) == []
+    assert stats == {'probes': 0, 'candidates': 0}
+
+
+def test_distance_one_is_corrected(parser):
+    """与唯一一个命令的短语只差一个字时直接纠正"""
+    intent = parser.resolve_intent("播方音乐")
+    assert intent[0] == "播放音乐"
+    assert intent[3]['path'] == 'typo'
+    assert 'typo' in intent[3]['timings']
+    assert parser.parse_command("推荐美时") == "这是美食推荐"
+    assert parser.parse_command("查询天汽") == "今天天气晴朗"
+
+
+def test_short_inputs_only_suggested(parser):
+    """过短的输入即使只差一个字也不自动纠正，只作为排在前面的建议"""
+    assert parser.correct_typo("换首哥") is None
+    assert parser.typo_candidates("换首哥") == [("换一首", 1)]
+    assert parser.get_suggestions("听首歌") == "换一首、播放音乐"
+    assert parser.typo_candidates("我") == []
+
+
+def test_long_unrecognized_input_is_fast(parser):
+    """一行接近长度上限的无法识别的输入也能很快得到回复"""
+    rng = random.Random(7)
+    text = ''.join(chr(rng.randint(0x4e00, 0x9fa5)) for _ in range(2700))
+    started = time.perf_counter()
+    reply = parser.parse_command(text)
+    assert time.perf_counter() - started < 1.0
+    assert reply.startswith("抱歉")
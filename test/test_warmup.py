@@ -0,0 +1,30 @@
+# test/test_warmup.py
+
+import sys
+import os
+import subprocess
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from dsl.parser import DSLParser
+
+
+def test_warmup_is_idempotent():
+    """预热后分词器就绪，再次调用几乎不耗时"""
+    parser = DSLParser(None)
+    parser.warmup()
+    assert parser.is_warm()
+    assert parser.warmup() < 0.05
+
+
+def test_warmup_persists_cache_in_directory(tmp_path):
+    """指定缓存目录时，新进程把 jieba 词典缓存写入该目录"""
+    script = ("import sys; from dsl.parser import DSLParser; "
+              "DSLParser(None).warmup(sys.argv[1])")
+    env = dict(os.environ, SDL_AUDIODRIVER="dummy")
+    subprocess.run([sys.executable, "-c", script, str(tmp_path)],
+                   cwd=PROJECT_ROOT, env=env, check=True, timeout=120,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    assert (tmp_path / "jieba.cache").exists()
@@ -0,0 +1,315 @@
+# test/test_weather.py
+
+import sys
+import os
+import json
+import random
+import socket
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 获取项目根目录的绝对路径
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+
+import requests
+
+from src.robot import Robot
+from src.server import Server
+from src.weather import CircuitBreaker, CircuitOpenError, WeatherCache, WeatherClient, WeatherError
+
+
+def weather_payload(temp: float, description: str = "晴") -> dict:
+    """OpenWeather 实时天气接口的返回格式"""
+    return {
+        "main": {"temp": temp, "humidity": 40, "pressure": 1012, "temp_min": temp - 2, "temp_max": temp + 2},
+        "weather": [{"description": description}],
+        "wind": {"speed": 3.1},
+    }
+
+
+class StubWeatherServer:
+    """本地的天气接口替身：记录请求次数和客户端端口，可以暂停响应、改变返回内容和状态码"""
+
+    def __init__(self):
+        self.requests = 0
+        self.client_ports = set()
+        self.status = 200
+        # 依次使用的状态码，用完后使用 status
+        self.statuses = []
+        self.payload = weather_payload(20.0)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.arrived = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # 保持连接，以便检查客户端是否复用连接
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests += 1
+                stub.client_ports.add(self.client_address[1])
+                stub.arrived.set()
+                stub.gate.wait(timeout=5)
+                body = json.dumps(stub.payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(stub.statuses.pop(0) if stub.statuses else stub.status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/data/2.5/weather?q=BEIJING"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.gate.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def stub():
+    server = StubWeatherServer()
+    yield server
+    server.close()
+
+
+def make_client(stub, **kwargs) -> WeatherClient:
+    """指向本地替身的客户端，重试时不真正等待"""
+    kwargs.setdefault("retries", 0)
+    kwargs.setdefault("sleep", lambda seconds: None)
+    return WeatherClient(stub.url, **kwargs)
+
+
+def make_cache(stub, clock=None, ttl=60.0, stale_ttl=600.0) -> WeatherCache:
+    return WeatherCache(make_client(stub).fetch, ttl, stale_ttl, clock or FakeClock())
+
+
+def test_fresh_data_served_from_cache(stub):
+    cache = make_cache(stub)
+    assert cache.get()["main"]["temp"] == 20.0
+    assert cache.get()["main"]["temp"] == 20.0
+    assert stub.requests == 1
+    assert cache.stats() == {"hits": 1, "stale_hits": 0, "misses": 1, "coalesced": 0, "fetches": 1, "failures": 0}
+
+
+def test_concurrent_misses_share_one_request(stub):
+    cache = make_cache(stub)
+    stub.gate.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert stub.arrived.wait(timeout=5)
+    while cache.stats()["coalesced"] < 7:
+        threading.Event().wait(0.01)
+    stub.gate.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    assert stub.requests == 1
+
+
+def test_stale_data_served_while_revalidating(stub):
+    clock = FakeClock()
+    cache = make_cache(stub, clock)
+    cache.get()
+
+    clock.now += 61
+    stub.payload = weather_payload(25.0)
+    stub.gate.clear()
+    # 上游阻塞时仍立即返回旧数据，重复调用不会发出第二个刷新请求
+    assert cache.get()["main"]["temp"] == 20.0
+    assert cache.get()["main"]["temp"] == 20.0
+    assert stub.arrived.wait(timeout=5)
+    stub.gate.set()
+    assert cache.join(timeout=5)
+    assert cache.get()["main"]["temp"] == 25.0
+    assert stub.requests == 2
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_data_older_than_stale_window_is_fetched_synchronously(stub):
+    clock = FakeClock()
+    cache = make_cache(stub, clock)
+    cache.get()
+    clock.now += 61 + 600
+    stub.payload = weather_payload(-3.0)
+    assert cache.get()["main"]["temp"] == -3.0
+    assert cache.stats()["misses"] == 2
+
+
+def test_failed_refresh_keeps_stale_data(stub):
+    clock = FakeClock()
+    cache = make_cache(stub, clock)
+    cache.get()
+    clock.now += 61
+    stub.status = 503
+    assert cache.get()["main"]["temp"] == 20.0
+    assert cache.join(timeout=5)
+    assert cache.stats()["failures"] == 1
+    # 刷新失败不更新时间戳，下一次调用再次刷新
+    stub.status = 200
+    stub.payload = weather_payload(22.0)
+    cache.get()
+    assert cache.join(timeout=5)
+    assert cache.get()["main"]["temp"] == 22.0
+
+
+def test_failed_miss_raises(stub):
+    stub.status = 500
+    cache = make_cache(stub)
+    with pytest.raises(WeatherError):
+        cache.get()
+    assert cache.data is None
+
+
+def test_robot_formats_cached_weather(stub):
+    cache = make_cache(stub)
+    robot = Robot(weather=cache)
+    stub.payload = weather_payload(3.0, "小雪")
+    reply = robot.query_weather()
+    assert "3.0°C" in reply
+    assert robot.for_session(robot.state).query_weather()
+    assert stub.requests == 1
+
+    stub.status = 500
+    failing = Robot(weather=make_cache(stub))
+    reply = failing.query_weather()
+    assert "天气" in reply and "意外错误" not in reply
+
+
+def test_client_reuses_one_connection(stub):
+    client = make_client(stub)
+    for _ in range(3):
+        assert client.fetch()["main"]["temp"] == 20.0
+    assert stub.requests == 3
+    assert len(stub.client_ports) == 1
+    client.close()
+
+
+def test_client_retries_with_jitter(stub):
+    sleeps = []
+    stub.statuses = [503, 502]
+    client = make_client(stub, retries=2, backoff=0.5, sleep=sleeps.append, rng=random.Random(7))
+    assert client.fetch()["main"]["temp"] == 20.0
+    assert stub.requests == 3
+    # 全抖动：第 n 次重试的等待在 [0, backoff * 2 ** n) 内
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] < 0.5 and 0 <= sleeps[1] < 1.0
+    assert client.stats()["retries"] == 2
+
+
+def test_client_does_not_retry_client_errors(stub):
+    stub.status = 404
+    client = make_client(stub, retries=2)
+    with pytest.raises(WeatherError):
+        client.fetch()
+    assert stub.requests == 1
+
+
+def test_client_read_timeout(stub):
+    stub.gate.clear()
+    client = make_client(stub, retries=1, read_timeout=0.2)
+    with pytest.raises(WeatherError) as excinfo:
+        client.fetch()
+    assert isinstance(excinfo.value.__cause__, requests.Timeout)
+    assert client.stats()["requests"] == 2
+
+
+def test_breaker_fails_fast_and_recovers(stub):
+    clock = FakeClock()
+    client = make_client(stub, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock))
+    stub.status = 500
+    for _ in range(2):
+        with pytest.raises(WeatherError):
+            client.fetch()
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    # 熔断期间不请求上游
+    with pytest.raises(CircuitOpenError):
+        client.fetch()
+    assert stub.requests == 2
+    assert client.stats()["short_circuited"] == 1
+
+    # 超时后放行一个探测请求：失败则重新打开，成功则关闭
+    clock.now += 30
+    with pytest.raises(WeatherError):
+        client.fetch()
+    assert client.breaker.state == CircuitBreaker.OPEN
+    clock.now += 30
+    stub.status = 200
+    assert client.fetch()["main"]["temp"] == 20.0
+    assert client.breaker.stats() == {"state": "closed", "consecutive_failures": 0, "times_opened": 2}
+
+
+def test_unexpected_error_recorded_as_failure():
+    """请求抛出意料之外的异常时同样计为失败，半开状态的探测请求失败后熔断器重新打开"""
+    class BrokenSession:
+        def get(self, url, timeout):
+            raise KeyError("main")
+
+    clock = FakeClock()
+    client = WeatherClient("http://127.0.0.1:9/", retries=0, session=BrokenSession(),
+                           breaker=CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock))
+    with pytest.raises(KeyError):
+        client.fetch()
+    assert client.breaker.state == CircuitBreaker.OPEN
+    clock.now += 30
+    with pytest.raises(KeyError):
+        client.fetch()
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.stats()["failures"] == 2
+    clock.now += 30
+    assert client.breaker.allow()
+
+
+def test_robot_reports_open_breaker(stub):
+    client = make_client(stub, breaker=CircuitBreaker(failure_threshold=1))
+    stub.status = 500
+    robot = Robot(weather=WeatherCache(client.fetch))
+    robot.query_weather()
+    assert robot.query_weather() == "天气服务暂时不可用，请稍后再查询哦～"
+    assert stub.requests == 1
+
+
+def test_server_exposes_upstream_latency_and_breaker_state(stub, tmp_path):
+    server = Server(host='127.0.0.1', port=0, log_directory=str(tmp_path), metrics_port=0, weather_url=stub.url)
+    server.start()
+    assert server.ready.wait(timeout=5)
+    try:
+        with socket.create_connection((server.host, server.port), timeout=5) as conn:
+            reader = conn.makefile('rb')
+            reader.readline()
+            conn.sendall("查询天气\n".encode('utf-8'))
+            assert "20.0°C" in json.loads(reader.readline().decode('utf-8'))["reply"]
+            conn.sendall(b'{"control": "stats"}\n')
+            stats = json.loads(reader.readline().decode('utf-8'))["stats"]
+        assert stats["weather"]["client"]["breaker"]["state"] == "closed"
+        assert stats["metrics"]["upstreams"]["weather"]["count"] == 1
+
+        host, port = server.metrics_server.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            body = response.read().decode('utf-8')
+        assert 'ushalleat_upstream_latency_seconds_count{upstream="weather"} 1' in body
+        assert 'ushalleat_upstream_failures_total{upstream="weather"} 0' in body
+        assert 'ushalleat_weather_breaker_state 0' in body
+    finally:
+        server.stop()